@@ -1,25 +1,71 @@
 from dotenv import load_dotenv
 load_dotenv()
 
-from typing import List, Dict
+from typing import Any, List, Dict, Literal, Optional
 
+from pydantic import BaseModel, Field
 from langchain_core.documents import Document
+from langchain_core.language_models import BaseChatModel
 from langchain_openai import ChatOpenAI
 from langchain_core.prompts import ChatPromptTemplate
 
+from utils.helpers import parse_llm_json
+
+
+VERDICTS = (
+    "SUPPORTED",
+    "CONTRADICTED",
+    "PARTIALLY_SUPPORTED",
+    "INSUFFICIENT_EVIDENCE",
+)
+
+
+class EvidenceLabel(BaseModel):
+    id: int = Field(description="Evidence number, as in [Evidence N]")
+    label: Literal["SUPPORTS", "CONTRADICTS", "IRRELEVANT"]
+
+
+class FactCheckVerdict(BaseModel):
+    verdict: Literal[
+        "SUPPORTED", "CONTRADICTED", "PARTIALLY_SUPPORTED", "INSUFFICIENT_EVIDENCE"
+    ]
+    confidence: Literal["High", "Medium", "Low"]
+    justification: str = Field(description="Short justification of the verdict")
+    analysis: str = Field(
+        default="",
+        description="Detailed comparison of the evidence: the figures, dates "
+        "and statements each item gives and where they agree or conflict",
+    )
+    evidence: List[EvidenceLabel] = Field(default_factory=list)
+
 
 class FactCheckAgent:
     """
     Cross-verifies claims using retrieved documents
     and determines consistency / contradiction.
+
+    The verdict is structured (`FactCheckVerdict`): models with native
+    structured output (function calling / JSON schema) return it
+    directly; other models are asked for the same JSON object.
     """
 
-    def __init__(self, model: str = "gpt-4o-mini", temperature: float = 0.0):
-        self.llm = ChatOpenAI(
+    def __init__(
+        self,
+        model: str = "gpt-4o-mini",
+        temperature: float = 0.0,
+        llm: Optional[BaseChatModel] = None,
+    ):
+        self.llm = llm or ChatOpenAI(
             model=model,
             temperature=temperature
         )
 
+        try:
+            self.structured_llm = self.llm.with_structured_output(FactCheckVerdict)
+        except NotImplementedError:
+            # e.g. local / fake models: parse the JSON from the text
+            self.structured_llm = None
+
         self.prompt = ChatPromptTemplate.from_messages(
             [
                 (
@@ -45,14 +91,23 @@ Instructions:
    - SUPPORTED
    - CONTRADICTED
    - PARTIALLY_SUPPORTED
-4. Provide a short justification.
-5. List key evidence sources.
+   - INSUFFICIENT_EVIDENCE (the evidence does not address the question)
+4. Rate your confidence: High, Medium or Low.
+5. Provide a short justification.
+6. Provide a detailed analysis: the figures, dates and statements each
+   evidence item gives, and where they agree or conflict.
+7. Label every evidence item SUPPORTS, CONTRADICTS or IRRELEVANT.
+
+Respond with ONLY a JSON object:
+{{"verdict": "...", "confidence": "...", "justification": "...",
+  "analysis": "...", "evidence": [{{"id": 1, "label": "..."}}]}}
 """
                 )
             ]
         )
 
-    def _format_evidence(self, documents: List[Document]) -> str:
+    @staticmethod
+    def _format_evidence(documents: List[Document]) -> str:
         """
         Converts retrieved documents into a readable evidence block.
         """
@@ -76,33 +131,107 @@ Instructions:
         """
 
         if not documents:
-            return {
-                "verdict": "INSUFFICIENT_EVIDENCE",
-                "confidence": "Low",
-                "justification": "No documents were retrieved for validation.",
-                "sources": []
-            }
+            return self._no_evidence_result()
+
+        inputs = {
+            "query": query,
+            "evidence": self._format_evidence(documents)
+        }
+
+        if self.structured_llm is not None:
+            verdict = (self.prompt | self.structured_llm).invoke(inputs)
+            return self._build_result(verdict, documents)
+
+        response = (self.prompt | self.llm).invoke(inputs)
+
+        return self._build_result(response.content, documents)
+
+    async def acheck(self, query: str, documents: List[Document]) -> Dict:
+        """
+        Async counterpart of `check`.
+        """
 
-        evidence_text = self._format_evidence(documents)
+        if not documents:
+            return self._no_evidence_result()
+
+        inputs = {
+            "query": query,
+            "evidence": self._format_evidence(documents)
+        }
+
+        if self.structured_llm is not None:
+            verdict = await (self.prompt | self.structured_llm).ainvoke(inputs)
+            return self._build_result(verdict, documents)
+
+        response = await (self.prompt | self.llm).ainvoke(inputs)
+
+        return self._build_result(response.content, documents)
+
+    @staticmethod
+    def _no_evidence_result() -> Dict:
+        return {
+            "verdict": "INSUFFICIENT_EVIDENCE",
+            "confidence": "Low",
+            "justification": "No documents were retrieved for validation.",
+            "analysis": "No documents were retrieved for validation.",
+            "evidence": [],
+            "sources": []
+        }
+
+    @staticmethod
+    def _parse_verdict(output: Any) -> Optional[Dict]:
+        if isinstance(output, FactCheckVerdict):
+            return output.model_dump()
 
-        chain = self.prompt | self.llm
+        parsed = parse_llm_json(output) if isinstance(output, str) else output
+        if not isinstance(parsed, dict):
+            return None
 
-        response = chain.invoke(
+        verdict = str(parsed.get("verdict", "")).strip().upper()
+        if verdict not in VERDICTS:
+            return None
+
+        return {**parsed, "verdict": verdict}
+
+    @staticmethod
+    def _build_result(output: Any, documents: List[Document]) -> Dict:
+        sources = [
             {
-                "query": query,
-                "evidence": evidence_text
+                "source": d.metadata.get("source"),
+                "document_type": d.metadata.get("document_type"),
+                "section": d.metadata.get("section"),
+            }
+            for d in documents
+        ]
+
+        parsed = FactCheckAgent._parse_verdict(output)
+
+        if parsed is None:
+            # Unstructured reply: keep it for the composer, verdict unknown
+            return {
+                "verdict": "UNKNOWN",
+                "confidence": "Low",
+                "justification": "",
+                "analysis": str(output),
+                "evidence": [],
+                "sources": sources
             }
-        )
+
+        labels = {}
+        for item in parsed.get("evidence") or []:
+            try:
+                labels[int(item["id"])] = str(item["label"]).upper()
+            except (KeyError, TypeError, ValueError):
+                continue
 
         return {
-            "verdict": "SEE_RESPONSE",
-            "analysis": response.content,
-            "sources": [
-                {
-                    "source": d.metadata.get("source"),
-                    "document_type": d.metadata.get("document_type"),
-                    "section": d.metadata.get("section"),
-                }
-                for d in documents
-            ]
+            "verdict": parsed["verdict"],
+            "confidence": str(parsed.get("confidence", "Low")).capitalize(),
+            "justification": str(parsed.get("justification", "")),
+            "analysis": str(parsed.get("analysis") or ""),
+            "evidence": [
+                {**source, "label": labels.get(i)}
+                for i, source in enumerate(sources, start=1)
+            ],
+            "sources": sources
         }
@@ -0,0 +1,327 @@
+from dotenv import load_dotenv
+load_dotenv()
+
+import json
+import re
+from typing import AsyncIterator, Callable, Dict, Iterator, List, Optional
+
+from langchain_core.documents import Document
+from langchain_core.language_models import BaseChatModel
+from langchain_core.prompts import ChatPromptTemplate
+from langchain_openai import ChatOpenAI
+
+from agents.fact_check_agent import FactCheckAgent
+from agents.response_composition_agent import ResponseCompositionAgent
+from utils.helpers import parse_llm_json
+
+
+_ANSWER_KEY_RE = re.compile(r'"answer"\s*:\s*"')
+_STRING_SPECIAL_RE = re.compile(r'["\\]')
+_ESCAPE_RE = re.compile(r'\\(?:u[dD][89abAB][0-9a-fA-F]{2}\\u[0-9a-fA-F]{4}|u[0-9a-fA-F]{4}|["\\/bfnrt])')
+
+# Longest escape: a surrogate pair, \uXXXX\uXXXX
+_MAX_ESCAPE = 12
+
+
+class _AnswerExtractor:
+    """
+    Turns streamed JSON text into increments of its "answer" field.
+    Output that never parses as JSON is passed through as the answer.
+
+    Work per chunk is proportional to the chunk: once the opening of
+    the "answer" string is found, only newly arrived characters are
+    decoded (JSON escapes split across chunks are held back until
+    complete). The whole text is parsed once, in `finish`.
+
+    `result` holds the verdict and justification as soon as they are
+    known: when the answer starts (they come first), or in `finish`.
+    """
+
+    def __init__(self):
+        self._chunks: List[str] = []
+        self._head = ""
+        self._pending: Optional[str] = None
+        self._closed = False
+        self.emitted = 0
+        self.result: Optional[Dict] = None
+
+    @property
+    def raw(self) -> str:
+        return "".join(self._chunks)
+
+    def feed(self, chunk: str) -> str:
+        self._chunks.append(chunk)
+
+        if self._closed:
+            return ""
+
+        if self._pending is None:
+            # Still before the answer; a key split across chunks is
+            # found on the next feed since the head is rescanned from
+            # just before the new text
+            start = max(0, len(self._head) - 32)
+            self._head += chunk
+
+            match = _ANSWER_KEY_RE.search(self._head, start)
+            if match is None:
+                return ""
+
+            self._pending = ""
+            chunk = self._head[match.end():]
+
+            # Everything before the answer key is the rest of the object
+            head = self._head[:match.start()].rstrip().rstrip(",")
+            self.result = _verdict(parse_llm_json(head + "}"))
+
+        delta = self._decode(self._pending + chunk)
+        self.emitted += len(delta)
+        return delta
+
+    def _decode(self, text: str) -> str:
+        out = []
+        i = 0
+        self._pending = ""
+
+        while True:
+            special = _STRING_SPECIAL_RE.search(text, i)
+            if special is None:
+                out.append(text[i:])
+                break
+
+            j = special.start()
+            out.append(text[i:j])
+
+            if text[j] == '"':
+                self._closed = True
+                break
+
+            escape = _ESCAPE_RE.match(text, j)
+            if escape is not None and not (
+                # A high surrogate may still be waiting for its pair
+                escape.group(0)[1] == "u"
+                and len(escape.group(0)) == 6
+                and 0xD800 <= int(escape.group(0)[2:], 16) <= 0xDBFF
+                and len(text) - j < _MAX_ESCAPE
+            ):
+                out.append(json.loads(f'"{escape.group(0)}"'))
+                i = escape.end()
+            elif len(text) - j < _MAX_ESCAPE:
+                # Possibly an escape cut off by the chunk boundary
+                self._pending = text[j:]
+                break
+            else:
+                # Malformed escape: keep the character as written
+                out.append(text[j + 1])
+                i = j + 2
+
+        return "".join(out)
+
+    def finish(self) -> str:
+        if self.emitted > 0:
+            return ""
+
+        parsed = parse_llm_json(self.raw)
+        if self.result is None:
+            self.result = _verdict(parsed)
+
+        if parsed is None:
+            return self.raw
+
+        answer = parsed.get("answer")
+        return answer if isinstance(answer, str) else ""
+
+
+def _verdict(parsed: Optional[Dict]) -> Dict:
+    if parsed is None:
+        return {"verdict": "UNKNOWN", "justification": ""}
+
+    return {
+        "verdict": str(parsed.get("verdict", "UNKNOWN")).upper(),
+        "justification": parsed.get("justification", ""),
+    }
+
+
+class FastAnswerAgent:
+    """
+    Single-call alternative to FactCheckAgent + ResponseCompositionAgent
+    for low-risk query types: one structured (JSON) completion returns
+    the verdict, a one-line justification and the user-facing answer.
+
+    The answer is the last field, so it can be streamed to the user as
+    soon as the model starts writing it. The Sources section is built
+    from document metadata rather than generated.
+    """
+
+    def __init__(
+        self,
+        model: str = "gpt-4o-mini",
+        temperature: float = 0.2,
+        llm: Optional[BaseChatModel] = None,
+    ):
+        if llm is None:
+            llm = ChatOpenAI(
+                model=model,
+                temperature=temperature,
+                model_kwargs={"response_format": {"type": "json_object"}},
+            )
+
+        self.llm = llm
+
+        self.prompt = ChatPromptTemplate.from_messages(
+            [
+                (
+                    "system",
+                    "You are a careful academic assistant. Answer ONLY from "
+                    "the provided evidence; never add external knowledge or "
+                    "invent facts. If the evidence does not answer the "
+                    "question, say so honestly."
+                ),
+                (
+                    "human",
+                    """
+Question:
+{query}
+
+Retrieved Evidence:
+{evidence}
+
+Respond with a single JSON object with exactly these keys, in this order:
+- "verdict": one of SUPPORTED, CONTRADICTED, PARTIALLY_SUPPORTED, INSUFFICIENT_EVIDENCE
+- "justification": one sentence explaining the verdict
+- "answer": a clear, natural-language answer for the user (no Sources list)
+"""
+                )
+            ]
+        )
+
+    def _inputs(self, query: str, documents: List[Document]) -> Dict:
+        return {
+            "query": query,
+            "evidence": FactCheckAgent._format_evidence(documents),
+        }
+
+    @staticmethod
+    def _sources_footer(documents: List[Document]) -> str:
+        return (
+            "\n\nSources:\n"
+            + ResponseCompositionAgent._extract_sources(documents)
+        )
+
+    def answer(self, query: str, documents: List[Document]) -> Dict:
+        """
+        Returns {"verdict", "justification", "answer"} in one LLM call.
+        """
+        if not documents:
+            return {**FactCheckAgent._no_evidence_result(), "answer": ""}
+
+        response = (self.prompt | self.llm).invoke(self._inputs(query, documents))
+        parsed = parse_llm_json(response.content)
+
+        if parsed is None:
+            return {**_verdict(None), "answer": response.content}
+
+        return {**_verdict(parsed), "answer": parsed.get("answer", "")}
+
+    @staticmethod
+    def _report(
+        result: Dict, on_result: Optional[Callable[[Dict], None]]
+    ) -> Optional[str]:
+        """
+        Hands the verdict to `on_result`; returns the canned reply that
+        replaces the answer when the evidence is insufficient.
+        """
+        if on_result is not None:
+            on_result(result)
+
+        if result["verdict"] == "INSUFFICIENT_EVIDENCE":
+            return ResponseCompositionAgent.insufficient_evidence_response(result)
+
+        return None
+
+    def answer_stream(
+        self,
+        query: str,
+        documents: List[Document],
+        on_result: Optional[Callable[[Dict], None]] = None,
+    ) -> Iterator[str]:
+        """
+        Streams the user-facing answer, followed by the Sources section.
+
+        `on_result` receives the verdict and justification once the
+        model has written them, before the answer. An
+        INSUFFICIENT_EVIDENCE verdict ends the call and yields the same
+        canned reply as the fact-check path.
+        """
+        if not documents:
+            yield self._report(FactCheckAgent._no_evidence_result(), on_result)
+            return
+
+        extractor = _AnswerExtractor()
+
+        for chunk in (self.prompt | self.llm).stream(
+            self._inputs(query, documents)
+        ):
+            result = extractor.result
+            delta = extractor.feed(chunk.content)
+
+            if result is None and extractor.result is not None:
+                refusal = self._report(extractor.result, on_result)
+                if refusal is not None:
+                    yield refusal
+                    return
+
+            if delta:
+                yield delta
+
+        yield from self._finish(extractor, documents, on_result)
+
+    async def aanswer_stream(
+        self,
+        query: str,
+        documents: List[Document],
+        on_result: Optional[Callable[[Dict], None]] = None,
+    ) -> AsyncIterator[str]:
+        if not documents:
+            yield self._report(FactCheckAgent._no_evidence_result(), on_result)
+            return
+
+        extractor = _AnswerExtractor()
+
+        async for chunk in (self.prompt | self.llm).astream(
+            self._inputs(query, documents)
+        ):
+            result = extractor.result
+            delta = extractor.feed(chunk.content)
+
+            if result is None and extractor.result is not None:
+                refusal = self._report(extractor.result, on_result)
+                if refusal is not None:
+                    yield refusal
+                    return
+
+            if delta:
+                yield delta
+
+        for token in self._finish(extractor, documents, on_result):
+            yield token
+
+    def _finish(
+        self,
+        extractor: _AnswerExtractor,
+        documents: List[Document],
+        on_result: Optional[Callable[[Dict], None]],
+    ) -> Iterator[str]:
+        reported = extractor.result is not None
+        rest = extractor.finish()
+
+        # No answer key in the output: the verdict comes from the full parse
+        if not reported:
+            refusal = self._report(extractor.result, on_result)
+            if refusal is not None:
+                yield refusal
+                return
+
+        if rest:
+            yield rest
+
+        yield self._sources_footer(documents)
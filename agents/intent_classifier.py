@@ -0,0 +1,181 @@
+import re
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from agents.document_routing_agent import DocumentRoutingAgent
+
+
+# Labels are exactly the routing table keys, so every prediction routes
+LABELS: List[str] = list(DocumentRoutingAgent.ROUTING_RULES)
+
+
+# label -> [(pattern, weight)]
+KEYWORD_RULES: Dict[str, List[Tuple[str, float]]] = {
+    "data": [
+        (r"\b(how many|how much|number of|count|total|sum)\b", 1.0),
+        (r"\b(average|mean|median|percent(age)?|ratio|rate|growth)\b", 1.0),
+        (r"\b(table|spreadsheet|excel|csv|sheet|column|row)s?\b", 1.0),
+        (r"\b(revenue|sales|budget|cost|price|score|metric|statistics?)\b", 1.0),
+        (r"\d+(\.\d+)?\s*%|\b\d{2,}\b", 0.5),
+    ],
+    "profile": [
+        (r"\b(resume|cv|candidate|applicant|profile)s?\b", 1.5),
+        (r"\b(skills?|experience|education|qualifications?|certifications?)\b", 1.0),
+        (r"\b(worked|employment|job|role|career|hired)\b", 0.5),
+    ],
+    "presentation": [
+        (r"\b(slides?|deck|presentation|ppt|pptx|powerpoint)\b", 1.5),
+        (r"\b(speaker notes|talk|pitch)\b", 1.0),
+    ],
+    "research": [
+        (r"\b(paper|study|studies|experiments?|findings|methodology)\b", 1.0),
+        (r"\b(results?|evaluation|hypothes[ie]s|dataset|benchmark)\b", 1.0),
+        (r"\b(contradicts?|contradiction|evidence|claims?|supports?)\b", 1.0),
+        (r"\b(literature|citations?|authors?|published|research)\b", 1.0),
+    ],
+    "conceptual": [
+        (r"^\s*(what is|what are|what does|define)\b", 1.0),
+        (r"\b(explain|definition|concept|theory|intuition|overview)\b", 1.0),
+        (r"\b(difference between|how does|why does|why do|meaning of)\b", 1.0),
+    ],
+}
+
+
+# Seed queries used to build the optional embedding centroids
+DEFAULT_EXAMPLES: Dict[str, List[str]] = {
+    "research": [
+        "What were the main findings of the study?",
+        "Do the experimental results support the paper's claim?",
+        "Which methodology did the authors use?",
+    ],
+    "conceptual": [
+        "Explain the transformer architecture.",
+        "What is retrieval-augmented generation?",
+        "What is the difference between precision and recall?",
+    ],
+    "profile": [
+        "What skills does the candidate have?",
+        "Summarize this person's work experience.",
+        "Which degree is listed on the resume?",
+    ],
+    "data": [
+        "What was the total revenue in 2023?",
+        "How many rows have an accuracy above 90%?",
+        "What is the average value in the results table?",
+    ],
+    "presentation": [
+        "Summarize the slides of the presentation.",
+        "What does the deck say about the roadmap?",
+        "Which topics are covered in the speaker notes?",
+    ],
+    "general": [
+        "Tell me about the uploaded documents.",
+        "What do the files say about this topic?",
+    ],
+}
+
+
+class LocalIntentClassifier:
+    """
+    Classifies queries without an LLM call.
+
+    Weighted keyword/regex rules run first; if they are not
+    confident enough and an embedder is provided, the query is
+    compared against per-label centroids of seed examples.
+    Every prediction is a key of DocumentRoutingAgent.ROUTING_RULES.
+    """
+
+    def __init__(
+        self,
+        embeddings: Optional[Embeddings] = None,
+        examples: Optional[Dict[str, List[str]]] = None,
+        centroid_margin: float = 0.1,
+    ):
+        self.rules = {
+            label: [(re.compile(p, re.IGNORECASE), w) for p, w in rules]
+            for label, rules in KEYWORD_RULES.items()
+        }
+
+        self.embeddings = embeddings
+        self.examples = examples or DEFAULT_EXAMPLES
+
+        # Cosine-similarity margin between the best and second-best
+        # centroid that counts as full confidence
+        self.centroid_margin = centroid_margin
+
+        self._centroid_labels: List[str] = []
+        self._centroids: Optional[np.ndarray] = None
+
+    def predict_rules(self, query: str) -> Tuple[str, float]:
+        """
+        Returns (label, confidence in [0, 1]) from keyword rules.
+        """
+        scores = {
+            label: sum(w for pattern, w in rules if pattern.search(query))
+            for label, rules in self.rules.items()
+        }
+
+        ranked = sorted(scores.items(), key=lambda kv: kv[1], reverse=True)
+        (label, top), (_, second) = ranked[0], ranked[1]
+
+        if top <= 0:
+            return "general", 0.0
+
+        # Unambiguous and backed by at least two signals -> 1.0
+        confidence = ((top - second) / top) * min(1.0, top / 2.0)
+
+        return label, confidence
+
+    def _fit_centroids(self):
+        labels = [label for label in LABELS if self.examples.get(label)]
+        texts = [t for label in labels for t in self.examples[label]]
+        vectors = np.asarray(self.embeddings.embed_documents(texts), dtype=np.float32)
+        vectors /= np.linalg.norm(vectors, axis=1, keepdims=True) + 1e-12
+
+        centroids = []
+        start = 0
+        for label in labels:
+            n = len(self.examples[label])
+            centroid = vectors[start:start + n].mean(axis=0)
+            centroids.append(centroid / (np.linalg.norm(centroid) + 1e-12))
+            start += n
+
+        self._centroid_labels = labels
+        self._centroids = np.stack(centroids)
+
+    def predict_centroid(self, query: str) -> Tuple[str, float]:
+        """
+        Returns (label, confidence in [0, 1]) from the nearest centroid.
+        """
+        if self.embeddings is None:
+            return "general", 0.0
+
+        if self._centroids is None:
+            self._fit_centroids()
+
+        vector = np.asarray(self.embeddings.embed_query(query), dtype=np.float32)
+        vector /= np.linalg.norm(vector) + 1e-12
+
+        sims = self._centroids @ vector
+        order = np.argsort(-sims)
+        margin = float(sims[order[0]] - sims[order[1]]) if len(order) > 1 else 1.0
+
+        return (
+            self._centroid_labels[order[0]],
+            min(1.0, margin / self.centroid_margin),
+        )
+
+    def predict(self, query: str, threshold: float = 0.5) -> Tuple[str, float]:
+        label, confidence = self.predict_rules(query)
+
+        if confidence >= threshold or self.embeddings is None:
+            return label, confidence
+
+        centroid_label, centroid_confidence = self.predict_centroid(query)
+
+        if centroid_confidence > confidence:
+            return centroid_label, centroid_confidence
+
+        return label, confidence
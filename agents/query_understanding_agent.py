@@ -1,10 +1,16 @@
+import asyncio
 import os
+from typing import Optional
 from dotenv import load_dotenv
 
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models import BaseChatModel
 from langchain_core.prompts import PromptTemplate
 from langchain_openai import ChatOpenAI
 from langchain_core.output_parsers import StrOutputParser
 
+from agents.intent_classifier import LABELS, LocalIntentClassifier
+
 # Load environment variables ONCE when agent is initialized
 load_dotenv()
 
@@ -13,10 +19,29 @@ load_dotenv()
 class QueryUnderstandingAgent:
     """
     Classifies a user query into a specific query type.
+
+    Modes:
+    - "llm"    : always ask the LLM
+    - "local"  : keyword rules (+ optional embedding centroids), no LLM
+    - "hybrid" : local first, LLM only when local confidence is low
     """
 
-    def __init__(self, model_name="gpt-4o-mini"):
-        self.llm = ChatOpenAI(model=model_name, temperature=0)
+    def __init__(
+        self,
+        model_name="gpt-4o-mini",
+        mode: str = "hybrid",
+        confidence_threshold: float = 0.5,
+        embeddings: Optional[Embeddings] = None,
+        llm: Optional[BaseChatModel] = None,
+    ):
+        if mode not in ("llm", "local", "hybrid"):
+            raise ValueError(f"Unknown classification mode: {mode}")
+
+        self.model_name = model_name
+        self.llm = llm
+        self.mode = mode
+        self.confidence_threshold = confidence_threshold
+        self.local_classifier = LocalIntentClassifier(embeddings=embeddings)
 
         self.prompt = PromptTemplate(
             input_variables=["query"],
@@ -24,10 +49,12 @@ class QueryUnderstandingAgent:
 You are an AI agent responsible for classifying academic research queries.
 
 Classify the following query into exactly ONE of these categories:
-- conceptual
-- evidence
-- numeric
-- contradiction
+- research      (papers, studies, experiments, findings, evidence)
+- conceptual    (definitions, explanations, theory)
+- profile       (resumes, candidates, skills, experience)
+- data          (numbers, tables, spreadsheets, statistics)
+- presentation  (slides, decks, speaker notes)
+- general       (anything else)
 
 Query:
 {query}
@@ -36,7 +63,61 @@ Respond with ONLY the category name.
 """
         )
 
-        self.chain = self.prompt | self.llm | StrOutputParser()
+        # Built on first use so local mode never needs an API key
+        self._chain = None
+
+    @property
+    def chain(self):
+        if self._chain is None:
+            llm = self.llm or ChatOpenAI(model=self.model_name, temperature=0)
+            self._chain = self.prompt | llm | StrOutputParser()
+
+        return self._chain
+
+    @staticmethod
+    def _normalize_label(label: str) -> str:
+        label = label.strip().lower()
+
+        # Anything outside the routing table would widen the search
+        return label if label in LABELS else "general"
+
+    def _classify_llm(self, query: str) -> str:
+        return self._normalize_label(self.chain.invoke({"query": query}))
 
     def classify(self, query: str) -> str:
-        return self.chain.invoke({"query": query}).strip().lower()
+        if self.mode == "llm":
+            return self._classify_llm(query)
+
+        label, confidence = self.local_classifier.predict(
+            query, threshold=self.confidence_threshold
+        )
+
+        if self.mode == "hybrid" and confidence < self.confidence_threshold:
+            return self._classify_llm(query)
+
+        return label
+
+    async def aclassify(self, query: str) -> str:
+        if self.mode == "llm":
+            return self._normalize_label(
+                await self.chain.ainvoke({"query": query})
+            )
+
+        if self.local_classifier.embeddings is None:
+            # Pure regex rules: microseconds, safe on the event loop
+            label, confidence = self.local_classifier.predict(
+                query, threshold=self.confidence_threshold
+            )
+        else:
+            label, confidence = await asyncio.to_thread(
+                self.local_classifier.predict,
+                query,
+                self.confidence_threshold,
+            )
+
+        if self.mode == "hybrid" and confidence < self.confidence_threshold:
+            return self._normalize_label(
+                await self.chain.ainvoke({"query": query})
+            )
+
+        return label
@@ -0,0 +1,226 @@
+import asyncio
+import copy
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+
+from vectorstore.lexical_index import STOPWORDS, BM25Index, tokenize
+
+
+class LexicalOverlapScorer:
+    """
+    Vectorized query/chunk relevance: BM25-saturated counts of the query
+    terms in each chunk, weighted by how many distinct query terms the
+    chunk covers.
+
+    With a BM25Index, idf and the average chunk length come from the
+    whole corpus, so scores do not depend on which candidates are
+    scored together (and can be cached per chunk).
+    """
+
+    def __init__(
+        self,
+        lexical_index: Optional[BM25Index] = None,
+        k1: float = 1.5,
+        b: float = 0.75,
+    ):
+        self.lexical_index = lexical_index
+        self.k1 = k1
+        self.b = b
+
+    def __call__(self, query: str, texts: Sequence[str]) -> np.ndarray:
+        terms = sorted({t for t in tokenize(query) if t not in STOPWORDS})
+        if not terms or not texts:
+            return np.zeros(len(texts), dtype=np.float32)
+
+        column = {term: j for j, term in enumerate(terms)}
+        tf = np.zeros((len(texts), len(terms)), dtype=np.float32)
+        lengths = np.zeros(len(texts), dtype=np.float32)
+
+        for row, text in enumerate(texts):
+            tokens = tokenize(text)
+            lengths[row] = len(tokens)
+
+            for token in tokens:
+                j = column.get(token)
+                if j is not None:
+                    tf[row, j] += 1
+
+        if self.lexical_index is not None:
+            idf = self.lexical_index.idf(terms)
+            avg_length = self.lexical_index.avg_length
+        else:
+            idf = np.ones(len(terms), dtype=np.float32)
+            avg_length = 200.0
+
+        norm = self.k1 * (1 - self.b + self.b * lengths / max(avg_length, 1e-9))
+        saturated = tf * (self.k1 + 1) / (tf + norm[:, None])
+
+        coverage = (tf > 0).sum(axis=1) / len(terms)
+
+        return (saturated @ idf) * (0.5 + coverage)
+
+
+class CrossEncoderScorer:
+    """
+    Scores (query, chunk) pairs with a small sentence-transformers
+    cross-encoder on CPU. The model is loaded on first use.
+
+    Needs the optional `sentence-transformers` package (see
+    requirements.txt); construction fails early without it.
+    """
+
+    def __init__(
+        self,
+        model_name: str = "cross-encoder/ms-marco-MiniLM-L-6-v2",
+        device: str = "cpu",
+    ):
+        try:
+            from sentence_transformers import CrossEncoder
+        except ImportError as e:
+            raise ImportError(
+                "CrossEncoderScorer needs sentence-transformers: "
+                "pip install sentence-transformers"
+            ) from e
+
+        self._cross_encoder = CrossEncoder
+        self.model_name = model_name
+        self.device = device
+        self._model = None
+
+    def __call__(self, query: str, texts: Sequence[str]) -> np.ndarray:
+        if not texts:
+            return np.zeros(0, dtype=np.float32)
+
+        if self._model is None:
+            self._model = self._cross_encoder(self.model_name, device=self.device)
+
+        return np.asarray(
+            self._model.predict([(query, text) for text in texts]),
+            dtype=np.float32,
+        )
+
+
+class RerankAgent:
+    """
+    Re-orders an over-fetched candidate list and keeps the best `top_n`.
+
+    Candidates are scored in batches of `batch_size`; scores are cached
+    per (query, chunk). If scoring exceeds `latency_budget` seconds, the
+    remaining batches are skipped and the candidates are returned in
+    their original (vector) order.
+    """
+
+    def __init__(
+        self,
+        scorer: Optional[Callable[[str, Sequence[str]], np.ndarray]] = None,
+        top_n: int = 5,
+        batch_size: int = 16,
+        latency_budget: float = 0.25,
+        cache_size: int = 20_000,
+        clock: Callable[[], float] = time.perf_counter,
+    ):
+        self.scorer = scorer or LexicalOverlapScorer()
+        self.top_n = top_n
+        self.batch_size = batch_size
+        self.latency_budget = latency_budget
+        self.cache_size = cache_size
+        self.clock = clock
+
+        self._lock = threading.Lock()
+        self._cache: "OrderedDict[Tuple[str, str], float]" = OrderedDict()
+
+        self.cache_hits = 0
+        self.fallbacks = 0
+
+    def with_lexical_index(self, lexical_index: BM25Index) -> "RerankAgent":
+        """
+        A copy whose LexicalOverlapScorer (if it has no index of its own)
+        takes idf from `lexical_index`. Scores depend on that idf, so the
+        copy starts with an empty cache; this agent is left untouched.
+        """
+        if not (
+            isinstance(self.scorer, LexicalOverlapScorer)
+            and self.scorer.lexical_index is None
+        ):
+            return self
+
+        bound = copy.copy(self)
+        bound.scorer = copy.copy(self.scorer)
+        bound.scorer.lexical_index = lexical_index
+
+        bound._lock = threading.Lock()
+        bound._cache = OrderedDict()
+        bound.cache_hits = 0
+        bound.fallbacks = 0
+
+        return bound
+
+    @staticmethod
+    def _cache_key(query: str, doc: Document) -> Tuple[str, str]:
+        doc_key = doc.id or hashlib.sha1(doc.page_content.encode("utf-8")).hexdigest()
+        return " ".join(query.lower().split()), doc_key
+
+    def _cached(self, keys: List[Tuple[str, str]]) -> List[Optional[float]]:
+        scores = []
+
+        with self._lock:
+            for key in keys:
+                score = self._cache.get(key)
+                if score is not None:
+                    self._cache.move_to_end(key)
+                    self.cache_hits += 1
+                scores.append(score)
+
+        return scores
+
+    def _store(self, keys: List[Tuple[str, str]], scores: np.ndarray):
+        with self._lock:
+            for key, score in zip(keys, scores):
+                self._cache[key] = float(score)
+                self._cache.move_to_end(key)
+
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def rerank(
+        self, query: str, documents: List[Document], top_n: Optional[int] = None
+    ) -> List[Document]:
+        top_n = top_n or self.top_n
+        if len(documents) <= 1:
+            return documents[:top_n]
+
+        start = self.clock()
+
+        keys = [self._cache_key(query, doc) for doc in documents]
+        scores = self._cached(keys)
+        missing = [i for i, score in enumerate(scores) if score is None]
+
+        for offset in range(0, len(missing), self.batch_size):
+            if self.clock() - start > self.latency_budget:
+                # Out of time: vector order is the safe fallback
+                self.fallbacks += 1
+                return documents[:top_n]
+
+            batch = missing[offset:offset + self.batch_size]
+            batch_scores = self.scorer(query, [documents[i].page_content for i in batch])
+            self._store([keys[i] for i in batch], batch_scores)
+
+            for i, score in zip(batch, batch_scores):
+                scores[i] = float(score)
+
+        # Stable sort: equal scores keep their vector rank
+        order = sorted(range(len(documents)), key=lambda i: -scores[i])
+
+        return [documents[i] for i in order[:top_n]]
+
+    async def arerank(
+        self, query: str, documents: List[Document], top_n: Optional[int] = None
+    ) -> List[Document]:
+        # Scoring is CPU-bound; keep it off the event loop
+        return await asyncio.to_thread(self.rerank, query, documents, top_n)
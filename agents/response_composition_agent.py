@@ -1,7 +1,8 @@
 from dotenv import load_dotenv
 load_dotenv()
 
-from typing import Dict, List
+from typing import AsyncIterator, Dict, Iterator, List, Optional
+from langchain_core.language_models import BaseChatModel
 from langchain_openai import ChatOpenAI
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.documents import Document
@@ -14,8 +15,13 @@ class ResponseCompositionAgent:
     without hallucination or invented citations.
     """
 
-    def __init__(self, model: str = "gpt-4o-mini", temperature: float = 0.3):
-        self.llm = ChatOpenAI(
+    def __init__(
+        self,
+        model: str = "gpt-4o-mini",
+        temperature: float = 0.3,
+        llm: Optional[BaseChatModel] = None,
+    ):
+        self.llm = llm or ChatOpenAI(
             model=model,
             temperature=temperature
         )
@@ -72,20 +78,116 @@ Response Guidelines:
         strictly in retrieved documents.
         """
 
-        analysis = fact_check_result.get("analysis", "")
-        formatted_sources = self._extract_sources(documents)
-
         response = (self.prompt | self.llm).invoke(
-            {
-                "query": query,
-                "analysis": analysis,
-                "sources": formatted_sources
-            }
+            self._prompt_inputs(query, documents, fact_check_result)
         )
 
         return response.content
 
     
+    # Streaming compose (yields tokens as they arrive)
+    
+    def compose_stream(
+        self,
+        query: str,
+        documents: List[Document],
+        fact_check_result: Dict
+    ) -> Iterator[str]:
+        """
+        Same as `compose`, but yields the answer token by token.
+        """
+
+        for chunk in (self.prompt | self.llm).stream(
+            self._prompt_inputs(query, documents, fact_check_result)
+        ):
+            if chunk.content:
+                yield chunk.content
+
+    
+    # Async counterparts
+    
+    async def acompose(
+        self,
+        query: str,
+        documents: List[Document],
+        fact_check_result: Dict
+    ) -> str:
+        response = await (self.prompt | self.llm).ainvoke(
+            self._prompt_inputs(query, documents, fact_check_result)
+        )
+
+        return response.content
+
+    async def acompose_stream(
+        self,
+        query: str,
+        documents: List[Document],
+        fact_check_result: Dict
+    ) -> AsyncIterator[str]:
+        async for chunk in (self.prompt | self.llm).astream(
+            self._prompt_inputs(query, documents, fact_check_result)
+        ):
+            if chunk.content:
+                yield chunk.content
+
+    def _prompt_inputs(
+        self,
+        query: str,
+        documents: List[Document],
+        fact_check_result: Dict
+    ) -> Dict:
+        # Evidence the fact-check labelled irrelevant is not cited
+        labels = [e.get("label") for e in fact_check_result.get("evidence", [])]
+        if len(labels) == len(documents):
+            documents = [
+                d for d, label in zip(documents, labels) if label != "IRRELEVANT"
+            ]
+
+        return {
+            "query": query,
+            "analysis": self._format_analysis(fact_check_result),
+            "sources": self._extract_sources(documents)
+        }
+
+    @staticmethod
+    def _format_analysis(fact_check_result: Dict) -> str:
+        verdict = fact_check_result.get("verdict")
+
+        # Free-text analysis from a model without structured output
+        if verdict in (None, "UNKNOWN", "SEE_RESPONSE"):
+            return fact_check_result.get("analysis", "")
+
+        lines = [
+            f"Verdict: {verdict} "
+            f"(confidence: {fact_check_result.get('confidence', 'Low')})",
+            fact_check_result.get("justification", ""),
+        ]
+
+        # The detailed comparison carries the figures behind the verdict
+        if fact_check_result.get("analysis"):
+            lines.append(fact_check_result["analysis"])
+
+        for i, item in enumerate(fact_check_result.get("evidence", []), start=1):
+            if item.get("label"):
+                lines.append(f"Evidence {i} ({item.get('source')}): {item['label']}")
+
+        return "\n".join(lines)
+
+    @staticmethod
+    def insufficient_evidence_response(fact_check_result: Dict) -> str:
+        """
+        Canned reply used instead of an LLM call when the fact-check
+        found nothing that answers the question.
+        """
+        reason = fact_check_result.get("justification", "")
+
+        return (
+            "I could not find enough evidence in the indexed documents "
+            "to answer this question."
+            + (f"\n\n{reason}" if reason else "")
+        )
+
+    
     # Source extraction (precise & citation-safe)
     
     @staticmethod
@@ -104,6 +206,11 @@ Response Guidelines:
 
             if "page" in meta:
                 location = f"page {meta['page']}"
+            elif "row_start" in meta:
+                location = (
+                    f"section: {meta.get('section')}, "
+                    f"rows {meta['row_start']}-{meta['row_end']}"
+                )
             elif "section" in meta:
                 location = f"section: {meta['section']}"
             else:
@@ -1,41 +1,84 @@
 from dotenv import load_dotenv
 load_dotenv()
-from typing import List, Optional
+import asyncio
+from typing import Dict, List, Optional, Sequence, Tuple, Union
 
 from langchain_community.vectorstores import FAISS
 from langchain_core.documents import Document
 
+from vectorstore.embedding_cache import embed_queries
+from vectorstore.lexical_index import BM25Index, reciprocal_rank_fusion
+from vectorstore.milvus_store import MilvusStore
+
+from vectorstore.partitioned_search import DocumentTypePartitions, search_vectors
+
 
 class RetrievalAgent:
     """
-    Retrieves relevant documents from FAISS using
+    Retrieves relevant documents from FAISS (or Milvus) using
     query + routing-based metadata filters.
     """
 
-    def __init__(self, vectorstore: FAISS):
+    def __init__(
+        self,
+        vectorstore: Union[FAISS, MilvusStore],
+        partitions: Optional[DocumentTypePartitions] = None,
+        lexical_index: Optional[BM25Index] = None,
+        hybrid_query_types: Sequence[str] = ("data",),
+        rrf_k: int = 60,
+    ):
         self.vectorstore = vectorstore
 
+        # Per-document-type id partitions; when present, routed queries
+        # search only the allowed partitions (exact top-k, no post-filter)
+        self.partitions = partitions
+
+        # BM25 over the same chunks; keyword / number-heavy query types
+        # fuse it with the vector results (reciprocal rank fusion)
+        self.lexical_index = lexical_index
+        self.hybrid_query_types = set(hybrid_query_types)
+        self.rrf_k = rrf_k
+
+    def uses_hybrid(self, query_type: Optional[str]) -> bool:
+        return (
+            self.lexical_index is not None
+            and query_type in self.hybrid_query_types
+        )
+
     def retrieve(
         self,
         query: str,
         top_k: int = 5,
         allowed_doc_types: Optional[List[str]] = None,
         allowed_sections: Optional[List[str]] = None,
+        hybrid: bool = False,
     ) -> List[Document]:
         """
         Perform similarity search with routing-aware metadata filtering.
+        With `hybrid=True` (and a lexical index), BM25 and vector
+        rankings are fused.
         """
 
+        if hybrid and self.lexical_index is not None:
+            return self._hybrid_search(
+                query,
+                self.vectorstore.embeddings.embed_query(query),
+                top_k,
+                allowed_doc_types,
+                allowed_sections,
+            )
+
+        if self._use_partitions(allowed_doc_types, allowed_sections):
+            return self._partition_search(
+                self.vectorstore.embeddings.embed_query(query),
+                top_k,
+                allowed_doc_types,
+            )
+
        
         # Build FAISS filter
         
-        metadata_filter = {}
-
-        if allowed_doc_types:
-            metadata_filter["document_type"] = allowed_doc_types
-
-        if allowed_sections:
-            metadata_filter["section"] = allowed_sections
+        metadata_filter = self._build_filter(allowed_doc_types, allowed_sections)
 
         
         # Create retriever
@@ -53,3 +96,260 @@ class RetrievalAgent:
         documents = retriever.invoke(query)
 
         return documents
+
+    async def aretrieve(
+        self,
+        query: str,
+        top_k: int = 5,
+        allowed_doc_types: Optional[List[str]] = None,
+        allowed_sections: Optional[List[str]] = None,
+        hybrid: bool = False,
+    ) -> List[Document]:
+        """
+        Async retrieval: the query is embedded asynchronously and the
+        (CPU-bound, GIL-releasing) FAISS search runs in a worker thread,
+        so it never blocks the event loop.
+        """
+
+        metadata_filter = self._build_filter(allowed_doc_types, allowed_sections)
+
+        embedding = await self.vectorstore.embeddings.aembed_query(query)
+
+        if hybrid and self.lexical_index is not None:
+            return await asyncio.to_thread(
+                self._hybrid_search,
+                query,
+                embedding,
+                top_k,
+                allowed_doc_types,
+                allowed_sections,
+            )
+
+        if self._use_partitions(allowed_doc_types, allowed_sections):
+            return await asyncio.to_thread(
+                self._partition_search, embedding, top_k, allowed_doc_types
+            )
+
+        return await asyncio.to_thread(
+            self.vectorstore.similarity_search_by_vector,
+            embedding,
+            k=top_k,
+            filter=metadata_filter if metadata_filter else None,
+        )
+
+    # Batch retrieval: many queries, one embedding call and one
+    # FAISS search per group of queries sharing a routing filter
+
+    def retrieve_batch(
+        self,
+        queries: List[str],
+        top_k: int = 5,
+        allowed_doc_types: Optional[List[Optional[List[str]]]] = None,
+        hybrid: Optional[List[bool]] = None,
+    ) -> List[List[Document]]:
+        """
+        Same results as calling `retrieve` per query, but all queries
+        are embedded together (one request where the embedder allows
+        it), and on FAISS the queries with the same document-type filter
+        are searched as one matrix.
+        """
+        if not queries:
+            return []
+
+        allowed_doc_types = allowed_doc_types or [None] * len(queries)
+        hybrid = hybrid or [False] * len(queries)
+
+        embeddings = embed_queries(self.vectorstore.embeddings, list(queries))
+        results: List[Optional[List[Document]]] = [None] * len(queries)
+
+        # doc-type filter -> indices of the queries using it
+        groups: Dict[Tuple[str, ...], List[int]] = {}
+
+        for i, (query, doc_types) in enumerate(zip(queries, allowed_doc_types)):
+            if hybrid[i] and self.lexical_index is not None:
+                results[i] = self._hybrid_search(
+                    query, embeddings[i], top_k, doc_types, None
+                )
+            elif isinstance(self.vectorstore, FAISS) and (
+                not doc_types or self.partitions is not None
+            ):
+                groups.setdefault(tuple(sorted(doc_types or ())), []).append(i)
+            else:
+                results[i] = self._vector_search(embeddings[i], top_k, doc_types, None)
+
+        for doc_types, indices in groups.items():
+            vectors = [embeddings[i] for i in indices]
+
+            if doc_types:
+                hits = self.partitions.search_batch(
+                    self.vectorstore, vectors, top_k, list(doc_types)
+                )
+            else:
+                hits = search_vectors(self.vectorstore, vectors, top_k)
+
+            for i, row in zip(indices, hits):
+                results[i] = [doc for doc, _ in row]
+
+        return results
+
+    
+    # Speculative retrieval: over-fetch first, filter once routed
+    
+    def retrieve_candidates(
+        self, query: str, fetch_k: int = 50
+    ) -> List[Tuple[Document, float]]:
+        """
+        Unfiltered over-fetch that does not depend on the query class,
+        so it can run while the query is still being classified.
+        """
+
+        return self.vectorstore.similarity_search_with_score(query, k=fetch_k)
+
+    async def aretrieve_candidates(
+        self, query: str, fetch_k: int = 50
+    ) -> List[Tuple[Document, float]]:
+        embedding = await self.vectorstore.embeddings.aembed_query(query)
+
+        return await asyncio.to_thread(
+            self.vectorstore.similarity_search_with_score_by_vector,
+            embedding,
+            k=fetch_k,
+        )
+
+    def filter_candidates(
+        self,
+        candidates: List[Tuple[Document, float]],
+        top_k: int = 5,
+        allowed_doc_types: Optional[List[str]] = None,
+        allowed_sections: Optional[List[str]] = None,
+        min_k: Optional[int] = None,
+    ) -> Optional[List[Document]]:
+        """
+        Applies the routing filter to over-fetched candidates.
+
+        Returns None when fewer than `min_k` (default `top_k`) candidates
+        survive while the over-fetch may have cut off matching chunks;
+        the caller should then fall back to a regular filtered search.
+        A lower `min_k` accepts a short list, e.g. when a reranker only
+        needs its best few out of the survivors.
+        """
+
+        docs = [
+            doc
+            for doc, _ in candidates
+            if (not allowed_doc_types
+                or doc.metadata.get("document_type") in allowed_doc_types)
+            and (not allowed_sections
+                 or doc.metadata.get("section") in allowed_sections)
+        ]
+
+        # If the over-fetch covered the whole index, the result is exact
+        covered_all = len(candidates) >= self._index_size()
+
+        if len(docs) < (top_k if min_k is None else min_k) and not covered_all:
+            return None
+
+        return docs[:top_k]
+
+    
+    def _index_size(self) -> int:
+        if isinstance(self.vectorstore, FAISS):
+            return len(self.vectorstore.index_to_docstore_id)
+
+        return self.vectorstore.count()
+
+    # Partitioned (pre-filtered) search
+    
+    def _use_partitions(
+        self,
+        allowed_doc_types: Optional[List[str]],
+        allowed_sections: Optional[List[str]],
+    ) -> bool:
+        # Sections are not partitioned; they keep the metadata filter
+        return (
+            self.partitions is not None
+            and bool(allowed_doc_types)
+            and not allowed_sections
+        )
+
+    def _partition_search(
+        self,
+        embedding: List[float],
+        top_k: int,
+        allowed_doc_types: List[str],
+    ) -> List[Document]:
+        return [
+            doc
+            for doc, _ in self.partitions.search(
+                self.vectorstore, embedding, top_k, allowed_doc_types
+            )
+        ]
+
+    # Hybrid (BM25 + vector) search
+
+    def _vector_search(
+        self,
+        embedding: List[float],
+        k: int,
+        allowed_doc_types: Optional[List[str]],
+        allowed_sections: Optional[List[str]],
+    ) -> List[Document]:
+        if self._use_partitions(allowed_doc_types, allowed_sections):
+            return self._partition_search(embedding, k, allowed_doc_types)
+
+        metadata_filter = self._build_filter(allowed_doc_types, allowed_sections)
+
+        return self.vectorstore.similarity_search_by_vector(
+            embedding, k=k, filter=metadata_filter if metadata_filter else None
+        )
+
+    def _hybrid_search(
+        self,
+        query: str,
+        embedding: List[float],
+        top_k: int,
+        allowed_doc_types: Optional[List[str]],
+        allowed_sections: Optional[List[str]],
+    ) -> List[Document]:
+        # Both lists go deeper than top_k so fusion has overlap to work with
+        fetch_k = max(4 * top_k, 20)
+
+        dense = self._vector_search(
+            embedding, fetch_k, allowed_doc_types, allowed_sections
+        )
+        docs = {doc.id: doc for doc in dense}
+
+        lexical_ids = []
+        for doc_id, _ in self.lexical_index.search(
+            query, fetch_k, doc_types=allowed_doc_types
+        ):
+            doc = docs.get(doc_id) or self.vectorstore.docstore.search(doc_id)
+
+            if not isinstance(doc, Document):
+                continue
+            if allowed_sections and doc.metadata.get("section") not in allowed_sections:
+                continue
+
+            docs[doc_id] = doc
+            lexical_ids.append(doc_id)
+
+        fused = reciprocal_rank_fusion(
+            [[doc.id for doc in dense], lexical_ids], k=self.rrf_k
+        )
+
+        return [docs[doc_id] for doc_id in fused[:top_k]]
+
+    @staticmethod
+    def _build_filter(
+        allowed_doc_types: Optional[List[str]],
+        allowed_sections: Optional[List[str]],
+    ) -> Dict:
+        metadata_filter = {}
+
+        if allowed_doc_types:
+            metadata_filter["document_type"] = allowed_doc_types
+
+        if allowed_sections:
+            metadata_filter["section"] = allowed_sections
+
+        return metadata_filter
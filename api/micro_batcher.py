@@ -0,0 +1,195 @@
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from orchestration.batch_runner import run_traced_batch
+from orchestration.index_manager import IndexManager
+
+
+class Overloaded(RuntimeError):
+    """
+    Raised when a query cannot be admitted; callers should retry later.
+    """
+
+
+class IndexNotReady(RuntimeError):
+    pass
+
+
+class Admission:
+    """
+    Admission control in front of the LLM stages.
+
+    At most `max_concurrency` queries hold a slot at once; up to
+    `max_queue` more may wait for one, each for at most `timeout`
+    seconds. Anything beyond that is rejected immediately, so load
+    beyond capacity turns into fast 503s instead of an unbounded
+    backlog of slow requests.
+    """
+
+    def __init__(self, max_concurrency: int = 8, max_queue: int = 64, timeout: float = 30.0):
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.timeout = timeout
+
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        self._lock = threading.Lock()
+        self.waiting = 0
+        self.active = 0
+        self.rejected = 0
+
+    def acquire(self):
+        with self._lock:
+            if self.waiting >= self.max_queue:
+                self.rejected += 1
+                raise Overloaded("Too many queued queries")
+            self.waiting += 1
+
+        admitted = self._slots.acquire(timeout=self.timeout)
+
+        with self._lock:
+            self.waiting -= 1
+            if not admitted:
+                self.rejected += 1
+            else:
+                self.active += 1
+
+        if not admitted:
+            raise Overloaded("Timed out waiting for a free LLM slot")
+
+    def release(self):
+        with self._lock:
+            self.active -= 1
+        self._slots.release()
+
+
+class _Pending:
+    def __init__(self, query_id: str, query: str):
+        self.query_id = query_id
+        self.query = query
+        self.row: Optional[Dict] = None
+        self.error: Optional[Exception] = None
+        self.done = threading.Event()
+
+
+class MicroBatcher:
+    """
+    Groups concurrently submitted queries into one `chain.batch` call.
+
+    A query is admitted first (it holds an LLM slot until its batch
+    finishes), then queued. The dispatcher takes the first queued query,
+    waits up to `max_wait` seconds for more, up to `max_batch_size`, and
+    runs the batch on the live chain of `index_manager`: retrieval for
+    the whole batch is one embedding request and one FAISS search per
+    routing filter.
+    """
+
+    def __init__(
+        self,
+        index_manager: IndexManager,
+        max_batch_size: int = 16,
+        max_wait: float = 0.01,
+        admission: Optional[Admission] = None,
+    ):
+        self.index_manager = index_manager
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.admission = admission or Admission()
+
+        self._queue: "queue.Queue[_Pending]" = queue.Queue()
+
+        # Admitted queries never exceed the slot count, so neither do batches
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.admission.max_concurrency,
+            thread_name_prefix="micro-batch",
+        )
+
+        self._lock = threading.Lock()
+        self.batches = 0
+        self.queries = 0
+
+        self._dispatcher = threading.Thread(
+            target=self._dispatch, name="micro-batch-dispatcher", daemon=True
+        )
+        self._dispatcher.start()
+
+    def submit(self, query: str, query_id: str = "") -> Dict:
+        return self.submit_many([(query_id, query)])[0]
+
+    def submit_many(self, queries: List[Tuple[str, str]]) -> List[Dict]:
+        """
+        Runs (id, query) pairs and returns their result rows in order.
+        Raises Overloaded if a query cannot be admitted; queries already
+        admitted still run.
+        """
+        pending = []
+
+        try:
+            for query_id, query in queries:
+                self.admission.acquire()
+                item = _Pending(query_id, query)
+                pending.append(item)
+                self._queue.put(item)
+        finally:
+            for item in pending:
+                item.done.wait()
+
+        for item in pending:
+            if item.error is not None:
+                raise item.error
+
+        return [item.row for item in pending]
+
+    def _dispatch(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.max_wait
+
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                try:
+                    batch.append(self._queue.get(timeout=max(remaining, 0)))
+                except queue.Empty:
+                    break
+
+            self._executor.submit(self._run, batch)
+
+    def _run(self, batch: List[_Pending]):
+        try:
+            with self.index_manager.lease() as chain:
+                if chain is None:
+                    raise IndexNotReady("No index loaded; run ingestion first")
+
+                rows = run_traced_batch(
+                    chain,
+                    [(item.query_id, item.query) for item in batch],
+                    concurrency=len(batch),
+                )
+
+            for item, row in zip(batch, rows):
+                item.row = row
+
+        except Exception as exc:
+            for item in batch:
+                item.error = exc
+
+        finally:
+            with self._lock:
+                self.batches += 1
+                self.queries += len(batch)
+
+            for item in batch:
+                self.admission.release()
+                item.done.set()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "batches": self.batches,
+            "queries": self.queries,
+            "queued": self._queue.qsize(),
+            "active": self.admission.active,
+            "waiting": self.admission.waiting,
+            "rejected": self.admission.rejected,
+        }
@@ -0,0 +1,335 @@
+import argparse
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+from api.micro_batcher import Admission, IndexNotReady, MicroBatcher, Overloaded
+from orchestration.index_manager import IndexManager
+from orchestration.lcel_pipeline import build_agentic_rag_chain
+from orchestration.response_cache import SemanticResponseCache
+from utils.logger import METRICS, configure_logging, log_event
+from vectorstore.embedding_cache import build_embeddings
+
+
+class QueryService:
+    """
+    HTTP-independent core of the query API: keeps the index resident
+    through an IndexManager and runs queries through a MicroBatcher.
+
+    `max_concurrency` bounds the queries in the LLM stages (streams
+    included), `max_queue` how many more may wait for a slot; see
+    Admission.
+    """
+
+    def __init__(
+        self,
+        index_manager: IndexManager,
+        max_batch_size: int = 16,
+        max_wait: float = 0.01,
+        max_concurrency: int = 8,
+        max_queue: int = 64,
+        queue_timeout: float = 30.0,
+        max_queries_per_request: int = 256,
+    ):
+        self.index_manager = index_manager
+        self.admission = Admission(max_concurrency, max_queue, queue_timeout)
+        self.batcher = MicroBatcher(
+            index_manager,
+            max_batch_size=max_batch_size,
+            max_wait=max_wait,
+            admission=self.admission,
+        )
+        self.max_queries_per_request = max_queries_per_request
+
+    def query(self, query: str, query_id: str = "") -> Dict:
+        return self.batcher.submit(query, query_id)
+
+    def batch(self, queries) -> Dict:
+        return {"results": self.batcher.submit_many(queries)}
+
+    def stream(self, query: str):
+        """
+        Yields response tokens. Streams are not batched, but take an
+        LLM slot like any other query.
+        """
+        self.admission.acquire()
+        try:
+            with self.index_manager.lease() as chain:
+                if chain is None:
+                    raise IndexNotReady("No index loaded; run ingestion first")
+
+                yield from chain.stream({"query": query})
+        finally:
+            self.admission.release()
+
+    def ingest_status(self) -> Dict:
+        index_dir = self.index_manager.index_dir
+
+        return {
+            "index_ready": index_dir is not None,
+            "index_version": Path(index_dir).name if index_dir else None,
+            "rebuild": self.index_manager.status(),
+        }
+
+    def start_ingest(self, force_rebuild: bool = False) -> bool:
+        return self.index_manager.start_rebuild(force_rebuild=force_rebuild)
+
+    def health(self) -> Dict:
+        return {
+            "status": "ok",
+            "index_ready": self.index_manager.chain is not None,
+            **self.batcher.stats(),
+        }
+
+
+class _BadRequest(ValueError):
+    pass
+
+
+class _Handler(BaseHTTPRequestHandler):
+    # Chunked transfer encoding for /stream
+    protocol_version = "HTTP/1.1"
+
+    service: QueryService
+
+    def log_message(self, format, *args):
+        log_event("http_request", path=self.path, message=format % args)
+
+    def _send_json(self, status: int, payload: Dict, headers: Optional[Dict] = None):
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _read_json(self) -> Dict:
+        length = int(self.headers.get("Content-Length") or 0)
+        raw = self.rfile.read(length) if length else b""
+
+        try:
+            data = json.loads(raw or b"{}")
+        except ValueError:
+            raise _BadRequest("Body is not valid JSON")
+
+        if not isinstance(data, dict):
+            raise _BadRequest("Body must be a JSON object")
+
+        return data
+
+    @staticmethod
+    def _query(data: Dict) -> str:
+        query = data.get("query")
+        if not isinstance(query, str) or not query.strip():
+            raise _BadRequest("'query' must be a non-empty string")
+
+        return query
+
+    def _queries(self, data: Dict):
+        items = data.get("queries")
+        if not isinstance(items, list) or not items:
+            raise _BadRequest("'queries' must be a non-empty list")
+
+        if len(items) > self.service.max_queries_per_request:
+            raise _BadRequest(
+                f"At most {self.service.max_queries_per_request} queries per request"
+            )
+
+        # Plain strings or {"id": ..., "query": ...} objects
+        return [
+            (str(item.get("id", i)), self._query(item))
+            if isinstance(item, dict) else (str(i), self._query({"query": item}))
+            for i, item in enumerate(items)
+        ]
+
+    def do_GET(self):
+        self._dispatch("GET")
+
+    def do_POST(self):
+        self._dispatch("POST")
+
+    def _dispatch(self, method: str):
+        routes = {
+            ("POST", "/query"): self._post_query,
+            ("POST", "/batch"): self._post_batch,
+            ("POST", "/stream"): self._post_stream,
+            ("POST", "/ingest"): self._post_ingest,
+            ("GET", "/ingest/status"): self._get_ingest_status,
+            ("GET", "/health"): self._get_health,
+            ("GET", "/metrics"): self._get_metrics,
+        }
+        route = routes.get((method, self.path.split("?", 1)[0]))
+
+        if route is None:
+            # The body (if any) was not read: don't reuse the connection
+            self.close_connection = True
+            self._send_json(404, {"error": f"No route for {method} {self.path}"})
+            return
+
+        try:
+            route()
+        except _BadRequest as exc:
+            self._send_json(400, {"error": str(exc)})
+        except Overloaded as exc:
+            # Backpressure: the client should back off and retry
+            self._send_json(503, {"error": str(exc)}, headers={"Retry-After": "1"})
+        except IndexNotReady as exc:
+            self._send_json(503, {"error": str(exc)})
+        except Exception as exc:
+            log_event("http_error", path=self.path, error=repr(exc))
+            self._send_json(500, {"error": f"{type(exc).__name__}: {exc}"})
+
+    def _post_query(self):
+        data = self._read_json()
+        row = self.service.query(self._query(data), str(data.get("id", "")))
+        self._send_json(500 if row["error"] else 200, row)
+
+    def _post_batch(self):
+        self._send_json(200, self.service.batch(self._queries(self._read_json())))
+
+    def _post_stream(self):
+        tokens = self.service.stream(self._query(self._read_json()))
+
+        # Admission and index errors surface before any byte is sent
+        first = next(tokens, "")
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; charset=utf-8")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        try:
+            self._write_chunk(first)
+            for token in tokens:
+                self._write_chunk(token)
+        except (BrokenPipeError, ConnectionResetError):
+            self.close_connection = True
+            return
+        except Exception as exc:
+            # Headers are gone; end the body with the error instead
+            self._write_chunk(f"\n[error] {type(exc).__name__}: {exc}")
+        finally:
+            # Frees the LLM slot even if the client went away
+            tokens.close()
+
+        self.wfile.write(b"0\r\n\r\n")
+
+    def _write_chunk(self, text: str):
+        if not text:
+            return
+
+        data = text.encode("utf-8")
+        self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+        self.wfile.flush()
+
+    def _post_ingest(self):
+        force_rebuild = bool(self._read_json().get("force_rebuild", False))
+
+        if not self.service.start_ingest(force_rebuild=force_rebuild):
+            self._send_json(409, {"error": "A rebuild is already running"})
+            return
+
+        self._send_json(202, self.service.ingest_status())
+
+    def _get_ingest_status(self):
+        self._send_json(200, self.service.ingest_status())
+
+    def _get_health(self):
+        self._send_json(200, self.service.health())
+
+    def _get_metrics(self):
+        body = METRICS.to_prometheus().encode("utf-8")
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def make_server(
+    service: QueryService, host: str = "127.0.0.1", port: int = 8000
+) -> ThreadingHTTPServer:
+    """
+    Threaded HTTP server bound to `service` (port 0 picks a free port).
+    """
+    handler = type("Handler", (_Handler,), {"service": service})
+
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def serve_in_background(server: ThreadingHTTPServer) -> Tuple[threading.Thread, str]:
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    host, port = server.server_address[:2]
+    return thread, f"http://{host}:{port}"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="HTTP query API for the agentic RAG chain")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--faiss-dir", default="vectorstore/faiss_index")
+    parser.add_argument("--data-dir", default="data")
+    parser.add_argument("--max-batch-size", type=int, default=16)
+    parser.add_argument("--max-wait-ms", type=float, default=10.0)
+    parser.add_argument("--llm-concurrency", type=int, default=8)
+    parser.add_argument("--max-queue", type=int, default=64)
+    parser.add_argument("--queue-timeout", type=float, default=30.0)
+    parser.add_argument("--hybrid-types", nargs="*", default=["data"])
+    parser.add_argument("--single-call-types", nargs="*", default=[])
+    parser.add_argument("--nprobe", type=int, help="IVF lists probed (default: saved with the index)")
+    parser.add_argument("--ef-search", type=int, help="HNSW beam width (default: saved with the index)")
+    parser.add_argument("--log", action="store_true", help="JSON logs on stderr")
+    args = parser.parse_args()
+
+    if args.log:
+        configure_logging()
+
+    response_cache = SemanticResponseCache(embeddings=build_embeddings())
+
+    manager = IndexManager(
+        args.faiss_dir,
+        data_dir=args.data_dir,
+        build_chain=lambda faiss_dir: build_agentic_rag_chain(
+            faiss_dir,
+            response_cache=response_cache,
+            hybrid_query_types=args.hybrid_types,
+            single_call_query_types=args.single_call_types,
+            nprobe=args.nprobe,
+            ef_search=args.ef_search,
+        ),
+    )
+
+    # Load the index up front so the first request doesn't pay for it
+    if manager.chain is None:
+        print(" No index yet: POST /ingest to build one")
+
+    server = make_server(
+        QueryService(
+            manager,
+            max_batch_size=args.max_batch_size,
+            max_wait=args.max_wait_ms / 1000,
+            max_concurrency=args.llm_concurrency,
+            max_queue=args.max_queue,
+            queue_timeout=args.queue_timeout,
+        ),
+        args.host,
+        args.port,
+    )
+
+    print(f" Serving on http://{args.host}:{server.server_address[1]}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
@@ -0,0 +1,275 @@
+import csv
+import random
+import textwrap
+from pathlib import Path
+from typing import Dict, List, Sequence
+
+from ingestion.table_chunking import ROWS_PER_CHUNK
+
+# Format -> subdirectory the ingestion pipeline scans
+FORMAT_DIRS = {
+    "txt": "texts",
+    "pdf": "pdf",
+    "docx": "docx",
+    "pptx": "ppts",
+    "xlsx": "excels",
+    "csv": "csv",
+}
+
+FORMATS = tuple(FORMAT_DIRS)
+
+_SUBJECTS = (
+    "baseline model", "transformer encoder", "retrieval stage", "survey cohort",
+    "control group", "sensor array", "pricing model", "regional sales team",
+    "ablation run", "validation split", "reactor sample", "clinical arm",
+)
+_VERBS = (
+    "reached", "reported", "improved to", "declined to", "stabilised at",
+    "averaged", "peaked at", "was measured at",
+)
+_METRICS = (
+    "accuracy", "recall", "precision", "throughput", "latency", "revenue",
+    "yield", "error rate", "response rate", "retention", "margin", "F1 score",
+)
+_CONTEXT = (
+    "after the third training epoch", "in the held-out evaluation",
+    "during the second quarter", "across all participating sites",
+    "under the revised protocol", "compared with the previous release",
+    "when the batch size was doubled", "in the northern region",
+)
+
+# Roughly one chunk at the default 800-character chunk size
+UNIT_CHARS = 700
+
+
+class _Writer:
+    def __init__(self, seed: int):
+        self.random = random.Random(seed)
+
+    def sentence(self) -> str:
+        r = self.random
+        return (
+            f"The {r.choice(_SUBJECTS)} {r.choice(_VERBS)} "
+            f"{r.uniform(1, 99):.2f} percent {r.choice(_METRICS)} "
+            f"{r.choice(_CONTEXT)} in study {r.randint(1, 5000)}."
+        )
+
+    def unit(self) -> str:
+        """
+        A paragraph of about UNIT_CHARS characters.
+        """
+        sentences, size = [], 0
+        while size < UNIT_CHARS:
+            sentence = self.sentence()
+            sentences.append(sentence)
+            size += len(sentence) + 1
+
+        return " ".join(sentences)
+
+    def table_row(self) -> List:
+        r = self.random
+        return [
+            f"study {r.randint(1, 5000)}",
+            r.choice(_SUBJECTS),
+            r.choice(_METRICS),
+            round(r.uniform(1, 99), 2),
+            r.choice(_CONTEXT),
+        ]
+
+
+def _pdf_escape(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def write_pdf(path: Path, pages: Sequence[str]):
+    """
+    Writes a minimal text-only PDF (Helvetica, one text block per page)
+    that pypdf can extract, without a PDF-writing dependency.
+    """
+    objects: Dict[int, bytes] = {
+        3: b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    }
+    page_ids = []
+    next_id = 4
+
+    for text in pages:
+        lines = []
+        for paragraph in text.split("\n"):
+            lines.extend(textwrap.wrap(paragraph, 100) or [""])
+
+        stream = (
+            "BT /F1 8 Tf 10 TL 30 810 Td "
+            + " ".join(f"({_pdf_escape(line)}) '" for line in lines)
+            + " ET"
+        ).encode("latin-1", errors="replace")
+
+        page_id, content_id = next_id, next_id + 1
+        next_id += 2
+
+        objects[content_id] = (
+            b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream"
+        )
+        objects[page_id] = (
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % content_id
+        )
+        page_ids.append(page_id)
+
+    objects[1] = b"<< /Type /Catalog /Pages 2 0 R >>"
+    objects[2] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (
+        b" ".join(b"%d 0 R" % i for i in page_ids),
+        len(page_ids),
+    )
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = {}
+    for object_id in sorted(objects):
+        offsets[object_id] = len(out)
+        out += b"%d 0 obj\n" % object_id + objects[object_id] + b"\nendobj\n"
+
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for object_id in sorted(objects):
+        out += b"%010d 00000 n \n" % offsets[object_id]
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (
+        len(objects) + 1,
+        xref,
+    )
+
+    path.write_bytes(bytes(out))
+
+
+def _write_txt(path: Path, units: List[str]):
+    path.write_text("\n\n".join(units), encoding="utf-8")
+
+
+def _write_pdf_units(path: Path, units: List[str]):
+    # ~8 paragraphs fit on a page at 8pt
+    write_pdf(
+        path,
+        ["\n".join(units[i:i + 8]) for i in range(0, len(units), 8)],
+    )
+
+
+def _write_docx(path: Path, units: List[str]):
+    from docx import Document
+
+    document = Document()
+    for unit in units:
+        document.add_paragraph(unit)
+    document.save(path)
+
+
+def _write_pptx(path: Path, units: List[str]):
+    from pptx import Presentation
+    from pptx.util import Inches
+
+    presentation = Presentation()
+    layout = presentation.slide_layouts[6]
+
+    for unit in units:
+        slide = presentation.slides.add_slide(layout)
+        box = slide.shapes.add_textbox(Inches(0.5), Inches(0.5), Inches(9), Inches(6))
+        box.text_frame.text = unit
+
+    presentation.save(path)
+
+
+_TABLE_HEADER = ["study", "subject", "metric", "value", "context"]
+
+
+def _write_xlsx(path: Path, writer: _Writer, n_units: int):
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet("results")
+    sheet.append(_TABLE_HEADER)
+
+    # One row window per chunk
+    for _ in range(n_units * ROWS_PER_CHUNK):
+        sheet.append(writer.table_row())
+
+    workbook.save(path)
+
+
+def _write_csv(path: Path, writer: _Writer, n_units: int):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        table = csv.writer(f)
+        table.writerow(_TABLE_HEADER)
+        for _ in range(n_units * ROWS_PER_CHUNK):
+            table.writerow(writer.table_row())
+
+
+def generate_corpus(
+    data_dir: str,
+    n_chunks: int = 1000,
+    formats: Sequence[str] = FORMATS,
+    units_per_file: int = 100,
+    seed: int = 0,
+) -> Dict[str, int]:
+    """
+    Writes a synthetic corpus of about `n_chunks` chunks (at the
+    default chunk size), split evenly across `formats`, into the
+    directory layout the ingestion pipeline expects. Same seed, same
+    bytes. Returns the number of files written per format.
+    """
+    unknown = set(formats) - set(FORMAT_DIRS)
+    if unknown:
+        raise ValueError(f"Unknown formats: {sorted(unknown)}")
+
+    writer = _Writer(seed)
+    files_written = {}
+    per_format = max(1, n_chunks // len(formats))
+
+    for fmt in formats:
+        directory = Path(data_dir) / FORMAT_DIRS[fmt]
+        directory.mkdir(parents=True, exist_ok=True)
+
+        remaining, index = per_format, 0
+        while remaining > 0:
+            n_units = min(units_per_file, remaining)
+            path = directory / f"synthetic_{index:05d}.{fmt}"
+
+            if fmt == "xlsx":
+                _write_xlsx(path, writer, n_units)
+            elif fmt == "csv":
+                _write_csv(path, writer, n_units)
+            else:
+                units = [writer.unit() for _ in range(n_units)]
+                {
+                    "txt": _write_txt,
+                    "pdf": _write_pdf_units,
+                    "docx": _write_docx,
+                    "pptx": _write_pptx,
+                }[fmt](path, units)
+
+            remaining -= n_units
+            index += 1
+
+        files_written[fmt] = index
+
+    return files_written
+
+
+def synthetic_queries(n: int, seed: int = 1) -> List[str]:
+    """
+    Questions phrased over the corpus vocabulary, so retrieval has
+    real lexical / vector matches to find.
+    """
+    r = random.Random(seed)
+    templates = (
+        "What {metric} did the {subject} report {context}?",
+        "Did the {subject} improve {metric} {context}?",
+        "Is it true that the {subject} reached {value:.2f} percent {metric}?",
+        "Summarise the {metric} results for the {subject}.",
+    )
+
+    return [
+        r.choice(templates).format(
+            metric=r.choice(_METRICS),
+            subject=r.choice(_SUBJECTS),
+            context=r.choice(_CONTEXT),
+            value=r.uniform(1, 99),
+        )
+        for _ in range(n)
+    ]
@@ -0,0 +1,224 @@
+import asyncio
+import hashlib
+import json
+import re
+import time
+import zlib
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+from langchain_core.callbacks import (
+    AsyncCallbackManagerForLLMRun,
+    CallbackManagerForLLMRun,
+)
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+from utils.helpers import count_tokens
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+
+
+class FakeEmbeddings(Embeddings):
+    """
+    Deterministic stand-in for OpenAIEmbeddings.
+
+    Vectors are signed hashed bags of words, so texts sharing words are
+    close (retrieval behaves like a real, if weak, embedder) and the
+    same text always gets the same vector. `latency` is slept once per
+    request and `latency_per_text` per embedded text, to mimic an API.
+    """
+
+    def __init__(
+        self,
+        size: int = 256,
+        latency: float = 0.0,
+        latency_per_text: float = 0.0,
+    ):
+        self.size = size
+        self.latency = latency
+        self.latency_per_text = latency_per_text
+        self.requests = 0
+
+        # word -> (dimension, sign); synthetic vocabularies are small
+        self._buckets: Dict[str, Tuple[int, float]] = {}
+
+    def _bucket(self, word: str) -> Tuple[int, float]:
+        bucket = self._buckets.get(word)
+
+        if bucket is None:
+            h = zlib.crc32(word.encode("utf-8"))
+            bucket = (h % self.size, 1.0 if h & (1 << 31) else -1.0)
+            self._buckets[word] = bucket
+
+        return bucket
+
+    def _vector(self, text: str) -> List[float]:
+        vector = np.zeros(self.size, dtype=np.float32)
+
+        for word in _WORD_RE.findall(text.lower()):
+            index, sign = self._bucket(word)
+            vector[index] += sign
+
+        norm = np.linalg.norm(vector)
+        if norm == 0:
+            vector[0] = 1.0
+        else:
+            vector /= norm
+
+        return vector.tolist()
+
+    def _delay(self, n_texts: int) -> float:
+        self.requests += 1
+        return self.latency + self.latency_per_text * n_texts
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        time.sleep(self._delay(len(texts)))
+        return [self._vector(t) for t in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        time.sleep(self._delay(1))
+        return self._vector(text)
+
+    def embed_queries(self, texts: List[str]) -> List[List[float]]:
+        # Queries and documents embed alike, in one request
+        return self.embed_documents(texts)
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        await asyncio.sleep(self._delay(len(texts)))
+        return [self._vector(t) for t in texts]
+
+    async def aembed_query(self, text: str) -> List[float]:
+        await asyncio.sleep(self._delay(1))
+        return self._vector(text)
+
+
+class FakeChatModel(BaseChatModel):
+    """
+    Deterministic stand-in for ChatOpenAI that answers each agent's
+    prompt in the format it expects: a category for classification, a
+    JSON verdict (with an "answer" field, for the single-call mode) for
+    fact-checking, and prose for composition.
+
+    `latency` is slept before the first token and `token_latency` per
+    streamed token. Token usage is reported like a provider would.
+    """
+
+    latency: float = 0.0
+    token_latency: float = 0.0
+    verdict: str = "SUPPORTED"
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-chat-benchmark"
+
+    def _respond(self, messages: List[BaseMessage]) -> str:
+        prompt = "\n".join(str(m.content) for m in messages)
+        digest = hashlib.sha1(prompt.encode("utf-8")).hexdigest()
+
+        if "Classify the following query" in prompt:
+            return "general"
+
+        # Fact-check and single-call prompts ask for a JSON "verdict"
+        if '"verdict"' in prompt:
+            return json.dumps(
+                {
+                    "verdict": self.verdict,
+                    "confidence": "High",
+                    "justification": f"Evidence {digest[:8]} addresses the claim.",
+                    "analysis": f"Evidence {digest[:8]} reports figures consistent with the claim.",
+                    "evidence": [],
+                    "answer": f"The documents support the claim (ref {digest[:8]}).",
+                }
+            )
+
+        return (
+            f"Based on the retrieved evidence (ref {digest[:8]}), the claim is "
+            "supported. The relevant passages report consistent figures and "
+            "no retrieved source contradicts them."
+        )
+
+    @staticmethod
+    def _usage(messages: List[BaseMessage], text: str) -> Dict[str, int]:
+        prompt_tokens = sum(count_tokens(str(m.content)) for m in messages)
+        completion_tokens = count_tokens(text)
+
+        return {
+            "input_tokens": prompt_tokens,
+            "output_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+        }
+
+    @staticmethod
+    def _tokens(text: str) -> List[str]:
+        return re.findall(r"\S+\s*", text) or [text]
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        text = self._respond(messages)
+        time.sleep(self.latency + self.token_latency * len(self._tokens(text)))
+
+        message = AIMessage(content=text, usage_metadata=self._usage(messages, text))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    async def _agenerate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        text = self._respond(messages)
+        await asyncio.sleep(self.latency + self.token_latency * len(self._tokens(text)))
+
+        message = AIMessage(content=text, usage_metadata=self._usage(messages, text))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _stream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> Iterator[ChatGenerationChunk]:
+        text = self._respond(messages)
+        time.sleep(self.latency)
+
+        for token in self._tokens(text):
+            time.sleep(self.token_latency)
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=token))
+            if run_manager:
+                run_manager.on_llm_new_token(token, chunk=chunk)
+            yield chunk
+
+        yield ChatGenerationChunk(
+            message=AIMessageChunk(content="", usage_metadata=self._usage(messages, text))
+        )
+
+    async def _astream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        text = self._respond(messages)
+        await asyncio.sleep(self.latency)
+
+        for token in self._tokens(text):
+            await asyncio.sleep(self.token_latency)
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=token))
+            if run_manager:
+                await run_manager.on_llm_new_token(token, chunk=chunk)
+            yield chunk
+
+        yield ChatGenerationChunk(
+            message=AIMessageChunk(content="", usage_metadata=self._usage(messages, text))
+        )
@@ -0,0 +1,361 @@
+import argparse
+import json
+import platform
+import resource
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+import faiss
+import numpy as np
+
+from benchmarks.corpus import FORMATS, generate_corpus, synthetic_queries
+from benchmarks.fakes import FakeChatModel, FakeEmbeddings
+from ingestion.ingestion_pipeline import IngestionPipeline
+from orchestration.lcel_pipeline import STAGES, build_agentic_rag_chain
+from utils.helpers import token_counter
+from utils.logger import METRICS, StageMetrics
+from vectorstore.faiss_loader import load_faiss_index
+
+DEFAULT_BASELINE = "benchmarks/baseline.json"
+
+# Deterministic metrics: the same code gives the same numbers on any
+# machine, so these are gated against the baseline
+HIGHER_IS_BETTER = ("recall_at_5",)
+LOWER_IS_BETTER = (
+    "llm_calls_per_query",
+    "prompt_tokens_per_query",
+    "completion_tokens_per_query",
+    "embedding_requests_per_query",
+    "ingest_embedding_requests",
+)
+# Token counts depend on the tokenizer count_tokens could load
+TOKEN_METRICS = ("prompt_tokens_per_query", "completion_tokens_per_query")
+
+# Wall clock and memory: reported next to the baseline, never gated
+INFORMATIONAL_HIGHER = ("ingest_chunks_per_second", "queries_per_second")
+INFORMATIONAL_LOWER = (
+    "corpus_seconds",
+    "ingest_seconds",
+    "parse_seconds",
+    "embed_seconds",
+    "index_build_seconds",
+    "query_p50_ms",
+    "query_p95_ms",
+    "query_p99_ms",
+    "retrieve_p50_ms",
+    "retrieve_p95_ms",
+    "retrieve_p99_ms",
+    "peak_rss_ingest_mb",
+    "peak_rss_mb",
+)
+
+
+@contextmanager
+def _single_threaded_faiss():
+    # Multi-threaded HNSW construction, and the order of equally distant
+    # hits in a threaded search, vary from run to run; that changes the
+    # retrieved chunks and with them the recall and token metrics
+    threads = faiss.omp_get_max_threads()
+    faiss.omp_set_num_threads(1)
+    try:
+        yield
+    finally:
+        faiss.omp_set_num_threads(threads)
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1 << 20) if sys.platform == "darwin" else peak / 1024
+
+
+def _stage_seconds(before: Dict, after: Dict, prefix: str) -> float:
+    return sum(
+        row["sum"] - before.get(stage, {}).get("sum", 0.0)
+        for stage, row in after.items()
+        if stage.startswith(prefix)
+    )
+
+
+def serving_recall(faiss_dir: str, embeddings, queries: List[str], k: int = 5) -> float:
+    """
+    Recall@k of the index the chain searches (the ANN index when one is
+    built) against exact search over the flat index, for `queries`.
+    """
+    vectors = np.asarray(embeddings.embed_documents(queries), dtype=np.float32)
+
+    flat = faiss.read_index(str(Path(faiss_dir) / "index.faiss"))
+    serving = load_faiss_index(faiss_dir, embeddings=embeddings).index
+
+    _, truth = flat.search(vectors, k)
+    _, ids = serving.search(vectors, k)
+
+    hits = sum(len(set(a) & set(b) - {-1}) for a, b in zip(ids, truth))
+    return hits / max(int((truth >= 0).sum()), 1)
+
+
+def run_benchmark(
+    n_chunks: int = 1000,
+    formats: Sequence[str] = FORMATS,
+    n_queries: int = 100,
+    dim: int = 256,
+    embed_latency: float = 0.0,
+    llm_latency: float = 0.0,
+    token_latency: float = 0.0,
+    workers: int = 1,
+    index_type: str = "flat",
+    seed: int = 0,
+    work_dir: Optional[str] = None,
+) -> Dict[str, float]:
+    """
+    Generates a synthetic corpus, ingests it with fake embeddings and
+    runs `n_queries` through the full chain with a fake LLM. Nothing
+    touches the network and FAISS runs single-threaded, so the call,
+    token and recall metrics only move when the code does; timings also
+    depend on the machine.
+    """
+    with tempfile.TemporaryDirectory(dir=work_dir) as tmp, _single_threaded_faiss():
+        data_dir = str(Path(tmp) / "data")
+        faiss_dir = str(Path(tmp) / "faiss_index")
+
+        start = time.perf_counter()
+        generate_corpus(data_dir, n_chunks=n_chunks, formats=formats, seed=seed)
+        corpus_seconds = time.perf_counter() - start
+
+        embeddings = FakeEmbeddings(size=dim, latency=embed_latency)
+        before = METRICS.summary()
+        requests_before = embeddings.requests
+
+        start = time.perf_counter()
+        IngestionPipeline(
+            data_dir=data_dir,
+            faiss_dir=faiss_dir,
+            embeddings=embeddings,
+            workers=workers,
+            index_type=index_type,
+        ).run()
+        ingest_seconds = time.perf_counter() - start
+
+        after = METRICS.summary()
+        chunks = int(
+            after["ingest.index"]["chunks"]
+            - before.get("ingest.index", {}).get("chunks", 0)
+        )
+        rss_after_ingest = peak_rss_mb()
+        ingest_requests = embeddings.requests - requests_before
+
+        metrics = StageMetrics()
+        chain = build_agentic_rag_chain(
+            faiss_dir,
+            llm=FakeChatModel(latency=llm_latency, token_latency=token_latency),
+            embeddings=embeddings,
+            metrics=metrics,
+        )
+
+        queries = synthetic_queries(n_queries, seed=seed + 1)
+        requests_before = embeddings.requests
+
+        latencies = []
+        start = time.perf_counter()
+        for query in queries:
+            query_start = time.perf_counter()
+            chain.invoke({"query": query})
+            latencies.append(time.perf_counter() - query_start)
+        query_seconds = time.perf_counter() - start
+        query_requests = embeddings.requests - requests_before
+
+        def per_query(name: str) -> float:
+            return sum(metrics.counter(stage, name) for stage in STAGES) / n_queries
+
+        query_ms = np.percentile(np.asarray(latencies) * 1000, [50, 95, 99])
+        retrieve = metrics.percentiles("retrieve")
+
+        return {
+            "chunks": chunks,
+            "queries": n_queries,
+            "corpus_seconds": corpus_seconds,
+            "ingest_seconds": ingest_seconds,
+            "ingest_chunks_per_second": chunks / ingest_seconds,
+            "parse_seconds": _stage_seconds(before, after, "ingest.") - (
+                _stage_seconds(before, after, "ingest.embed")
+                + _stage_seconds(before, after, "ingest.index")
+            ),
+            "embed_seconds": _stage_seconds(before, after, "ingest.embed"),
+            "index_build_seconds": _stage_seconds(before, after, "ingest.index"),
+            "query_p50_ms": float(query_ms[0]),
+            "query_p95_ms": float(query_ms[1]),
+            "query_p99_ms": float(query_ms[2]),
+            "queries_per_second": n_queries / query_seconds,
+            "retrieve_p50_ms": retrieve[0.5] * 1000,
+            "retrieve_p95_ms": retrieve[0.95] * 1000,
+            "retrieve_p99_ms": retrieve[0.99] * 1000,
+            "peak_rss_ingest_mb": rss_after_ingest,
+            "peak_rss_mb": peak_rss_mb(),
+            "recall_at_5": serving_recall(faiss_dir, embeddings, queries, k=5),
+            "llm_calls_per_query": per_query("llm_calls"),
+            "prompt_tokens_per_query": per_query("prompt_tokens"),
+            "completion_tokens_per_query": per_query("completion_tokens"),
+            "embedding_requests_per_query": query_requests / n_queries,
+            "ingest_embedding_requests": ingest_requests,
+        }
+
+
+def scenario_name(n_chunks: int, formats: Sequence[str], index_type: str) -> str:
+    return f"{n_chunks}-{'+'.join(formats)}-{index_type}"
+
+
+def compare(
+    current: Dict[str, float],
+    baseline: Dict[str, float],
+    tolerance: float = 0.01,
+    skip: Sequence[str] = (),
+) -> List[Dict]:
+    """
+    Relative change of every deterministic and informational metric.
+    Only deterministic metrics (minus `skip`) are `gated`; one regresses
+    when it is worse than the baseline by more than `tolerance`.
+    """
+    rows = []
+
+    higher = HIGHER_IS_BETTER + INFORMATIONAL_HIGHER
+    gated = set(HIGHER_IS_BETTER + LOWER_IS_BETTER) - set(skip)
+
+    for name in higher + LOWER_IS_BETTER + INFORMATIONAL_LOWER:
+        if name not in current or name not in baseline:
+            continue
+
+        if baseline[name]:
+            change = (current[name] - baseline[name]) / baseline[name]
+        else:
+            change = 0.0 if current[name] == 0 else float("inf")
+        worse = -change if name in higher else change
+
+        rows.append(
+            {
+                "metric": name,
+                "baseline": baseline[name],
+                "current": current[name],
+                "change": change,
+                "gated": name in gated,
+                "regressed": name in gated and worse > tolerance,
+            }
+        )
+
+    return rows
+
+
+def _baseline_entry(path: str, scenario: str) -> Optional[Dict]:
+    path = Path(path)
+    if not path.exists():
+        return None
+
+    return json.loads(path.read_text()).get(scenario)
+
+
+def load_baseline(path: str, scenario: str) -> Optional[Dict[str, float]]:
+    entry = _baseline_entry(path, scenario)
+    return entry["results"] if entry else None
+
+
+def save_baseline(path: str, scenario: str, results: Dict[str, float]):
+    path = Path(path)
+    data = json.loads(path.read_text()) if path.exists() else {}
+
+    data[scenario] = {
+        "results": results,
+        "machine": platform.platform(),
+        "python": platform.python_version(),
+        "tokenizer": token_counter(),
+        "recorded_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(data, indent=2, sort_keys=True) + "\n")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Offline ingest / index / query benchmark with fake LLM and embedder"
+    )
+    parser.add_argument("--chunks", type=int, default=1000)
+    parser.add_argument("--formats", nargs="*", default=list(FORMATS), choices=FORMATS)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--dim", type=int, default=256)
+    parser.add_argument("--embed-latency", type=float, default=0.0, help="seconds per embedding request")
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="seconds to first token")
+    parser.add_argument("--token-latency", type=float, default=0.0, help="seconds per output token")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--index-type", default="flat")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--work-dir", help="where the corpus and index are built (default: system temp)")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument(
+        "--tolerance", type=float, default=0.01,
+        help="relative slack for the deterministic metrics",
+    )
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--output", help="also write the results as JSON here")
+    args = parser.parse_args()
+
+    results = run_benchmark(
+        n_chunks=args.chunks,
+        formats=args.formats,
+        n_queries=args.queries,
+        dim=args.dim,
+        embed_latency=args.embed_latency,
+        llm_latency=args.llm_latency,
+        token_latency=args.token_latency,
+        workers=args.workers,
+        index_type=args.index_type,
+        seed=args.seed,
+        work_dir=args.work_dir,
+    )
+    scenario = scenario_name(args.chunks, args.formats, args.index_type)
+
+    print(f"\n Scenario: {scenario}")
+    for name, value in results.items():
+        print(f" {name:<30}{value:>14.3f}")
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2) + "\n")
+
+    if args.update_baseline:
+        save_baseline(args.baseline, scenario, results)
+        print(f"\n Baseline updated: {args.baseline}")
+        sys.exit(0)
+
+    entry = _baseline_entry(args.baseline, scenario)
+    if entry is None:
+        print(f"\n No baseline for {scenario} in {args.baseline} (use --update-baseline)")
+        sys.exit(0)
+
+    # Token counts are only comparable under the same tokenizer
+    skip = ()
+    if entry.get("tokenizer") != token_counter():
+        skip = TOKEN_METRICS
+        print(
+            f"\n Baseline counted tokens with {entry.get('tokenizer')}, "
+            f"this run with {token_counter()}: token metrics not gated"
+        )
+
+    rows = compare(results, entry["results"], tolerance=args.tolerance, skip=skip)
+
+    print(f"\n {'metric':<30}{'baseline':>12}{'current':>12}{'change':>9}")
+    for row in rows:
+        if row["regressed"]:
+            flag = "  REGRESSION"
+        elif not row["gated"]:
+            flag = "  (informational)"
+        else:
+            flag = ""
+        print(
+            f" {row['metric']:<30}{row['baseline']:>12.3f}{row['current']:>12.3f}"
+            f"{row['change'] * 100:>8.1f}%{flag}"
+        )
+
+    # Non-zero exit so CI fails on a regression
+    sys.exit(1 if any(row["regressed"] for row in rows) else 0)
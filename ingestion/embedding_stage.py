@@ -0,0 +1,150 @@
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
+
+from langchain_core.embeddings import Embeddings
+
+from utils.helpers import count_tokens
+
+
+def _is_rate_limit(error: Exception) -> bool:
+    if getattr(error, "status_code", None) == 429:
+        return True
+
+    return (
+        type(error).__name__ == "RateLimitError"
+        or "rate limit" in str(error).lower()
+    )
+
+
+class EmbeddingStage:
+    """
+    Embeds chunks through several concurrent, token-budgeted requests.
+
+    Texts are packed into batches of at most `max_batch_tokens` tokens
+    (and `max_batch_size` texts), dispatched on a thread pool, and
+    reassembled in input order. Rate-limit errors trigger exponential
+    backoff and halve the number of in-flight requests; concurrency
+    recovers one step per successful request (AIMD).
+    """
+
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        max_batch_tokens: int = 50_000,
+        max_batch_size: int = 256,
+        concurrency: int = 4,
+        max_retries: int = 6,
+        initial_backoff: float = 1.0,
+    ):
+        self.embeddings = embeddings
+        self.max_batch_tokens = max_batch_tokens
+        self.max_batch_size = max_batch_size
+        self.concurrency = concurrency
+        self.max_retries = max_retries
+        self.initial_backoff = initial_backoff
+
+        self._limit = concurrency
+        self._in_flight = 0
+        self._cond = threading.Condition()
+
+        self.chunks_embedded = 0
+        self.seconds = 0.0
+        self.rate_limited = 0
+
+    @property
+    def chunks_per_second(self) -> float:
+        return self.chunks_embedded / self.seconds if self.seconds else 0.0
+
+    def _batches(self, texts: List[str]) -> List[List[int]]:
+        """
+        Groups text indices into batches under the token budget.
+        """
+        batches: List[List[int]] = []
+        current: List[int] = []
+        current_tokens = 0
+
+        for i, text in enumerate(texts):
+            tokens = count_tokens(text)
+
+            if current and (
+                current_tokens + tokens > self.max_batch_tokens
+                or len(current) >= self.max_batch_size
+            ):
+                batches.append(current)
+                current, current_tokens = [], 0
+
+            current.append(i)
+            current_tokens += tokens
+
+        if current:
+            batches.append(current)
+
+        return batches
+
+    def _acquire(self):
+        with self._cond:
+            while self._in_flight >= self._limit:
+                self._cond.wait()
+            self._in_flight += 1
+
+    def _release(self, rate_limited: bool):
+        with self._cond:
+            self._in_flight -= 1
+
+            if rate_limited:
+                self._limit = max(1, self._limit // 2)
+            elif self._limit < self.concurrency:
+                self._limit += 1
+
+            self._cond.notify_all()
+
+    def _embed_batch(self, texts: List[str]) -> List[List[float]]:
+        for attempt in range(self.max_retries + 1):
+            self._acquire()
+
+            try:
+                vectors = self.embeddings.embed_documents(texts)
+            except Exception as e:
+                self._release(rate_limited=_is_rate_limit(e))
+
+                if not _is_rate_limit(e) or attempt == self.max_retries:
+                    raise
+
+                self.rate_limited += 1
+                delay = self.initial_backoff * (2 ** attempt)
+                time.sleep(delay * random.uniform(0.5, 1.0))
+                continue
+
+            self._release(rate_limited=False)
+            return vectors
+
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        """
+        Embeds `texts`, returning vectors in the same order.
+        """
+        if not texts:
+            return []
+
+        start = time.perf_counter()
+        batches = self._batches(texts)
+
+        with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+            results = list(
+                pool.map(
+                    lambda idx: self._embed_batch([texts[i] for i in idx]),
+                    batches,
+                )
+            )
+
+        vectors: List[List[float]] = [None] * len(texts)
+        for idx, batch_vectors in zip(batches, results):
+            for i, vector in zip(idx, batch_vectors):
+                vectors[i] = vector
+
+        self.seconds += time.perf_counter() - start
+        self.chunks_embedded += len(texts)
+
+        return vectors
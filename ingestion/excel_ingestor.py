@@ -1,33 +1,61 @@
 from pathlib import Path
-from typing import List
-import pandas as pd
+from typing import Iterator, List
 
 from langchain_core.documents import Document
+from openpyxl import load_workbook
+
+from ingestion.table_chunking import MAX_CHUNK_CHARS, ROWS_PER_CHUNK, row_window_documents
 
 
 class ExcelIngestor:
-    def __init__(self, excel_dir: Path):
+    # Emits finished row-window chunks; the pipeline does not re-split them
+    prechunked = True
+
+    def __init__(
+        self,
+        excel_dir: Path,
+        rows_per_chunk: int = ROWS_PER_CHUNK,
+        max_chars: int = MAX_CHUNK_CHARS,
+    ):
         self.excel_dir = excel_dir
+        self.rows_per_chunk = rows_per_chunk
+        self.max_chars = max_chars
 
-    def ingest(self) -> List[Document]:
-        documents = []
+    def files(self) -> List[Path]:
+        return sorted(self.excel_dir.glob("*.xlsx"))
+
+    def ingest_file(self, file: Path) -> Iterator[Document]:
+        # Read-only mode streams rows from the file instead of
+        # loading whole sheets, so memory doesn't grow with sheet size
+        workbook = load_workbook(file, read_only=True, data_only=True)
 
-        for file in self.excel_dir.glob("*.xlsx"):
+        try:
+            for sheet in workbook.worksheets:
+                # Read-only sheets trust the stored <dimension> record,
+                # which many exporters write as just "A1"; read the rows
+                # that are actually there instead (as pandas does)
+                sheet.reset_dimensions()
+
+                yield from row_window_documents(
+                    sheet.iter_rows(values_only=True),
+                    metadata={
+                        "document_type": "xlsx",
+                        "source": file.name,
+                        "section": f"sheet:{sheet.title}",
+                    },
+                    title=f"{file.name}, sheet {sheet.title}",
+                    rows_per_chunk=self.rows_per_chunk,
+                    max_chars=self.max_chars,
+                )
+        finally:
+            workbook.close()
+
+    def iter_documents(self) -> Iterator[Document]:
+        for file in self.files():
             try:
-                df = pd.read_excel(file, sheet_name=None)
-                for sheet, data in df.items():
-                    text = data.astype(str).fillna("").to_string()
-                    documents.append(
-                        Document(
-                            page_content=text,
-                            metadata={
-                                "document_type": "xlsx",
-                                "source": file.name,
-                                "section": f"sheet:{sheet}",
-                            },
-                        )
-                    )
+                yield from self.ingest_file(file)
             except Exception as e:
                 print(f" Failed to ingest {file.name}: {e}")
 
-        return documents
+    def ingest(self) -> List[Document]:
+        return list(self.iter_documents())
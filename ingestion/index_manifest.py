@@ -0,0 +1,87 @@
+import json
+import os
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+
+class IndexManifest:
+    """
+    Tracks which source files are already embedded in the FAISS index.
+
+    Each entry is keyed by the file path relative to the data directory
+    and stores the content hash plus the ids of the chunks it produced,
+    so a rebuild only touches new, changed or deleted files.
+    """
+
+    FILENAME = "manifest.json"
+
+    def __init__(self, faiss_dir: str, splitter_config: Dict):
+        self.path = Path(faiss_dir) / self.FILENAME
+        self.splitter_config = splitter_config
+        self.files: Dict[str, Dict] = {}
+
+    @classmethod
+    def load(cls, faiss_dir: str, splitter_config: Dict) -> "IndexManifest":
+        """
+        Loads the manifest stored next to the index.
+
+        A missing manifest, or one written with a different splitter
+        configuration, yields an empty manifest (full rebuild).
+        """
+        manifest = cls(faiss_dir, splitter_config)
+
+        if not manifest.path.exists():
+            return manifest
+
+        with open(manifest.path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+
+        if data.get("splitter_config") == splitter_config:
+            manifest.files = data.get("files", {})
+
+        return manifest
+
+    def save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+        tmp_path = self.path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "splitter_config": self.splitter_config,
+                    "files": self.files,
+                },
+                f,
+                indent=2,
+                sort_keys=True,
+            )
+
+        # Replace in one step so a crash never leaves a torn manifest
+        os.replace(tmp_path, self.path)
+
+    def diff(
+        self, hashes: Dict[str, str]
+    ) -> Tuple[List[str], List[str], List[str]]:
+        """
+        Compares current file hashes against the manifest.
+
+        Returns (added, changed, removed) file keys.
+        """
+        added = sorted(k for k in hashes if k not in self.files)
+        changed = sorted(
+            k
+            for k, sha in hashes.items()
+            if k in self.files and self.files[k]["sha256"] != sha
+        )
+        removed = sorted(k for k in self.files if k not in hashes)
+
+        return added, changed, removed
+
+    def chunk_ids(self, key: str) -> List[str]:
+        return list(self.files.get(key, {}).get("chunk_ids", []))
+
+    def update(self, key: str, sha256: str, chunk_ids: List[str]):
+        self.files[key] = {"sha256": sha256, "chunk_ids": chunk_ids}
+
+    def remove(self, key: str):
+        self.files.pop(key, None)
@@ -1,8 +1,10 @@
-from typing import List
+import os
+import time
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
 from pathlib import Path
 
+from langchain_core.embeddings import Embeddings
 from langchain_text_splitters import RecursiveCharacterTextSplitter
-from langchain_openai import OpenAIEmbeddings
 from langchain_community.vectorstores import FAISS
 
 from ingestion.pdf_ingestor import PdfIngestor
@@ -10,6 +12,25 @@ from ingestion.docx_ingestor import DocxIngestor
 from ingestion.text_ingestor import TextIngestor
 from ingestion.ppt_ingestor import PPTIngestor
 from ingestion.excel_ingestor import ExcelIngestor
+from ingestion.csv_ingestor import CsvIngestor
+from ingestion.embedding_stage import EmbeddingStage
+from ingestion.index_manifest import IndexManifest
+from ingestion.parallel_ingestion import ingest_files
+from ingestion.table_chunking import MAX_CHUNK_CHARS, ROWS_PER_CHUNK
+from utils.helpers import file_sha256
+from utils.logger import METRICS
+from vectorstore.embedding_cache import build_embeddings
+from vectorstore.faiss_loader import index_version
+from vectorstore.lexical_index import BM25Index
+from vectorstore.milvus_store import MilvusStore
+from vectorstore.faiss_store import (
+    INDEX_TYPES,
+    ann_config_matches,
+    search_params_match,
+    update_ann_index,
+)
+from vectorstore.partitioned_search import DocumentTypePartitions
+from vectorstore.sqlite_docstore import SQLiteDocstore
 
 
 class IngestionPipeline:
@@ -17,62 +38,441 @@ class IngestionPipeline:
         self,
         data_dir: str = "data",
         faiss_dir: str = "vectorstore/faiss_index",
+        chunk_size: int = 800,
+        chunk_overlap: int = 150,
+        table_rows_per_chunk: int = ROWS_PER_CHUNK,
+        embeddings: Optional[Embeddings] = None,
+        workers: int = 1,
+        batch_size: int = 1024,
+        embedding_concurrency: int = 4,
+        index_type: str = "flat",
+        index_params: Optional[Dict] = None,
+        nprobe: Optional[int] = None,
+        ef_search: Optional[int] = None,
+        vector_store: Optional[MilvusStore] = None,
+        progress: Optional[Callable[..., None]] = None,
     ):
         self.data_dir = Path(data_dir)
+
+        # Holds the manifest (and the index itself for FAISS)
         self.faiss_dir = faiss_dir
 
-        self.embeddings = OpenAIEmbeddings()
+        # When set, chunks are written to this Milvus store instead of FAISS
+        self.vector_store = vector_store
+
+        # Called as progress(stage, **counts) while the run advances
+        self.progress = progress
+
+        # Parser processes; 1 = in-process, 0 = one per CPU core
+        self.workers = workers
+
+        # Chunks embedded and appended to the index per step;
+        # bounds peak memory independently of corpus size
+        self.batch_size = batch_size
+
+        if index_type not in INDEX_TYPES:
+            raise ValueError(f"Unknown index type: {index_type}")
+
+        # Query-time index: "flat" (exact) or ivf_flat / hnsw / ivf_pq
+        self.index_type = index_type
+        self.index_params = index_params or {}
+
+        # Query-time defaults saved with the ANN index (tuned if None)
+        self.nprobe = nprobe
+        self.ef_search = ef_search
+
+        self.embeddings = embeddings or build_embeddings()
+        self.embedding_stage = EmbeddingStage(
+            self.embeddings,
+            concurrency=embedding_concurrency,
+        )
+        # Spreadsheets / CSVs are chunked by row windows, not by characters
+        self.table_rows_per_chunk = table_rows_per_chunk
+
         self.splitter = RecursiveCharacterTextSplitter(
-            chunk_size=800,
-            chunk_overlap=150,
+            chunk_size=chunk_size,
+            chunk_overlap=chunk_overlap,
         )
 
-    def run(self):
-        print(" Starting ingestion pipeline")
+        # Any change here invalidates every stored chunk
+        self.splitter_config = {
+            "splitter": "RecursiveCharacterTextSplitter",
+            "chunk_size": chunk_size,
+            "chunk_overlap": chunk_overlap,
+            "table_rows_per_chunk": table_rows_per_chunk,
+            "table_max_chars": MAX_CHUNK_CHARS,
+        }
+
+    def _report(self, stage: str, **counts):
+        if self.progress is not None:
+            self.progress(stage, **counts)
 
-        documents: List = []
-
-        
-        # Ingest documents
-       
-        pdf_docs = PdfIngestor(self.data_dir / "pdf").ingest()
-        docx_docs = DocxIngestor(self.data_dir / "docx").ingest()
-        txt_docs = TextIngestor(self.data_dir / "texts").ingest()
-        ppt_docs = PPTIngestor(self.data_dir / "ppts").ingest()
-        excel_docs = ExcelIngestor(self.data_dir / "excels").ingest()
-
-        
-        # Logging
-        
-        print(f" PDFs   : {len(pdf_docs)}")
-        print(f" DOCX  : {len(docx_docs)}")
-        print(f" TXT   : {len(txt_docs)}")
-        print(f" PPT   : {len(ppt_docs)}")
-        print(f" EXCEL : {len(excel_docs)}")
-
-        documents.extend(
-            pdf_docs
-            + docx_docs
-            + txt_docs
-            + ppt_docs
-            + excel_docs
+    def _ingestors(self) -> List:
+        return [
+            PdfIngestor(self.data_dir / "pdf"),
+            DocxIngestor(self.data_dir / "docx"),
+            TextIngestor(self.data_dir / "texts"),
+            PPTIngestor(self.data_dir / "ppts"),
+            ExcelIngestor(
+                self.data_dir / "excels", rows_per_chunk=self.table_rows_per_chunk
+            ),
+            CsvIngestor(
+                self.data_dir / "csv", rows_per_chunk=self.table_rows_per_chunk
+            ),
+        ]
+
+    def _scan_files(self) -> Dict[str, Tuple[object, Path]]:
+        """
+        Maps every ingestible file (keyed by its path relative to
+        the data directory) to the ingestor responsible for it.
+        """
+        files = {}
+
+        for ingestor in self._ingestors():
+            for path in ingestor.files():
+                key = path.relative_to(self.data_dir).as_posix()
+                files[key] = (ingestor, path)
+
+        return files
+
+    def _load_vectorstore(self) -> Optional[FAISS]:
+        if not (Path(self.faiss_dir) / "index.faiss").exists():
+            return None
+
+        return FAISS.load_local(
+            self.faiss_dir,
+            self.embeddings,
+            allow_dangerous_deserialization=True
         )
 
-        if not documents:
+    def run(self, force_rebuild: bool = False):
+        print(" Starting ingestion pipeline")
+
+        files = self._scan_files()
+
+        if not files:
             raise RuntimeError("No documents found for ingestion")
 
-        
-        # Chunking
-        
-        chunks = self.splitter.split_documents(documents)
-        chunks = [c for c in chunks if c.page_content.strip()]
+        hashes = {key: file_sha256(path) for key, (_, path) in files.items()}
+        self._report("scan", files_total=len(files))
+
+
+        # Manifest diff
+
+        manifest = IndexManifest.load(self.faiss_dir, self.splitter_config)
+
+        if self.vector_store is not None:
+            self._run_vector_store(files, hashes, manifest, force_rebuild)
+            return
+
+        vectorstore = None if force_rebuild else self._load_vectorstore()
+
+        if vectorstore is None:
+            manifest.files = {}
+
+        added, changed, removed = self._diff(manifest, hashes)
+
+        if vectorstore is not None and not (added or changed or removed):
+            if not ann_config_matches(
+                self.faiss_dir, self.index_type, self.index_params
+            ):
+                self._update_ann_index(vectorstore, append_from=None)
+            elif not search_params_match(self.faiss_dir, self.nprobe, self.ef_search):
+                # Only the saved query-time defaults change
+                self._update_ann_index(
+                    vectorstore, append_from=vectorstore.index.ntotal
+                )
+
+            # Index saved before the query-time docstore was introduced
+            docstore = SQLiteDocstore.open(
+                self.faiss_dir, index_version(self.faiss_dir)
+            )
+            if docstore is None:
+                self._write_docstore(vectorstore)
+            else:
+                docstore.close()
+
+            print(" FAISS index is up to date")
+            self._report("done", chunks=0)
+            return
+
+
+        # Drop vectors of changed / deleted files
+
+        ann_append_from = None
+
+        if vectorstore is not None:
+            stale_ids = set()
+            for key in changed + removed:
+                stale_ids.update(manifest.chunk_ids(key))
+
+            stale_ids &= set(vectorstore.index_to_docstore_id.values())
+
+            if stale_ids:
+                vectorstore.delete(list(stale_ids))
+
+            # An approximate index can only be appended to if no
+            # positions shifted underneath it
+            ann_append_from = None if stale_ids else vectorstore.index.ntotal
+
+            print(f" Chunks removed: {len(stale_ids)}")
+
+        for key in changed + removed:
+            manifest.remove(key)
+
+
+        # Stream: parse -> split -> embed -> append, batch by batch
+
+        existing_ids = (
+            set(vectorstore.index_to_docstore_id.values())
+            if vectorstore is not None else set()
+        )
+
+        existing_count = len(existing_ids)
+        total_chunks = 0
+
+        for chunks, chunk_ids, _ in self._chunk_batches(
+            files, hashes, added + changed, manifest
+        ):
+            vectorstore = self._append_batch(
+                vectorstore, chunks, chunk_ids, existing_ids
+            )
+            total_chunks += len(chunks)
+            self._report("embed", chunks=total_chunks)
+
+        print(f" Total chunks created: {total_chunks}")
+
+        # Leftover ids were deleted mid-run: positions shifted
+        if len(existing_ids) != existing_count:
+            ann_append_from = None
+        print(
+            " Embedding throughput: "
+            f"{self.embedding_stage.chunks_per_second:.1f} chunks/sec"
+        )
 
-        print(f" Total chunks created: {len(chunks)}")
 
-        
         # Vector store
-        
-        vectorstore = FAISS.from_documents(chunks, self.embeddings)
-        vectorstore.save_local(self.faiss_dir)
+
+        if vectorstore is None:
+            raise RuntimeError("No chunks produced for ingestion")
+
+        self._report("index", chunks=total_chunks)
+        start = time.perf_counter()
+
+        # Saved under temporary names and swapped in: the old files may
+        # be hard links shared with the live version (see stage_version)
+        vectorstore.save_local(self.faiss_dir, index_name="index.tmp")
+        for suffix in (".faiss", ".pkl"):
+            os.replace(
+                Path(self.faiss_dir) / f"index.tmp{suffix}",
+                Path(self.faiss_dir) / f"index{suffix}",
+            )
+        self._write_docstore(vectorstore)
+        DocumentTypePartitions.from_vectorstore(vectorstore).save(self.faiss_dir)
+        BM25Index.from_vectorstore(vectorstore).save(self.faiss_dir)
+        self._update_ann_index(vectorstore, append_from=ann_append_from)
+        manifest.save()
+
+        # Everything built from the vectors: flat + ANN index, docstore,
+        # partitions and the BM25 index
+        METRICS.observe(
+            "ingest.index",
+            time.perf_counter() - start,
+            chunks=len(vectorstore.index_to_docstore_id),
+        )
 
         print(f" FAISS index saved to {self.faiss_dir}")
+        self._report("done", chunks=total_chunks)
+
+    def _diff(
+        self, manifest: IndexManifest, hashes: Dict[str, str]
+    ) -> Tuple[List[str], List[str], List[str]]:
+        added, changed, removed = manifest.diff(hashes)
+        unchanged = len(hashes) - len(added) - len(changed)
+
+        print(f" New       : {len(added)}")
+        print(f" Changed   : {len(changed)}")
+        print(f" Removed   : {len(removed)}")
+        print(f" Unchanged : {unchanged}")
+
+        return added, changed, removed
+
+    def _chunk_batches(
+        self,
+        files: Dict[str, Tuple[object, Path]],
+        hashes: Dict[str, str],
+        to_ingest: List[str],
+        manifest: IndexManifest,
+    ) -> Iterator[Tuple[List, List[str], List[str]]]:
+        """
+        Streams parse -> split over the files to ingest and yields
+        (chunks, ids, source keys) batches of at most `batch_size`.
+        Files are recorded in the manifest as they are split.
+        """
+        results = ingest_files(
+            (files[key] for key in to_ingest),
+            workers=self.workers,
+        )
+
+        chunks: List = []
+        chunk_ids: List[str] = []
+        chunk_keys: List[str] = []
+
+        for done, (key, (documents, error)) in enumerate(
+            zip(to_ingest, results), start=1
+        ):
+            self._report("parse", files_done=done, files_total=len(to_ingest))
+
+            if error is not None:
+                print(f" Failed to ingest {files[key][1].name}: {error}")
+                continue
+
+            ingestor = files[key][0]
+            if getattr(ingestor, "prechunked", False):
+                file_chunks = documents
+            else:
+                file_chunks = self.splitter.split_documents(documents)
+            file_chunks = [c for c in file_chunks if c.page_content.strip()]
+            METRICS.increment(
+                f"ingest.{type(ingestor).__name__}", chunks=len(file_chunks)
+            )
+
+            ids = [
+                f"{key}:{hashes[key][:12]}:{i}"
+                for i in range(len(file_chunks))
+            ]
+
+            chunks.extend(file_chunks)
+            chunk_ids.extend(ids)
+            chunk_keys.extend([key] * len(ids))
+            manifest.update(key, hashes[key], ids)
+
+            while len(chunks) >= self.batch_size:
+                yield (
+                    chunks[:self.batch_size],
+                    chunk_ids[:self.batch_size],
+                    chunk_keys[:self.batch_size],
+                )
+                del chunks[:self.batch_size]
+                del chunk_ids[:self.batch_size]
+                del chunk_keys[:self.batch_size]
+
+        if chunks:
+            yield chunks, chunk_ids, chunk_keys
+
+    def _run_vector_store(
+        self,
+        files: Dict[str, Tuple[object, Path]],
+        hashes: Dict[str, str],
+        manifest: IndexManifest,
+        force_rebuild: bool,
+    ):
+        store = self.vector_store
+
+        if force_rebuild:
+            store.drop()
+
+        if store.count() == 0:
+            manifest.files = {}
+
+        added, changed, removed = self._diff(manifest, hashes)
+
+        if not (added or changed or removed):
+            print(" Milvus collection is up to date")
+            self._report("done", chunks=0)
+            return
+
+        # Upsert by source: drop every chunk of changed / deleted files
+        store.delete_sources(changed + removed)
+
+        for key in changed + removed:
+            manifest.remove(key)
+
+        total_chunks = 0
+
+        for chunks, chunk_ids, chunk_keys in self._chunk_batches(
+            files, hashes, added + changed, manifest
+        ):
+            texts = [c.page_content for c in chunks]
+            store.add_embeddings(
+                zip(texts, self._embed(texts)),
+                metadatas=[c.metadata for c in chunks],
+                ids=chunk_ids,
+                source_keys=chunk_keys,
+            )
+            total_chunks += len(chunks)
+            self._report("embed", chunks=total_chunks)
+
+        print(f" Total chunks created: {total_chunks}")
+        print(
+            " Embedding throughput: "
+            f"{self.embedding_stage.chunks_per_second:.1f} chunks/sec"
+        )
+
+        store.mark_updated()
+        manifest.save()
+
+        print(f" Chunks written to Milvus collection {store.collection_name}")
+        self._report("done", chunks=total_chunks)
+
+    def _embed(self, texts: List[str]) -> List[List[float]]:
+        start = time.perf_counter()
+        vectors = self.embedding_stage.embed(texts)
+        METRICS.observe("ingest.embed", time.perf_counter() - start, chunks=len(texts))
+
+        return vectors
+
+    def _write_docstore(self, vectorstore: FAISS):
+        SQLiteDocstore.write(
+            self.faiss_dir, vectorstore, flat_version=index_version(self.faiss_dir)
+        )
+
+    def _update_ann_index(self, vectorstore: FAISS, append_from: Optional[int]):
+        update_ann_index(
+            vectorstore.index,
+            self.faiss_dir,
+            self.index_type,
+            flat_version=index_version(self.faiss_dir),
+            params=self.index_params,
+            append_from=append_from,
+            nprobe=self.nprobe,
+            ef_search=self.ef_search,
+        )
+
+    def _append_batch(
+        self,
+        vectorstore: Optional[FAISS],
+        chunks: List,
+        chunk_ids: List[str],
+        existing_ids: set,
+    ) -> FAISS:
+        """
+        Embeds one batch of chunks and appends it to the index,
+        creating the index on the first batch.
+        """
+        texts = [c.page_content for c in chunks]
+        metadatas = [c.metadata for c in chunks]
+        text_embeddings = list(zip(texts, self._embed(texts)))
+
+        if vectorstore is None:
+            return FAISS.from_embeddings(
+                text_embeddings,
+                self.embeddings,
+                metadatas=metadatas,
+                ids=chunk_ids,
+            )
+
+        # Ids left behind by a run that crashed after saving the
+        # index but before saving the manifest
+        leftovers = existing_ids.intersection(chunk_ids)
+        if leftovers:
+            vectorstore.delete(list(leftovers))
+            existing_ids.difference_update(leftovers)
+
+        vectorstore.add_embeddings(
+            text_embeddings,
+            metadatas=metadatas,
+            ids=chunk_ids,
+        )
+
+        return vectorstore
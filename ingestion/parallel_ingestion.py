@@ -0,0 +1,95 @@
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+from langchain_core.documents import Document
+
+from utils.logger import METRICS, log_event
+
+
+def _ingest_one(
+    task: Tuple[object, Path]
+) -> Tuple[List[Document], Optional[str], float]:
+    """
+    Parses a single file, possibly inside a worker process.
+
+    A file is materialized whole (so a mid-file failure drops the
+    file, not half of it). Errors are returned instead of raised
+    so one corrupt file never takes down the rest of the run.
+    The parse time is returned too, since metrics recorded inside a
+    worker process would be lost.
+    """
+    ingestor, path = task
+    start = time.perf_counter()
+
+    try:
+        documents, error = list(ingestor.ingest_file(path)), None
+    except Exception as e:
+        documents, error = [], str(e)
+
+    return documents, error, time.perf_counter() - start
+
+
+def _record(
+    task: Tuple[object, Path],
+    result: Tuple[List[Document], Optional[str], float],
+) -> Tuple[List[Document], Optional[str]]:
+    ingestor, path = task
+    documents, error, seconds = result
+    stage = f"ingest.{type(ingestor).__name__}"
+
+    METRICS.observe(
+        stage,
+        seconds,
+        files=1,
+        documents=len(documents),
+        errors=int(error is not None),
+    )
+    log_event(
+        "ingest_file",
+        stage=stage,
+        file=path.name,
+        seconds=round(seconds, 6),
+        documents=len(documents),
+        error=error,
+    )
+
+    return documents, error
+
+
+def ingest_files(
+    tasks: Iterable[Tuple[object, Path]],
+    workers: int = 1,
+) -> Iterator[Tuple[List[Document], Optional[str]]]:
+    """
+    Parses (ingestor, path) tasks, optionally across a process pool.
+
+    Results are yielded in task order regardless of which worker
+    finishes first, so chunk ids and index layout stay deterministic.
+    At most `2 * workers` files are parsed ahead of the consumer,
+    keeping memory bounded on large corpora.
+    """
+    if workers is None or workers <= 0:
+        workers = os.cpu_count() or 1
+
+    if workers == 1:
+        for task in tasks:
+            yield _record(task, _ingest_one(task))
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+
+        for task in tasks:
+            pending.append((task, pool.submit(_ingest_one, task)))
+
+            if len(pending) >= 2 * workers:
+                task, future = pending.popleft()
+                yield _record(task, future.result())
+
+        while pending:
+            task, future = pending.popleft()
+            yield _record(task, future.result())
@@ -1,5 +1,5 @@
 from pathlib import Path
-from typing import List
+from typing import Iterator, List
 
 from langchain_core.documents import Document
 from langchain_community.document_loaders import PyPDFLoader
@@ -9,29 +9,34 @@ class PdfIngestor:
     def __init__(self, pdf_dir: Path):
         self.pdf_dir = pdf_dir
 
-    def ingest(self) -> List[Document]:
-        documents: List[Document] = []
-
+    def files(self) -> List[Path]:
         if not self.pdf_dir.exists():
-            return documents
+            return []
 
-        for pdf_file in self.pdf_dir.glob("*.pdf"):
-            try:
-                loader = PyPDFLoader(str(pdf_file))
-                pages = loader.load()
+        return sorted(self.pdf_dir.glob("*.pdf"))
+
+    def ingest_file(self, pdf_file: Path) -> Iterator[Document]:
+        loader = PyPDFLoader(str(pdf_file))
 
-                for page in pages:
-                    page.metadata.update(
-                        {
-                            "document_type": "pdf",
-                            "source": pdf_file.name,
-                            "section": f"page_{page.metadata.get('page', 0) + 1}",
-                        }
-                    )
+        # lazy_load parses one page at a time
+        for page in loader.lazy_load():
+            page.metadata.update(
+                {
+                    "document_type": "pdf",
+                    "source": pdf_file.name,
+                    "section": f"page_{page.metadata.get('page', 0) + 1}",
+                }
+            )
 
-                documents.extend(pages)
+            yield page
+
+    def iter_documents(self) -> Iterator[Document]:
+        for pdf_file in self.files():
+            try:
+                yield from self.ingest_file(pdf_file)
 
             except Exception as e:
                 print(f"Failed to ingest {pdf_file.name}: {e}")
 
-        return documents
+    def ingest(self) -> List[Document]:
+        return list(self.iter_documents())
@@ -0,0 +1,82 @@
+import datetime
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence
+
+from langchain_core.documents import Document
+
+# Defaults shared by the Excel and CSV ingestors
+ROWS_PER_CHUNK = 20
+MAX_CHUNK_CHARS = 1500
+
+
+def format_cell(value) -> str:
+    if value is None:
+        return ""
+
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+
+    if isinstance(value, (datetime.datetime, datetime.date, datetime.time)):
+        return value.isoformat()
+
+    return " ".join(str(value).split())
+
+
+def row_window_documents(
+    rows: Iterable[Sequence],
+    metadata: Dict,
+    title: str,
+    rows_per_chunk: int = ROWS_PER_CHUNK,
+    max_chars: int = MAX_CHUNK_CHARS,
+    first_row: int = 1,
+) -> Iterator[Document]:
+    """
+    Streams a table into chunks of at most `rows_per_chunk` rows (fewer
+    if the rows would exceed `max_chars`). The first non-empty row is
+    the header; every chunk repeats it, so a chunk is self-describing
+    when retrieved on its own. Rows are pipe-separated cells, without
+    the column padding of a rendered table.
+
+    `first_row` is the sheet / file row number of the first row, so
+    each chunk's `row_start` / `row_end` point at the source rows.
+    """
+    header: Optional[str] = None
+    window: List[str] = []
+    size = 0
+    start = end = first_row
+
+    def flush() -> Document:
+        return Document(
+            page_content=f"{title} (rows {start}-{end})\n{header}\n" + "\n".join(window),
+            metadata={**metadata, "row_start": start, "row_end": end},
+        )
+
+    for number, row in enumerate(rows, start=first_row):
+        cells = [format_cell(value) for value in row]
+
+        # Trailing empty cells and fully empty rows carry nothing
+        while cells and not cells[-1]:
+            cells.pop()
+        if not cells:
+            continue
+
+        line = " | ".join(cells)
+
+        if header is None:
+            header = line
+            continue
+
+        if window and (
+            len(window) >= rows_per_chunk or size + len(line) + 1 > max_chars
+        ):
+            yield flush()
+            window, size = [], 0
+
+        if not window:
+            start = number
+
+        window.append(line)
+        size += len(line) + 1
+        end = number
+
+    if window:
+        yield flush()
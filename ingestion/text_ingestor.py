@@ -1,5 +1,5 @@
 from pathlib import Path
-from typing import List
+from typing import Iterator, List
 
 from langchain_core.documents import Document
 
@@ -8,31 +8,34 @@ class TextIngestor:
     def __init__(self, text_dir: Path):
         self.text_dir = text_dir
 
-    def ingest(self) -> List[Document]:
-        documents: List[Document] = []
-
+    def files(self) -> List[Path]:
         if not self.text_dir.exists():
-            return documents
+            return []
 
-        for txt_file in self.text_dir.glob("*.txt"):
-            try:
-                content = txt_file.read_text(encoding="utf-8", errors="ignore")
+        return sorted(self.text_dir.glob("*.txt"))
 
-                if not content.strip():
-                    continue
+    def ingest_file(self, txt_file: Path) -> Iterator[Document]:
+        content = txt_file.read_text(encoding="utf-8", errors="ignore")
 
-                doc = Document(
-                    page_content=content,
-                    metadata={
-                        "document_type": "txt",
-                        "source": txt_file.name,
-                        "section": "full_document",
-                    },
-                )
+        if not content.strip():
+            return
 
-                documents.append(doc)
+        yield Document(
+            page_content=content,
+            metadata={
+                "document_type": "txt",
+                "source": txt_file.name,
+                "section": "full_document",
+            },
+        )
+
+    def iter_documents(self) -> Iterator[Document]:
+        for txt_file in self.files():
+            try:
+                yield from self.ingest_file(txt_file)
 
             except Exception as e:
                 print(f"Failed to ingest {txt_file.name}: {e}")
 
-        return documents
+    def ingest(self) -> List[Document]:
+        return list(self.iter_documents())
@@ -1,5 +1,6 @@
-from typing import Dict, Any
+from typing import Dict, Any, List
 
+from langchain_core.documents import Document
 from langchain_core.runnables import RunnableLambda, RunnablePassthrough
 
 from agents.query_understanding_agent import QueryUnderstandingAgent
@@ -60,7 +61,7 @@ def build_agentic_pipeline(vectorstore):
     fact_check = RunnableLambda(
         lambda x: {
             **x,
-            "fact_result": fact_check_agent.evaluate(
+            "fact_result": fact_check_agent.check(
                 x["query"],
                 x["retrieved_docs"]
             )
@@ -73,6 +74,7 @@ def build_agentic_pipeline(vectorstore):
     response_composition = RunnableLambda(
         lambda x: _compose_final_response(
             x["query"],
+            x["retrieved_docs"],
             x["fact_result"],
             response_agent
         )
@@ -93,20 +95,22 @@ def build_agentic_pipeline(vectorstore):
     return agentic_pipeline
 
 
-def _compose_final_response(query: str, fact_result: str, response_agent):
+def _compose_final_response(
+    query: str,
+    documents: List[Document],
+    fact_result: Dict[str, Any],
+    response_agent: ResponseCompositionAgent,
+) -> str:
     """
-    Helper to parse fact-check output and compose final response.
+    Composes the final response from the structured fact-check result.
+    Skips the composition LLM call when there is no usable evidence.
     """
 
-    lines = fact_result.splitlines()
-
-    verdict = lines[0]
-    explanation = lines[1].replace("Explanation:", "").strip()
-    sources = lines[2].replace("Sources:", "").strip()
+    if fact_result["verdict"] == "INSUFFICIENT_EVIDENCE":
+        return response_agent.insufficient_evidence_response(fact_result)
 
     return response_agent.compose(
         query=query,
-        verdict=verdict,
-        explanation=explanation,
-        sources=sources
+        documents=documents,
+        fact_check_result=fact_result
     )
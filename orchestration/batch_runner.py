@@ -0,0 +1,320 @@
+import argparse
+import csv
+import json
+import os
+from pathlib import Path
+from typing import Dict, Iterator, List, Sequence, Set, Tuple
+
+from langchain_core.runnables import Runnable
+
+from orchestration.lcel_pipeline import STAGES, build_agentic_rag_chain
+from utils.logger import METRICS, StageTracer, configure_logging
+from vectorstore.index_versions import current_index_dir
+
+
+# Columns accepted as the query text, in order of preference
+QUERY_COLUMNS = ("query", "claim", "question")
+
+RESULT_FIELDS = [
+    "id",
+    "query",
+    "response",
+    "query_type",
+    "verdict",
+    "confidence",
+    "chunks",
+    "prompt_tokens",
+    "completion_tokens",
+    "seconds",
+    "error",
+] + [f"{stage}_seconds" for stage in STAGES]
+
+
+def _query_column(columns: Sequence[str], path: Path) -> str:
+    for name in QUERY_COLUMNS:
+        if name in columns:
+            return name
+
+    raise ValueError(
+        f"{path.name}: no query column (expected one of {', '.join(QUERY_COLUMNS)})"
+    )
+
+
+def _records(path: Path) -> Iterator[Dict]:
+    suffix = path.suffix.lower()
+
+    if suffix == ".txt":
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                yield {"query": line}
+
+    elif suffix == ".jsonl":
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+    elif suffix == ".csv":
+        with open(path, newline="", encoding="utf-8") as f:
+            yield from csv.DictReader(f)
+
+    elif suffix in (".xlsx", ".xls"):
+        import pandas as pd
+
+        frame = pd.read_excel(path, dtype=str).fillna("")
+        yield from frame.to_dict(orient="records")
+
+    else:
+        raise ValueError(f"Unsupported query file type: {path.suffix}")
+
+
+def load_queries(path: str) -> List[Tuple[str, str]]:
+    """
+    Reads (id, query) pairs from a .txt (one query per line), .jsonl,
+    .csv or .xlsx file. Ids come from an "id" column when present,
+    otherwise from the row number, so a re-run maps rows to the same ids.
+    """
+    path = Path(path)
+    queries = []
+    column = None
+
+    for row_number, record in enumerate(_records(path), start=1):
+        if column is None:
+            column = _query_column(list(record), path)
+
+        query = str(record.get(column) or "").strip()
+        if not query:
+            continue
+
+        query_id = str(record.get("id", "")).strip() or str(row_number)
+        queries.append((query_id, query))
+
+    ids = [query_id for query_id, _ in queries]
+    if len(set(ids)) != len(ids):
+        raise ValueError(f"{path.name}: duplicate query ids")
+
+    return queries
+
+
+class _ResultWriter:
+    """
+    Appends result rows to a .jsonl or .csv file, flushed to disk after
+    every batch so a crash loses at most the batch in flight.
+    """
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self.format = "csv" if self.path.suffix.lower() == ".csv" else "jsonl"
+
+        self._repair()
+        is_new = not self.path.exists() or self.path.stat().st_size == 0
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.path, "a", newline="", encoding="utf-8")
+
+        if self.format == "csv":
+            self._csv = csv.DictWriter(
+                self._file, fieldnames=RESULT_FIELDS, extrasaction="ignore"
+            )
+            if is_new:
+                self._csv.writeheader()
+
+    def _repair(self):
+        # A crash mid-write can leave a partial last line; drop it so
+        # appended rows start on a fresh line
+        if not self.path.exists():
+            return
+
+        data = self.path.read_bytes()
+        if data and not data.endswith(b"\n"):
+            with open(self.path, "r+b") as f:
+                f.truncate(data.rfind(b"\n") + 1)
+
+    def completed_ids(self) -> Set[str]:
+        """
+        Ids whose latest row succeeded; failed rows are retried.
+        """
+        if not self.path.exists():
+            return set()
+
+        with open(self.path, newline="", encoding="utf-8") as f:
+            if self.format == "csv":
+                rows = csv.DictReader(f)
+            else:
+                rows = (json.loads(line) for line in f if line.strip())
+
+            status = {str(row["id"]): not row.get("error") for row in rows}
+
+        return {query_id for query_id, ok in status.items() if ok}
+
+    def write(self, rows: List[Dict]):
+        for row in rows:
+            if self.format == "csv":
+                self._csv.writerow(row)
+            else:
+                self._file.write(json.dumps(row, ensure_ascii=False) + "\n")
+
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def close(self):
+        self._file.close()
+
+
+def run_traced_batch(
+    chain: Runnable,
+    batch: List[Tuple[str, str]],
+    concurrency: int = 8,
+) -> List[Dict]:
+    """
+    Runs (id, query) pairs through `chain.batch` with a StageTracer
+    per query and returns one RESULT_FIELDS row each. A failed query
+    gets its error in the row instead of raising.
+    """
+    tracers = [StageTracer(STAGES, request_id=query_id) for query_id, _ in batch]
+
+    outputs = chain.batch(
+        [{"query": query} for _, query in batch],
+        config=[
+            {"callbacks": [tracer], "max_concurrency": concurrency}
+            for tracer in tracers
+        ],
+        return_exceptions=True,
+    )
+
+    rows = []
+    for (query_id, query), output, tracer in zip(batch, outputs, tracers):
+        failed = isinstance(output, Exception)
+
+        row = {
+            "id": query_id,
+            "query": query,
+            "response": "" if failed else output,
+            "query_type": tracer.fields.get("query_type"),
+            "verdict": tracer.fields.get("verdict"),
+            "confidence": tracer.fields.get("confidence"),
+            "chunks": tracer.fields.get("chunks"),
+            "prompt_tokens": tracer.fields["prompt_tokens"],
+            "completion_tokens": tracer.fields["completion_tokens"],
+            "seconds": round(sum(tracer.timings.values()), 6),
+            "error": tracer.fields.get("error") or (repr(output) if failed else ""),
+        }
+        for stage in STAGES:
+            seconds = tracer.timings.get(stage)
+            row[f"{stage}_seconds"] = round(seconds, 6) if seconds is not None else None
+
+        rows.append(row)
+
+    return rows
+
+
+class BatchRunner:
+    """
+    Runs many queries through the agentic RAG chain for bulk validation.
+
+    Queries go through `chain.batch` in batches of `batch_size`: each
+    batch is embedded in one request and searched against FAISS as one
+    matrix, while the LLM stages run at most `concurrency` queries at a
+    time. Results (with per-stage timings and token counts) are
+    appended to the output after every batch; re-running with the same
+    output file skips queries that already have a result.
+    """
+
+    def __init__(
+        self,
+        chain: Runnable,
+        batch_size: int = 32,
+        concurrency: int = 8,
+    ):
+        self.chain = chain
+        self.batch_size = batch_size
+        self.concurrency = concurrency
+
+    def run(self, queries: List[Tuple[str, str]], output: str) -> Dict[str, int]:
+        writer = _ResultWriter(output)
+
+        try:
+            done = writer.completed_ids()
+            pending = [(qid, q) for qid, q in queries if qid not in done]
+
+            print(f" Queries   : {len(queries)}")
+            print(f" Completed : {len(queries) - len(pending)}")
+            print(f" Pending   : {len(pending)}")
+
+            failed = 0
+            for start in range(0, len(pending), self.batch_size):
+                rows = run_traced_batch(
+                    self.chain,
+                    pending[start:start + self.batch_size],
+                    concurrency=self.concurrency,
+                )
+                writer.write(rows)
+                failed += sum(1 for row in rows if row["error"])
+
+                print(
+                    f" Processed {min(start + self.batch_size, len(pending))}"
+                    f"/{len(pending)}"
+                )
+        finally:
+            writer.close()
+
+        return {
+            "total": len(queries),
+            "skipped": len(queries) - len(pending),
+            "processed": len(pending),
+            "failed": failed,
+        }
+
+
+def _print_stage_summary():
+    print(f"{'stage':<15}{'count':>7}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+
+    for stage, row in METRICS.summary().items():
+        if not row["count"]:
+            continue
+        print(
+            f"{stage:<15}{row['count']:>7}"
+            f"{row['p50'] * 1000:>10.1f}{row['p95'] * 1000:>10.1f}{row['p99'] * 1000:>10.1f}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Run a file of queries through the agentic RAG chain"
+    )
+    parser.add_argument("queries", help=".txt, .jsonl, .csv or .xlsx file of queries")
+    parser.add_argument("output", help="results file (.jsonl or .csv); resumed if it exists")
+    parser.add_argument("--faiss-dir", default="vectorstore/faiss_index")
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--hybrid-types", nargs="*", default=["data"])
+    parser.add_argument("--single-call-types", nargs="*", default=[])
+    parser.add_argument("--nprobe", type=int, help="IVF lists probed (default: saved with the index)")
+    parser.add_argument("--ef-search", type=int, help="HNSW beam width (default: saved with the index)")
+    parser.add_argument("--metrics-file", help="write Prometheus metrics here at the end")
+    parser.add_argument("--log", action="store_true", help="JSON stage logs on stderr")
+    args = parser.parse_args()
+
+    if args.log:
+        configure_logging()
+
+    chain = build_agentic_rag_chain(
+        current_index_dir(args.faiss_dir),
+        hybrid_query_types=args.hybrid_types,
+        single_call_query_types=args.single_call_types,
+        nprobe=args.nprobe,
+        ef_search=args.ef_search,
+    )
+
+    stats = BatchRunner(
+        chain, batch_size=args.batch_size, concurrency=args.concurrency
+    ).run(load_queries(args.queries), args.output)
+
+    print(
+        f" Done: {stats['processed']} processed, {stats['skipped']} skipped, "
+        f"{stats['failed']} failed"
+    )
+    _print_stage_summary()
+
+    if args.metrics_file:
+        METRICS.write_prometheus(args.metrics_file)
@@ -0,0 +1,122 @@
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Dict, Iterator, Optional, Tuple
+
+from langchain_core.runnables import Runnable
+
+from orchestration.lcel_pipeline import build_agentic_rag_chain
+from utils.logger import log_event
+from vectorstore.faiss_loader import index_version
+
+# (index directory, index version fingerprint)
+ChainKey = Tuple[str, Optional[str]]
+
+
+class _Entry:
+    def __init__(self):
+        self.refs = 0
+        self.chain: Optional[Runnable] = None
+        self.error: Optional[BaseException] = None
+        self.ready = threading.Event()
+
+
+class ChainRegistry:
+    """
+    Process-wide registry of loaded chains, one per index version.
+
+    Every caller asking for the same index directory at the same
+    version shares one chain, and with it one memory-mapped index, one
+    docstore connection and one set of agents / LLM clients. The chain
+    is built once (concurrent callers wait for that build) and is
+    read-only afterwards.
+
+    Entries are reference counted: `acquire` / `release` (or `lease`)
+    pin a version, and the last release unloads it, so an old version
+    stays loaded only while queries on it are still running.
+    """
+
+    def __init__(self, build_chain: Optional[Callable[[str], Runnable]] = None):
+        self.build_chain = build_chain or build_agentic_rag_chain
+
+        self._lock = threading.Lock()
+        self._entries: Dict[ChainKey, _Entry] = {}
+
+    @staticmethod
+    def key(index_dir: str) -> ChainKey:
+        # The fingerprint changes when an index is rebuilt in place
+        return str(Path(index_dir)), index_version(index_dir)
+
+    def acquire(self, index_dir: str) -> Tuple[ChainKey, Runnable]:
+        """
+        Pins the chain for the current version of `index_dir`, loading
+        it if no one holds it yet. Pair with `release(key)`.
+        """
+        key = self.key(index_dir)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            loader = entry is None
+            if loader:
+                entry = self._entries[key] = _Entry()
+            entry.refs += 1
+
+        if loader:
+            try:
+                entry.chain = self.build_chain(index_dir)
+            except BaseException as exc:
+                entry.error = exc
+                with self._lock:
+                    self._entries.pop(key, None)
+                raise
+            finally:
+                entry.ready.set()
+
+            log_event("chain_loaded", index_dir=key[0], version=key[1])
+        else:
+            entry.ready.wait()
+            if entry.error is not None:
+                raise entry.error
+
+        return key, entry.chain
+
+    def retain(self, key: ChainKey) -> Runnable:
+        """
+        Adds a reference to an already pinned version.
+        """
+        with self._lock:
+            entry = self._entries[key]
+            entry.refs += 1
+
+        return entry.chain
+
+    def release(self, key: ChainKey):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return
+
+            entry.refs -= 1
+            if entry.refs > 0:
+                return
+
+            # Dropping the last reference closes the mmap and the
+            # docstore connection once the chain is collected
+            del self._entries[key]
+
+        log_event("chain_unloaded", index_dir=key[0], version=key[1])
+
+    @contextmanager
+    def lease(self, index_dir: str) -> Iterator[Runnable]:
+        key, chain = self.acquire(index_dir)
+        try:
+            yield chain
+        finally:
+            self.release(key)
+
+    def loaded(self) -> Dict[ChainKey, int]:
+        """
+        Reference count of every loaded version.
+        """
+        with self._lock:
+            return {key: entry.refs for key, entry in self._entries.items()}
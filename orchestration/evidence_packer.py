@@ -0,0 +1,298 @@
+import re
+from typing import Dict, List, Optional, Tuple
+
+from langchain_core.documents import Document
+
+from utils.helpers import count_tokens
+from vectorstore.lexical_index import STOPWORDS, tokenize
+
+_SENTENCE_RE = re.compile(r"(?<=[.!?])\s+|\n+")
+_ROWS_RE = re.compile(r"\(rows \d+-\d+\)")
+
+# (chunk sequence, first position, last position) of a piece
+Span = Tuple[str, int, int]
+
+
+class EvidencePacker:
+    """
+    Shrinks retrieved chunks to a token budget before they are put
+    into an LLM prompt.
+
+    1. Chunks from the same source/section are merged when one overlaps
+       or contains another (the splitter repeats ~150 characters
+       between neighbouring chunks), so the overlap is sent once, and
+       when they are neighbours by position (consecutive chunk numbers
+       or adjacent table row windows) even without a textual overlap.
+    2. If the evidence is still over `max_tokens`, sentences are kept
+       in order of query relevance (share of query terms they contain,
+       ties broken by retrieval rank) until the budget is used;
+       sentences sharing no query term are dropped. A sentence longer
+       than the remaining budget is cut to fit.
+
+    Kept sentences stay in their original order; gaps are marked "…".
+    """
+
+    def __init__(
+        self,
+        max_tokens: int = 1500,
+        min_overlap: int = 20,
+        encoding_name: str = "cl100k_base",
+    ):
+        self.max_tokens = max_tokens
+        self.min_overlap = min_overlap
+        self.encoding_name = encoding_name
+
+    def _tokens(self, text: str) -> int:
+        return count_tokens(text, self.encoding_name)
+
+    def pack(self, query: str, documents: List[Document]) -> List[Document]:
+        merged = self.merge(documents)
+
+        total = sum(self._tokens(d.page_content) for d in merged)
+        if total <= self.max_tokens:
+            return merged
+
+        return self._prune(query, merged)
+
+
+    # Dedupe / merge
+
+    @staticmethod
+    def _group_key(doc: Document) -> Tuple:
+        meta = doc.metadata or {}
+        return meta.get("source"), meta.get("section")
+
+    def _overlap(self, left: str, right: str) -> int:
+        """
+        Length of the longest suffix of `left` that is a prefix of
+        `right` (0 if shorter than `min_overlap`).
+        """
+        if min(len(left), len(right)) < self.min_overlap:
+            return 0
+
+        probe = right[:self.min_overlap]
+        start = left.find(probe, max(0, len(left) - len(right)))
+
+        # Earliest match = longest overlap
+        while start != -1:
+            if right.startswith(left[start:]):
+                return len(left) - start
+            start = left.find(probe, start + 1)
+
+        return 0
+
+    def _merge_pair(self, left: str, right: str) -> Optional[str]:
+        if right in left:
+            return left
+        if left in right:
+            return right
+
+        size = self._overlap(left, right)
+        if size:
+            return left + right[size:]
+
+        size = self._overlap(right, left)
+        if size:
+            return right + left[size:]
+
+        return None
+
+    @staticmethod
+    def _span(doc: Document) -> Optional[Span]:
+        """
+        Where the chunk sits in its file: its table row window, or the
+        chunk number that ends its id ("<file key>:<hash>:<n>").
+        """
+        meta = doc.metadata or {}
+        if "row_start" in meta and "row_end" in meta:
+            return "rows", int(meta["row_start"]), int(meta["row_end"])
+
+        prefix, _, number = (doc.id or "").rpartition(":")
+        if prefix and number.isdigit():
+            return prefix, int(number), int(number)
+
+        return None
+
+    @staticmethod
+    def _join_neighbours(left: str, right: str) -> str:
+        left_lines = left.split("\n", 2)
+        right_lines = right.split("\n", 2)
+
+        # Row windows repeat the title and header line: keep them once
+        if (
+            len(left_lines) > 1 and len(right_lines) > 2
+            and left_lines[1] == right_lines[1]
+            and _ROWS_RE.search(right_lines[0])
+        ):
+            return left + "\n" + right_lines[2]
+
+        return left + "\n" + right
+
+    def _merge_pieces(self, a: Tuple, b: Tuple) -> Optional[Tuple[str, Optional[Span]]]:
+        (text_a, _, _, span_a), (text_b, _, _, span_b) = a, b
+
+        same_sequence = span_a is not None and span_b is not None and span_a[0] == span_b[0]
+        span = (
+            (span_a[0], min(span_a[1], span_b[1]), max(span_a[2], span_b[2]))
+            if same_sequence else span_a or span_b
+        )
+
+        combined = self._merge_pair(text_a, text_b)
+        if combined is not None:
+            return combined, span
+
+        if not same_sequence:
+            return None
+
+        if span_a[2] + 1 == span_b[1]:
+            return self._join_neighbours(text_a, text_b), span
+        if span_b[2] + 1 == span_a[1]:
+            return self._join_neighbours(text_b, text_a), span
+
+        return None
+
+    def merge(self, documents: List[Document]) -> List[Document]:
+        """
+        Dedupes and stitches overlapping or neighbouring chunks of the
+        same source/section. Output is ordered by the rank of each merged
+        piece's best chunk.
+        """
+        # group -> [(text, rank of its best chunk, that chunk, span)]
+        groups: Dict[Tuple, List[Tuple[str, int, Document, Optional[Span]]]] = {}
+
+        for rank, doc in enumerate(documents):
+            pieces = groups.setdefault(self._group_key(doc), [])
+            piece = (doc.page_content.strip(), rank, doc, self._span(doc))
+
+            # Fold the new chunk into an existing one, then keep folding
+            # in case it bridged two previously separate pieces
+            while True:
+                for i, existing in enumerate(pieces):
+                    merged = self._merge_pieces(existing, piece)
+                    if merged is not None:
+                        del pieces[i]
+                        best = min(existing, piece, key=lambda p: p[1])
+                        piece = (merged[0], best[1], best[2], merged[1])
+                        break
+                else:
+                    break
+
+            pieces.append(piece)
+
+        # Best rank first across groups: pruning breaks ties by position
+        merged = sorted(
+            (piece for pieces in groups.values() for piece in pieces),
+            key=lambda p: p[1],
+        )
+
+        return [
+            self._merged_document(text, origin, span)
+            for text, _, origin, span in merged
+        ]
+
+    @staticmethod
+    def _merged_document(text: str, origin: Document, span: Optional[Span]) -> Document:
+        metadata = dict(origin.metadata)
+
+        # A merged row window cites all of its rows
+        if span is not None and span[0] == "rows" and (
+            (metadata.get("row_start"), metadata.get("row_end")) != span[1:]
+        ):
+            metadata["row_start"], metadata["row_end"] = span[1], span[2]
+            text = _ROWS_RE.sub(f"(rows {span[1]}-{span[2]})", text, count=1)
+
+        return Document(id=origin.id, page_content=text, metadata=metadata)
+
+
+    # Relevance pruning
+
+    @staticmethod
+    def _query_terms(query: str) -> set:
+        return {t for t in tokenize(query) if t not in STOPWORDS}
+
+    def _prune(self, query: str, documents: List[Document]) -> List[Document]:
+        terms = self._query_terms(query)
+
+        # (relevance, doc rank, sentence index, tokens)
+        sentences: List[Tuple[float, int, int, int]] = []
+        split_docs: List[List[str]] = []
+
+        for rank, doc in enumerate(documents):
+            parts = [s for s in _SENTENCE_RE.split(doc.page_content) if s.strip()]
+            split_docs.append(parts)
+
+            for index, sentence in enumerate(parts):
+                words = set(tokenize(sentence))
+                relevance = len(terms & words) / len(terms) if terms else 0.0
+                sentences.append((relevance, rank, index, self._tokens(sentence)))
+
+        # Irrelevant sentences only fill the budget if nothing matches
+        any_relevant = any(relevance > 0 for relevance, *_ in sentences)
+
+        keep = set()
+        # (doc rank, sentence index) -> sentence cut to the budget
+        cut: Dict[Tuple[int, int], str] = {}
+        used = 0
+
+        for relevance, rank, index, tokens in sorted(
+            sentences, key=lambda s: (-s[0], s[1], s[2])
+        ):
+            if relevance == 0 and any_relevant:
+                break
+
+            if used + tokens > self.max_tokens:
+                # Keep the start of the sentence; that uses up the budget
+                head = self._truncate(split_docs[rank][index], self.max_tokens - used)
+                if head is None:
+                    continue
+
+                cut[(rank, index)] = head
+                keep.add((rank, index))
+                break
+
+            keep.add((rank, index))
+            used += tokens
+
+        packed = []
+        for rank, (doc, parts) in enumerate(zip(documents, split_docs)):
+            pieces, previous = [], -1
+
+            for index, sentence in enumerate(parts):
+                if (rank, index) not in keep:
+                    continue
+                if previous != -1 and index != previous + 1:
+                    pieces.append("…")
+                pieces.append(cut.get((rank, index), sentence.strip()))
+                previous = index
+
+            if pieces:
+                packed.append(
+                    Document(
+                        id=doc.id,
+                        page_content=" ".join(pieces),
+                        metadata=doc.metadata,
+                    )
+                )
+
+        return packed
+
+    def _truncate(self, sentence: str, budget: int) -> Optional[str]:
+        """
+        The longest word prefix of `sentence` that fits `budget` tokens
+        with a trailing "…", or None if not even one word does.
+        """
+        words = sentence.split()
+        low, high = 0, len(words) - 1
+
+        # Binary search on the number of kept words
+        while low < high:
+            middle = (low + high + 1) // 2
+            if self._tokens(" ".join(words[:middle]) + " …") <= budget:
+                low = middle
+            else:
+                high = middle - 1
+
+        if low == 0:
+            return None
+
+        return " ".join(words[:low]) + " …"
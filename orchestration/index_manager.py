@@ -0,0 +1,249 @@
+import functools
+import threading
+import time
+import traceback
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Dict, Iterator, Optional
+
+from langchain_core.runnables import Runnable
+
+from ingestion.ingestion_pipeline import IngestionPipeline
+from orchestration.chain_registry import ChainKey, ChainRegistry
+from orchestration.lcel_pipeline import build_agentic_rag_chain
+from utils.logger import log_event
+from vectorstore.index_versions import (
+    current_index_dir,
+    discard_version,
+    prune_versions,
+    publish_version,
+    stage_version,
+)
+
+
+class IndexManager:
+    """
+    Owns the live chain for a versioned index root and rebuilds the
+    index in the background.
+
+    A rebuild ingests into a fresh version directory (seeded with the
+    live one, so it stays incremental), builds the chain on it, then
+    publishes the version and swaps the chain reference. Queries keep
+    using the previous chain until the swap, and a failed rebuild
+    leaves it untouched. One rebuild runs at a time per manager.
+
+    Chains come from a ChainRegistry: the manager pins the live
+    version, `lease()` pins it for the duration of a query, and a
+    replaced version is unloaded once its last query finishes.
+    `build_chain(faiss_dir)` creates a chain for an index directory
+    (ignored when a `registry` is given; by default
+    build_agentic_rag_chain with `chain_options`, e.g. nprobe /
+    ef_search overrides); `pipeline_options` are passed to
+    IngestionPipeline.
+    """
+
+    def __init__(
+        self,
+        root: str = "vectorstore/faiss_index",
+        data_dir: str = "data",
+        build_chain: Optional[Callable[[str], Runnable]] = None,
+        pipeline_options: Optional[Dict] = None,
+        keep_versions: int = 2,
+        registry: Optional[ChainRegistry] = None,
+        chain_options: Optional[Dict] = None,
+    ):
+        self.root = root
+        self.data_dir = data_dir
+
+        if build_chain is None and chain_options:
+            build_chain = functools.partial(build_agentic_rag_chain, **chain_options)
+        self.registry = registry or ChainRegistry(build_chain)
+        self.pipeline_options = pipeline_options or {}
+
+        # Old versions kept on disk for in-flight queries
+        self.keep_versions = keep_versions
+
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._chain: Optional[Runnable] = None
+        self._index_dir: Optional[str] = None
+        self._key: Optional[ChainKey] = None
+
+        self._thread: Optional[threading.Thread] = None
+        self._status: Dict = {"state": "idle"}
+
+    @property
+    def chain(self) -> Optional[Runnable]:
+        """
+        The live chain, picking up versions published by another
+        process. None until an index exists.
+        """
+        self.refresh()
+        return self._chain
+
+    @contextmanager
+    def lease(self) -> Iterator[Optional[Runnable]]:
+        """
+        Yields the live chain and keeps its version loaded until the
+        block exits, even if a rebuild swaps it out meanwhile.
+        """
+        self.refresh()
+
+        with self._lock:
+            key = self._key
+            chain = self.registry.retain(key) if key is not None else None
+
+        try:
+            yield chain
+        finally:
+            if key is not None:
+                self.registry.release(key)
+
+    @property
+    def index_dir(self) -> Optional[str]:
+        return self._index_dir
+
+    def refresh(self) -> bool:
+        """
+        Loads the live version if it changed on disk. While a chain is
+        already being served, a concurrent caller never waits for the
+        load; it keeps the current chain.
+        """
+        index_dir = current_index_dir(self.root)
+        if index_dir == self._index_dir:
+            return False
+
+        if not (Path(index_dir) / "index.faiss").exists():
+            return False
+
+        if not self._refresh_lock.acquire(blocking=self._chain is None):
+            return False
+
+        try:
+            if index_dir == self._index_dir:
+                return False
+
+            self._swap(index_dir, *self.registry.acquire(index_dir))
+            return True
+        finally:
+            self._refresh_lock.release()
+
+    def _swap(self, index_dir: str, key: ChainKey, chain: Runnable):
+        with self._lock:
+            previous = self._key
+            self._chain = chain
+            self._index_dir = index_dir
+            self._key = key
+
+        # Unloads the old version unless queries still hold it
+        if previous is not None:
+            self.registry.release(previous)
+
+    def status(self) -> Dict:
+        """
+        Snapshot of the last (or running) rebuild: `state` is idle,
+        running, succeeded or failed, plus progress counts from the
+        ingestion pipeline.
+        """
+        with self._lock:
+            return dict(self._status)
+
+    def _update(self, **fields):
+        with self._lock:
+            self._status.update(fields)
+
+    def _progress(self, stage: str, **counts):
+        self._update(stage=stage, **counts)
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start_rebuild(self, force_rebuild: bool = False) -> bool:
+        """
+        Starts a background rebuild. Returns False if one is already
+        running.
+        """
+        with self._lock:
+            if self.running:
+                return False
+
+            self._status = {
+                "state": "running",
+                "stage": "staging",
+                "started_at": time.time(),
+            }
+            self._thread = threading.Thread(
+                target=self._rebuild,
+                args=(force_rebuild,),
+                name="index-rebuild",
+                daemon=True,
+            )
+            self._thread.start()
+
+        return True
+
+    def wait(self, timeout: Optional[float] = None) -> Dict:
+        thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+
+        return self.status()
+
+    def _rebuild(self, force_rebuild: bool):
+        start = time.perf_counter()
+        version_dir = None
+        key = None
+
+        try:
+            version_dir = stage_version(self.root)
+
+            pipeline = IngestionPipeline(
+                data_dir=self.data_dir,
+                faiss_dir=version_dir,
+                progress=self._progress,
+                **self.pipeline_options,
+            )
+            pipeline.run(force_rebuild=force_rebuild)
+
+            # Warm the new chain before anyone is switched over to it
+            self._update(stage="loading")
+            key, chain = self.registry.acquire(version_dir)
+
+            publish_version(self.root, version_dir)
+
+        except Exception as exc:
+            if key is not None:
+                self.registry.release(key)
+            if version_dir is not None:
+                discard_version(version_dir)
+
+            traceback.print_exc()
+            self._update(
+                state="failed",
+                error=f"{type(exc).__name__}: {exc}",
+                finished_at=time.time(),
+            )
+            log_event(
+                "index_rebuild",
+                status="failed",
+                seconds=time.perf_counter() - start,
+                error=str(exc),
+            )
+            return
+
+        self._swap(version_dir, key, chain)
+        # Versions still leased by queries in this process are kept
+        in_use = [Path(index_dir).name for index_dir, _ in self.registry.loaded()]
+        pruned = prune_versions(self.root, keep=self.keep_versions, in_use=in_use)
+
+        version = Path(version_dir).name
+        self._update(state="succeeded", version=version, finished_at=time.time())
+        log_event(
+            "index_rebuild",
+            status="succeeded",
+            version=version,
+            seconds=time.perf_counter() - start,
+            pruned=len(pruned),
+        )
+        print(f" Index version {version} is live")
@@ -1,61 +1,505 @@
-from typing import Dict
-from langchain_core.runnables import RunnableLambda, RunnablePassthrough
+import asyncio
+from typing import AsyncIterator, Callable, Dict, Iterator, List, Optional, Sequence
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models import BaseChatModel
+from langchain_core.callbacks import adispatch_custom_event, dispatch_custom_event
+from langchain_core.runnables import RunnableConfig, RunnableLambda, RunnablePassthrough
+from langchain_core.runnables.config import accepts_config
 
-from vectorstore.faiss_loader import load_faiss_index
+from vectorstore.faiss_loader import index_version, load_faiss_index
+from vectorstore.lexical_index import BM25Index
+from vectorstore.milvus_store import MilvusStore
+from vectorstore.partitioned_search import DocumentTypePartitions
 from agents.query_understanding_agent import QueryUnderstandingAgent
 from agents.document_routing_agent import DocumentRoutingAgent
 from agents.retrieval_agent import RetrievalAgent
 from agents.fact_check_agent import FactCheckAgent
 from agents.response_composition_agent import ResponseCompositionAgent
+from agents.fast_answer_agent import FastAnswerAgent
+from agents.rerank_agent import RerankAgent
+from orchestration.evidence_packer import EvidencePacker
+from orchestration.response_cache import SemanticResponseCache
+from utils.logger import METRICS, StageMetrics, StageTracer, log_event
 
 
-def build_agentic_rag_chain(faiss_dir: str):
+# Run names of the chain stages; StageTracer times and logs these
+STAGES = (
+    "understand",
+    "prefetch",
+    "route",
+    "retrieve",
+    "rerank",
+    "pack_evidence",
+    "fact_check",
+    "compose",
+)
 
-    vectorstore = load_faiss_index(faiss_dir)
 
-    query_agent = QueryUnderstandingAgent()
+class _BatchedLambda(RunnableLambda):
+    """
+    RunnableLambda whose `batch` / `abatch` pass the whole list of
+    inputs to `batch_func` in one call, instead of invoking the stage
+    once per input. A `batch_func` with a `config` parameter also gets
+    the per-input configs (child callbacks), and may return exceptions
+    in place of outputs.
+    """
+
+    def __init__(
+        self,
+        func: Callable,
+        afunc: Callable,
+        batch_func: Callable[[List[Dict]], List[Dict]],
+        name: str,
+    ):
+        super().__init__(func, afunc=afunc, name=name)
+        self.batch_func = batch_func
+
+    def batch(self, inputs, config=None, *, return_exceptions=False, **kwargs):
+        return self._batch_with_config(
+            self.batch_func, inputs, config, return_exceptions=return_exceptions
+        )
+
+    async def abatch(self, inputs, config=None, *, return_exceptions=False, **kwargs):
+        if accepts_config(self.batch_func):
+            async def abatch_func(batch: List[Dict], config) -> List:
+                return await asyncio.to_thread(self.batch_func, batch, config=config)
+        else:
+            async def abatch_func(batch: List[Dict]) -> List:
+                return await asyncio.to_thread(self.batch_func, batch)
+
+        return await self._abatch_with_config(
+            abatch_func, inputs, config, return_exceptions=return_exceptions
+        )
+
+
+def build_agentic_rag_chain(
+    faiss_dir: str,
+    response_cache: Optional[SemanticResponseCache] = None,
+    llm: Optional[BaseChatModel] = None,
+    embeddings: Optional[Embeddings] = None,
+    speculative: bool = False,
+    fetch_k: int = 50,
+    vectorstore: Optional[MilvusStore] = None,
+    hybrid_query_types: Sequence[str] = ("data",),
+    evidence_token_budget: Optional[int] = 1500,
+    single_call_query_types: Sequence[str] = (),
+    reranker: Optional[RerankAgent] = None,
+    rerank_fetch_k: int = 50,
+    metrics: Optional[StageMetrics] = METRICS,
+    nprobe: Optional[int] = None,
+    ef_search: Optional[int] = None,
+):
+    """
+    Builds the agentic RAG chain.
+
+    Every stage has a sync and a native async implementation, so the
+    same chain serves `invoke`/`stream` and `ainvoke`/`astream`.
+    `llm` and `embeddings` override the OpenAI defaults (e.g. local
+    stand-ins for tests).
+
+    With `speculative=True`, an unfiltered top-`fetch_k` search (at
+    least the retrieval depth) runs in parallel with query
+    classification and the routing filter is applied to those
+    candidates afterwards, taking the classifier off the retrieval
+    critical path.
+
+    Passing a Milvus `vectorstore` queries it instead of the FAISS index
+    in `faiss_dir` (filters then run server-side, without partitions).
+    An ANN index is searched with the nprobe / efSearch saved when it
+    was built; `nprobe` / `ef_search` override them.
+
+    Query types in `hybrid_query_types` are retrieved with BM25 + vector
+    fusion (FAISS only).
+
+    Retrieved chunks are deduplicated, merged and pruned to
+    `evidence_token_budget` tokens before fact-checking (None disables).
+
+    Query types in `single_call_query_types` (opt-in, for low-risk
+    classes) skip the separate fact-check call: one structured call
+    returns verdict, justification and answer. Other types keep the
+    two-call fact-check -> composition path.
+
+    With a `reranker`, retrieval over-fetches `rerank_fetch_k` chunks
+    and the reranker keeps only its best `top_n` for fact-checking.
+
+    Every stage is a named run (see STAGES) timed by a StageTracer:
+    wall time, LLM tokens and chunk counts go to `metrics` (None
+    disables) and to the "rag" structured log. `chain.batch(...)`
+    retrieves all inputs at once (one embedding request, one FAISS
+    search per routing filter) when `speculative` is off.
+    """
+
+    if vectorstore is None:
+        vectorstore = load_faiss_index(
+            faiss_dir, embeddings=embeddings, nprobe=nprobe, ef_search=ef_search
+        )
+        partitions = DocumentTypePartitions.load_or_build(faiss_dir, vectorstore)
+        lexical_index = BM25Index.load_or_build(faiss_dir, vectorstore)
+
+        def current_version():
+            return index_version(faiss_dir)
+    else:
+        partitions = None
+        lexical_index = None
+        current_version = vectorstore.version
+
+    query_agent = QueryUnderstandingAgent(
+        embeddings=vectorstore.embeddings, llm=llm
+    )
     routing_agent = DocumentRoutingAgent()
-    retrieval_agent = RetrievalAgent(vectorstore)
-    fact_check_agent = FactCheckAgent()
-    response_agent = ResponseCompositionAgent()
+    retrieval_agent = RetrievalAgent(
+        vectorstore,
+        partitions=partitions,
+        lexical_index=lexical_index,
+        hybrid_query_types=hybrid_query_types,
+    )
+    evidence_packer = (
+        EvidencePacker(max_tokens=evidence_token_budget)
+        if evidence_token_budget is not None else None
+    )
+    fact_check_agent = FactCheckAgent(llm=llm)
+    response_agent = ResponseCompositionAgent(llm=llm)
+    fast_agent = FastAnswerAgent(llm=llm) if single_call_query_types else None
+
+    # Corpus-wide idf makes lexical rerank scores comparable across
+    # queries. Bound per chain: a rebuilt index brings its own idf
+    if reranker is not None and lexical_index is not None:
+        reranker = reranker.with_lexical_index(lexical_index)
+
+    # Chunks handed to the next stage: the reranker narrows them down
+    retrieve_k = rerank_fetch_k if reranker is not None else 5
+
+    # Speculative over-fetch: never smaller than what retrieval returns,
+    # and routed survivors are enough once the reranker has its top_n
+    prefetch_k = max(fetch_k, retrieve_k)
+    min_routed = reranker.top_n if reranker is not None else retrieve_k
 
     def understand_query(inputs: Dict) -> Dict:
         return {**inputs, "query_type": query_agent.classify(inputs["query"])}
 
+    async def aunderstand_query(inputs: Dict) -> Dict:
+        return {
+            **inputs,
+            "query_type": await query_agent.aclassify(inputs["query"])
+        }
+
     def route_documents(inputs: Dict) -> Dict:
         return {
             **inputs,
-            "allowed_doc_types": routing_agent.route(inputs["query_type"])
+            "allowed_doc_types": routing_agent.route(inputs["query_type"]),
+            "single_call": inputs["query_type"] in single_call_query_types,
         }
 
+    async def aroute_documents(inputs: Dict) -> Dict:
+        # Pure dictionary lookup, no I/O
+        return route_documents(inputs)
+
     def retrieve_documents(inputs: Dict) -> Dict:
         docs = retrieval_agent.retrieve(
             query=inputs["query"],
-            top_k=5,
+            top_k=retrieve_k,
+            allowed_doc_types=inputs["allowed_doc_types"],
+            allowed_sections=None,
+            hybrid=retrieval_agent.uses_hybrid(inputs["query_type"]),
+        )
+        return {**inputs, "documents": docs}
+
+    async def aretrieve_documents(inputs: Dict) -> Dict:
+        docs = await retrieval_agent.aretrieve(
+            query=inputs["query"],
+            top_k=retrieve_k,
+            allowed_doc_types=inputs["allowed_doc_types"],
+            allowed_sections=None,
+            hybrid=retrieval_agent.uses_hybrid(inputs["query_type"]),
+        )
+        return {**inputs, "documents": docs}
+
+    def retrieve_batch(batch: List[Dict]) -> List[Dict]:
+        docs = retrieval_agent.retrieve_batch(
+            [inputs["query"] for inputs in batch],
+            top_k=retrieve_k,
+            allowed_doc_types=[inputs["allowed_doc_types"] for inputs in batch],
+            hybrid=[
+                retrieval_agent.uses_hybrid(inputs["query_type"])
+                for inputs in batch
+            ],
+        )
+        return [
+            {**inputs, "documents": documents}
+            for inputs, documents in zip(batch, docs)
+        ]
+
+    def classify_only(inputs: Dict) -> str:
+        return query_agent.classify(inputs["query"])
+
+    async def aclassify_only(inputs: Dict) -> str:
+        return await query_agent.aclassify(inputs["query"])
+
+    def prefetch_candidates(inputs: Dict):
+        return retrieval_agent.retrieve_candidates(inputs["query"], fetch_k=prefetch_k)
+
+    async def aprefetch_candidates(inputs: Dict):
+        return await retrieval_agent.aretrieve_candidates(
+            inputs["query"], fetch_k=prefetch_k
+        )
+
+    def _apply_routing(inputs: Dict):
+        rest = {k: v for k, v in inputs.items() if k != "candidates"}
+
+        # The over-fetch is vector-only; hybrid types are searched again
+        if retrieval_agent.uses_hybrid(inputs["query_type"]):
+            return rest, None
+
+        docs = retrieval_agent.filter_candidates(
+            inputs["candidates"],
+            top_k=retrieve_k,
             allowed_doc_types=inputs["allowed_doc_types"],
-            allowed_sections=None
+            min_k=min_routed,
         )
+        return rest, docs
+
+    def filter_documents(inputs: Dict) -> Dict:
+        inputs, docs = _apply_routing(inputs)
+
+        # Too few routed hits in the over-fetch, or a query type that
+        # needs lexical matching: do the full search
+        if docs is None:
+            return retrieve_documents(inputs)
+
         return {**inputs, "documents": docs}
 
+    async def afilter_documents(inputs: Dict) -> Dict:
+        inputs, docs = _apply_routing(inputs)
+
+        if docs is None:
+            return await aretrieve_documents(inputs)
+
+        return {**inputs, "documents": docs}
+
+    def rerank_documents(inputs: Dict) -> Dict:
+        if reranker is None:
+            return inputs
+
+        return {
+            **inputs,
+            "documents": reranker.rerank(inputs["query"], inputs["documents"])
+        }
+
+    async def arerank_documents(inputs: Dict) -> Dict:
+        if reranker is None:
+            return inputs
+
+        return {
+            **inputs,
+            "documents": await reranker.arerank(
+                inputs["query"], inputs["documents"]
+            )
+        }
+
+    def pack_evidence(inputs: Dict) -> Dict:
+        if evidence_packer is None:
+            return inputs
+
+        return {
+            **inputs,
+            "documents": evidence_packer.pack(inputs["query"], inputs["documents"])
+        }
+
+    async def apack_evidence(inputs: Dict) -> Dict:
+        # A few milliseconds of string work on top-k chunks
+        return pack_evidence(inputs)
+
     def fact_check(inputs: Dict) -> Dict:
+        # Single-call types get their verdict from the answer call
+        if inputs["single_call"]:
+            return {**inputs, "fact_check_result": None}
+
         result = fact_check_agent.check(
             inputs["query"],
             inputs["documents"]
         )
         return {**inputs, "fact_check_result": result}
 
-    def compose_response(inputs: Dict) -> str:
-        return response_agent.compose(
+    async def afact_check(inputs: Dict) -> Dict:
+        if inputs["single_call"]:
+            return {**inputs, "fact_check_result": None}
+
+        result = await fact_check_agent.acheck(
+            inputs["query"],
+            inputs["documents"]
+        )
+        return {**inputs, "fact_check_result": result}
+
+    def compose_response(inputs: Dict, config: RunnableConfig) -> Iterator[str]:
+        # Generator stage: chain.stream() yields tokens as they arrive,
+        # chain.invoke() still returns the full string
+        if inputs["single_call"]:
+            # The verdict is reported to tracers like a fact-check result
+            results = []
+            yield from fast_agent.answer_stream(
+                inputs["query"], inputs["documents"], on_result=results.append
+            )
+            for result in results:
+                dispatch_custom_event("fact_check_result", result, config=config)
+            return
+
+        # Nothing to compose from: answer without a second LLM call
+        if inputs["fact_check_result"]["verdict"] == "INSUFFICIENT_EVIDENCE":
+            yield response_agent.insufficient_evidence_response(
+                inputs["fact_check_result"]
+            )
+            return
+
+        yield from response_agent.compose_stream(
             query=inputs["query"],
             documents=inputs["documents"],
             fact_check_result=inputs["fact_check_result"]
         )
 
-    return (
+    async def acompose_response(
+        inputs: Dict, config: RunnableConfig
+    ) -> AsyncIterator[str]:
+        if inputs["single_call"]:
+            results = []
+            async for token in fast_agent.aanswer_stream(
+                inputs["query"], inputs["documents"], on_result=results.append
+            ):
+                yield token
+            for result in results:
+                await adispatch_custom_event("fact_check_result", result, config=config)
+            return
+
+        if inputs["fact_check_result"]["verdict"] == "INSUFFICIENT_EVIDENCE":
+            yield response_agent.insufficient_evidence_response(
+                inputs["fact_check_result"]
+            )
+            return
+
+        async for token in response_agent.acompose_stream(
+            query=inputs["query"],
+            documents=inputs["documents"],
+            fact_check_result=inputs["fact_check_result"]
+        ):
+            yield token
+
+    if speculative:
+        # Classification and over-fetch run concurrently
+        understand = RunnablePassthrough.assign(
+            query_type=RunnableLambda(
+                classify_only, afunc=aclassify_only, name="understand"
+            ),
+            candidates=RunnableLambda(
+                prefetch_candidates, afunc=aprefetch_candidates, name="prefetch"
+            ),
+        )
+        retrieve = RunnableLambda(
+            filter_documents, afunc=afilter_documents, name="retrieve"
+        )
+    else:
+        understand = RunnableLambda(
+            understand_query, afunc=aunderstand_query, name="understand"
+        )
+        retrieve = _BatchedLambda(
+            retrieve_documents,
+            afunc=aretrieve_documents,
+            batch_func=retrieve_batch,
+            name="retrieve",
+        )
+
+    chain = (
         RunnablePassthrough()
-        | RunnableLambda(understand_query)
-        | RunnableLambda(route_documents)
-        | RunnableLambda(retrieve_documents)
-        | RunnableLambda(fact_check)
-        | RunnableLambda(compose_response)
+        | understand
+        | RunnableLambda(route_documents, afunc=aroute_documents, name="route")
+        | retrieve
+        | RunnableLambda(rerank_documents, afunc=arerank_documents, name="rerank")
+        | RunnableLambda(pack_evidence, afunc=apack_evidence, name="pack_evidence")
+        | RunnableLambda(fact_check, afunc=afact_check, name="fact_check")
+        | RunnableLambda(compose_response, afunc=acompose_response, name="compose")
+    )
+
+    if metrics is not None:
+        chain = chain.with_config(
+            callbacks=[StageTracer(STAGES, metrics=metrics, log=True)]
+        )
+
+    if response_cache is None:
+        return chain
+
+    def record_cache(query: str, hit: bool):
+        if metrics is not None:
+            metrics.increment(
+                "response_cache", **{"cache_hits" if hit else "cache_misses": 1}
+            )
+        log_event("response_cache", hit=hit, query_chars=len(query))
+
+    def cached_chain(inputs: Dict) -> Iterator[str]:
+        # Rebuilding the index changes the version and empties the cache
+        version = current_version()
+
+        cached = response_cache.get(inputs["query"], index_version=version)
+        record_cache(inputs["query"], cached is not None)
+        if cached is not None:
+            yield cached
+            return
+
+        tokens = []
+        for token in chain.stream(inputs):
+            tokens.append(token)
+            yield token
+
+        response_cache.put(inputs["query"], "".join(tokens), index_version=version)
+
+    async def acached_chain(inputs: Dict) -> AsyncIterator[str]:
+        version = current_version()
+
+        # Similarity lookups embed the query; keep that off the event loop
+        cached = await asyncio.to_thread(
+            response_cache.get, inputs["query"], version
+        )
+        record_cache(inputs["query"], cached is not None)
+        if cached is not None:
+            yield cached
+            return
+
+        tokens = []
+        async for token in chain.astream(inputs):
+            tokens.append(token)
+            yield token
+
+        await asyncio.to_thread(
+            response_cache.put, inputs["query"], "".join(tokens), version
+        )
+
+    def cached_batch(batch: List[Dict], config: List) -> List:
+        # Only the misses go through the chain, as one batch, so they
+        # still share one embedding request and one FAISS search
+        version = current_version()
+        outputs = []
+        for inputs in batch:
+            cached = response_cache.get(inputs["query"], index_version=version)
+            record_cache(inputs["query"], cached is not None)
+            outputs.append(cached)
+
+        misses = [i for i, output in enumerate(outputs) if output is None]
+        if not misses:
+            return outputs
+
+        results = chain.batch(
+            [batch[i] for i in misses],
+            config=[config[i] for i in misses],
+            return_exceptions=True,
+        )
+
+        for i, result in zip(misses, results):
+            outputs[i] = result
+            if not isinstance(result, Exception):
+                response_cache.put(batch[i]["query"], result, index_version=version)
+
+        return outputs
+
+    return _BatchedLambda(
+        cached_chain,
+        afunc=acached_chain,
+        batch_func=cached_batch,
+        name="cached_chain",
     )
@@ -0,0 +1,148 @@
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Optional
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from vectorstore.lexical_index import STOPWORDS, tokenize
+
+
+def normalize_query(query: str) -> str:
+    """
+    Canonical form for exact matching: case, whitespace and
+    trailing punctuation do not change the answer.
+    """
+    query = re.sub(r"\s+", " ", query.strip().lower())
+    return query.rstrip("?!. ")
+
+
+def query_terms(query: str) -> frozenset:
+    """
+    Content terms of a query (numbers included, stopwords dropped).
+    Near-duplicate queries must agree on them: "revenue in 2022" and
+    "revenue in 2023" embed almost identically but ask different things.
+    """
+    return frozenset(t for t in tokenize(query) if t not in STOPWORDS)
+
+
+class SemanticResponseCache:
+    """
+    Query-level cache placed in front of the agentic RAG chain.
+
+    Lookups try an exact match on the normalized query first, then
+    the most similar cached query by embedding cosine similarity among
+    those with the same content terms and numbers (`query_terms`).
+    Entries expire after `ttl_seconds`, the least recently used entry
+    is evicted beyond `max_entries`, and the whole cache is dropped
+    whenever the index version changes.
+    """
+
+    def __init__(
+        self,
+        embeddings: Optional[Embeddings] = None,
+        max_entries: int = 256,
+        ttl_seconds: float = 3600.0,
+        similarity_threshold: float = 0.95,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.embeddings = embeddings
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.similarity_threshold = similarity_threshold
+        self.clock = clock
+
+        self._lock = threading.Lock()
+        # normalized query -> (response, unit vector or None, created_at, terms)
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._index_version: Optional[str] = None
+
+        self.hits = 0
+        self.misses = 0
+
+    def _embed(self, query: str) -> Optional[np.ndarray]:
+        if self.embeddings is None:
+            return None
+
+        vector = np.asarray(self.embeddings.embed_query(query), dtype=np.float32)
+        return vector / (np.linalg.norm(vector) + 1e-12)
+
+    def _check_version(self, index_version: Optional[str]):
+        if index_version != self._index_version:
+            self._entries.clear()
+            self._index_version = index_version
+
+    def _drop_expired(self):
+        now = self.clock()
+        expired = [
+            key
+            for key, (_, _, created_at, _) in self._entries.items()
+            if now - created_at > self.ttl_seconds
+        ]
+        for key in expired:
+            del self._entries[key]
+
+    def get(self, query: str, index_version: Optional[str] = None) -> Optional[str]:
+        key = normalize_query(query)
+
+        with self._lock:
+            self._check_version(index_version)
+            self._drop_expired()
+
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key][0]
+
+            terms = query_terms(query)
+            candidates = [
+                (k, entry) for k, entry in self._entries.items()
+                if entry[1] is not None and entry[3] == terms
+            ]
+
+        if self.embeddings is None or not candidates:
+            self.misses += 1
+            return None
+
+        # Embed outside the lock; the shared embedder may call the API
+        vector = self._embed(query)
+        matrix = np.stack([entry[1] for _, entry in candidates])
+        sims = matrix @ vector
+        best = int(np.argmax(sims))
+
+        if sims[best] < self.similarity_threshold:
+            self.misses += 1
+            return None
+
+        best_key = candidates[best][0]
+
+        with self._lock:
+            if best_key not in self._entries:
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(best_key)
+            self.hits += 1
+            return self._entries[best_key][0]
+
+    def put(self, query: str, response: str, index_version: Optional[str] = None):
+        key = normalize_query(query)
+        vector = self._embed(query)
+
+        with self._lock:
+            self._check_version(index_version)
+
+            self._entries[key] = (response, vector, self.clock(), query_terms(query))
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -0,0 +1,56 @@
+import asyncio
+import tempfile
+from pathlib import Path
+
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from langchain_core.language_models import FakeListChatModel
+
+from ingestion.ingestion_pipeline import IngestionPipeline
+from orchestration.lcel_pipeline import build_agentic_rag_chain
+
+
+def _build_index(tmp: str, embeddings) -> str:
+    texts = Path(tmp) / "data" / "texts"
+    texts.mkdir(parents=True)
+    (texts / "results.txt").write_text("The reported accuracy was 91 percent. " * 20)
+
+    faiss_dir = str(Path(tmp) / "faiss_index")
+    IngestionPipeline(
+        data_dir=str(Path(tmp) / "data"),
+        faiss_dir=faiss_dir,
+        embeddings=embeddings,
+    ).run()
+
+    return faiss_dir
+
+
+def test_async_pipeline():
+    embeddings = DeterministicFakeEmbedding(size=32)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        chain = build_agentic_rag_chain(
+            _build_index(tmp, embeddings),
+            llm=FakeListChatModel(responses=["SUPPORTED: accuracy is 91%."]),
+            embeddings=embeddings,
+        )
+
+        query = {"query": "Explain what the reported accuracy means"}
+
+        async def run_many():
+            return await asyncio.gather(*(chain.ainvoke(query) for _ in range(20)))
+
+        answers = asyncio.run(run_many())
+        assert answers == ["SUPPORTED: accuracy is 91%."] * 20
+
+        async def stream_one():
+            return [token async for token in chain.astream(query)]
+
+        tokens = asyncio.run(stream_one())
+        assert len(tokens) > 1 and "".join(tokens) == answers[0]
+
+        # The sync path is unchanged
+        assert chain.invoke(query) == answers[0]
+
+
+if __name__ == "__main__":
+    test_async_pipeline()
@@ -0,0 +1,171 @@
+import csv
+import json
+import tempfile
+from pathlib import Path
+
+from langchain_community.vectorstores import FAISS
+from langchain_core.documents import Document
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from langchain_core.language_models import FakeListChatModel
+from langchain_core.runnables import RunnableLambda
+
+from agents.retrieval_agent import RetrievalAgent
+from ingestion.ingestion_pipeline import IngestionPipeline
+from orchestration.batch_runner import BatchRunner, load_queries
+from orchestration.lcel_pipeline import build_agentic_rag_chain
+from utils.logger import METRICS, StageMetrics
+from vectorstore.partitioned_search import DocumentTypePartitions
+
+VERDICT = json.dumps(
+    {"verdict": "SUPPORTED", "confidence": 0.8, "justification": "ok", "evidence": []}
+)
+
+
+def _docs():
+    return [
+        Document(
+            page_content=f"The model accuracy result {i} on benchmark {i % 4}",
+            metadata={"document_type": ["pdf", "txt", "xlsx"][i % 3], "section": "s"},
+        )
+        for i in range(40)
+    ]
+
+
+def test_load_queries():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "claims.csv"
+        with open(path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["id", "claim"])
+            writer.writerow(["c1", "Accuracy is 91%"])
+            writer.writerow(["c2", ""])
+            writer.writerow(["", "Loss went down"])
+
+        assert load_queries(str(path)) == [("c1", "Accuracy is 91%"), ("3", "Loss went down")]
+
+        path = Path(tmp) / "queries.txt"
+        path.write_text("first\n\nsecond\n")
+        assert load_queries(str(path)) == [("1", "first"), ("3", "second")]
+
+
+def test_retrieve_batch_matches_retrieve():
+    vs = FAISS.from_documents(_docs(), DeterministicFakeEmbedding(size=16))
+    queries = ["accuracy result", "benchmark 2", "model", "result 7"]
+    doc_types = [None, ["pdf"], ["txt", "xlsx"], ["pdf"]]
+
+    for partitions in (None, DocumentTypePartitions.from_vectorstore(vs)):
+        agent = RetrievalAgent(vs, partitions=partitions)
+        batched = agent.retrieve_batch(queries, top_k=4, allowed_doc_types=doc_types)
+
+        for query, types, docs in zip(queries, doc_types, batched):
+            expected = agent.retrieve(query, top_k=4, allowed_doc_types=types)
+            assert [d.page_content for d in docs] == [d.page_content for d in expected]
+
+
+def test_batch_runner_resumes():
+    embeddings = DeterministicFakeEmbedding(size=16)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        FAISS.from_documents(_docs(), embeddings).save_local(tmp)
+        metrics = StageMetrics()
+
+        chain = build_agentic_rag_chain(
+            tmp,
+            llm=FakeListChatModel(responses=[VERDICT]),
+            embeddings=embeddings,
+            metrics=metrics,
+        )
+        queries = [(str(i), f"Explain what accuracy result {i} means") for i in range(7)]
+        output = Path(tmp) / "results.jsonl"
+
+        stats = BatchRunner(chain, batch_size=3, concurrency=2).run(queries[:4], str(output))
+        assert stats == {"total": 4, "skipped": 0, "processed": 4, "failed": 0}
+
+        rows = [json.loads(line) for line in output.read_text().splitlines()]
+        assert [row["id"] for row in rows] == ["0", "1", "2", "3"]
+        assert all(row["verdict"] == "SUPPORTED" for row in rows)
+        assert all(row["chunks"] and row["prompt_tokens"] > 0 for row in rows)
+        assert all(row["retrieve_seconds"] > 0 and row["seconds"] > 0 for row in rows)
+
+        # Crash mid-write: the partial row is dropped and redone
+        with open(output, "a") as f:
+            f.write('{"id": "4", "query": "Expl')
+
+        stats = BatchRunner(chain, batch_size=3).run(queries, str(output))
+        assert stats["skipped"] == 4 and stats["processed"] == 3
+
+        rows = [json.loads(line) for line in output.read_text().splitlines()]
+        assert [row["id"] for row in rows] == [str(i) for i in range(7)]
+
+        # Per-stage summaries: 7 queries went through every stage
+        summary = metrics.summary()
+        assert summary["retrieve"]["count"] == 7
+        assert summary["fact_check"]["llm_calls"] == 7
+        assert summary["compose"]["p99"] >= summary["compose"]["p50"] > 0
+
+        text = metrics.to_prometheus()
+        assert 'rag_stage_latency_seconds{stage="fact_check",quantile="0.95"}' in text
+        assert 'rag_prompt_tokens_total{stage="fact_check"}' in text
+
+        # CSV output works the same way
+        output = Path(tmp) / "results.csv"
+        BatchRunner(chain).run(queries[:2], str(output))
+        BatchRunner(chain).run(queries[:3], str(output))
+
+        with open(output, newline="") as f:
+            assert [row["id"] for row in csv.DictReader(f)] == ["0", "1", "2"]
+
+
+def test_failed_queries_are_retried():
+    embeddings = DeterministicFakeEmbedding(size=16)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        FAISS.from_documents(_docs(), embeddings).save_local(tmp)
+        chain = build_agentic_rag_chain(
+            tmp, llm=FakeListChatModel(responses=[VERDICT]), embeddings=embeddings
+        )
+
+        calls = []
+
+        def flaky(inputs):
+            calls.append(inputs["query"])
+            if inputs["query"] == "bad" and calls.count("bad") == 1:
+                raise RuntimeError("rate limited")
+            return chain.invoke(inputs)
+
+        output = str(Path(tmp) / "results.jsonl")
+        queries = [("a", "Explain accuracy"), ("b", "bad")]
+
+        stats = BatchRunner(RunnableLambda(flaky)).run(queries, output)
+        assert stats["failed"] == 1
+
+        stats = BatchRunner(RunnableLambda(flaky)).run(queries, output)
+        assert stats["skipped"] == 1 and stats["failed"] == 0
+
+
+def test_ingestion_metrics():
+    with tempfile.TemporaryDirectory() as tmp:
+        texts = Path(tmp) / "data" / "texts"
+        texts.mkdir(parents=True)
+        (texts / "a.txt").write_text("accuracy " * 300)
+
+        before = METRICS.summary().get("ingest.TextIngestor", {}).get("count", 0)
+
+        IngestionPipeline(
+            data_dir=str(Path(tmp) / "data"),
+            faiss_dir=str(Path(tmp) / "faiss_index"),
+            embeddings=DeterministicFakeEmbedding(size=16),
+        ).run()
+
+        summary = METRICS.summary()
+        assert summary["ingest.TextIngestor"]["count"] == before + 1
+        assert summary["ingest.TextIngestor"]["chunks"] > 0
+        assert summary["ingest.embed"]["chunks"] > 0
+
+
+if __name__ == "__main__":
+    test_load_queries()
+    test_retrieve_batch_matches_retrieve()
+    test_batch_runner_resumes()
+    test_failed_queries_are_retried()
+    test_ingestion_metrics()
@@ -0,0 +1,131 @@
+import tempfile
+from pathlib import Path
+
+import faiss
+from langchain_core.messages import HumanMessage
+
+from agents.fact_check_agent import FactCheckVerdict
+
+from benchmarks.corpus import FORMAT_DIRS, FORMATS, generate_corpus, synthetic_queries
+from benchmarks.fakes import FakeChatModel, FakeEmbeddings
+from benchmarks.run import (
+    DEFAULT_BASELINE,
+    HIGHER_IS_BETTER,
+    INFORMATIONAL_HIGHER,
+    INFORMATIONAL_LOWER,
+    LOWER_IS_BETTER,
+    TOKEN_METRICS,
+    compare,
+    load_baseline,
+    run_benchmark,
+    save_baseline,
+    scenario_name,
+)
+from ingestion.pdf_ingestor import PdfIngestor
+
+
+def test_fakes_are_deterministic():
+    embeddings = FakeEmbeddings(size=32)
+    a, b = embeddings.embed_documents(["model accuracy rose", "model accuracy rose"])
+    assert a == b == FakeEmbeddings(size=32).embed_query("model accuracy rose")
+
+    llm = FakeChatModel()
+    reply = llm.invoke([HumanMessage(content='Return {"verdict": "..."}')])
+    assert '"SUPPORTED"' in reply.content
+    # Valid against the fact-check schema, so structured output accepts it
+    FactCheckVerdict.model_validate_json(reply.content)
+    assert reply.usage_metadata["output_tokens"] > 0
+
+    streamed = "".join(chunk.content for chunk in llm.stream("Compose an answer"))
+    assert streamed == llm.invoke("Compose an answer").content
+
+
+def test_generate_corpus():
+    with tempfile.TemporaryDirectory() as tmp:
+        written = generate_corpus(tmp, n_chunks=50, units_per_file=4)
+        assert set(written) == set(FORMAT_DIRS)
+        # 50 chunks over the formats, 4 per file
+        assert written["txt"] == -(-(50 // len(FORMAT_DIRS)) // 4)
+
+        # The hand-written PDF is readable by the real ingestor
+        pdf = sorted((Path(tmp) / "pdf").iterdir())[0]
+        pages = list(PdfIngestor(pdf.parent).ingest_file(pdf))
+        assert pages and "percent" in pages[0].page_content
+
+        again = Path(tmp) / "again"
+        generate_corpus(str(again), n_chunks=50, units_per_file=4)
+        assert (again / "texts" / "synthetic_00000.txt").read_text() == (
+            Path(tmp) / "texts" / "synthetic_00000.txt"
+        ).read_text()
+
+    assert synthetic_queries(5) == synthetic_queries(5)
+
+
+def test_run_and_compare_baseline():
+    threads = faiss.omp_get_max_threads()
+    results = run_benchmark(n_chunks=60, formats=("txt", "docx"), n_queries=5)
+    assert faiss.omp_get_max_threads() == threads
+
+    # Every metric is either gated or explicitly informational
+    classified = HIGHER_IS_BETTER + LOWER_IS_BETTER + INFORMATIONAL_HIGHER + INFORMATIONAL_LOWER
+    assert set(results) - {"chunks", "queries"} == set(classified)
+
+    assert results["chunks"] >= 50
+    assert results["query_p99_ms"] >= results["query_p50_ms"] > 0
+    assert results["index_build_seconds"] > 0
+    assert results["peak_rss_mb"] > 0
+
+    # Flat index: the served top 5 is the exact top 5
+    assert results["recall_at_5"] == 1.0
+    # At most classification, fact-check and composition per query
+    assert 1 <= results["llm_calls_per_query"] <= 3
+    assert results["prompt_tokens_per_query"] > results["completion_tokens_per_query"] > 0
+    assert results["embedding_requests_per_query"] >= 1
+
+    # Same seed, same deterministic metrics
+    again = run_benchmark(n_chunks=60, formats=("txt", "docx"), n_queries=5)
+    for name in HIGHER_IS_BETTER + LOWER_IS_BETTER:
+        assert again[name] == results[name], name
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = str(Path(tmp) / "baseline.json")
+        assert load_baseline(path, "small") is None
+
+        save_baseline(path, "small", results)
+        assert load_baseline(path, "small") == results
+
+    # Wall clock is informational: a slower run never fails the gate
+    slower = {**results, "query_p95_ms": results["query_p95_ms"] * 2}
+    assert not any(row["regressed"] for row in compare(slower, results))
+    assert {row["metric"] for row in compare(slower, results) if not row["gated"]} >= {
+        "query_p95_ms", "ingest_chunks_per_second", "peak_rss_mb", "peak_rss_ingest_mb"
+    }
+
+    # Deterministic metrics are gated in both directions
+    costlier = {**results, "prompt_tokens_per_query": results["prompt_tokens_per_query"] * 1.1}
+    regressed = {row["metric"] for row in compare(costlier, results) if row["regressed"]}
+    assert regressed == {"prompt_tokens_per_query"}
+
+    worse = {**results, "recall_at_5": results["recall_at_5"] * 0.9}
+    regressed = {row["metric"] for row in compare(worse, results) if row["regressed"]}
+    assert regressed == {"recall_at_5"}
+
+    # ...unless the tokenizers differ
+    rows = compare(costlier, results, skip=TOKEN_METRICS)
+    assert not any(row["regressed"] for row in rows)
+
+    assert not any(row["regressed"] for row in compare(results, results))
+
+
+def test_committed_baseline_covers_default_scenario():
+    baseline = load_baseline(DEFAULT_BASELINE, scenario_name(1000, FORMATS, "flat"))
+
+    assert baseline is not None
+    assert set(HIGHER_IS_BETTER + LOWER_IS_BETTER) <= set(baseline)
+
+
+if __name__ == "__main__":
+    test_fakes_are_deterministic()
+    test_generate_corpus()
+    test_run_and_compare_baseline()
+    test_committed_baseline_covers_default_scenario()
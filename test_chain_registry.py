@@ -0,0 +1,89 @@
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from benchmarks.corpus import generate_corpus
+from benchmarks.fakes import FakeChatModel, FakeEmbeddings
+from orchestration.chain_registry import ChainRegistry
+from orchestration.index_manager import IndexManager
+from orchestration.lcel_pipeline import build_agentic_rag_chain
+
+
+def test_registry_shares_and_unloads():
+    builds = []
+
+    def build_chain(index_dir):
+        time.sleep(0.05)
+        builds.append(index_dir)
+        return object()
+
+    registry = ChainRegistry(build_chain)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(registry.acquire(tmp)))
+            for _ in range(8)
+        ]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        # One load, one shared chain
+        assert len(builds) == 1
+        assert len({id(chain) for _, chain in results}) == 1
+
+        key = results[0][0]
+        assert registry.loaded() == {key: 8}
+
+        for key, _ in results[:-1]:
+            registry.release(key)
+        assert registry.loaded() == {key: 1}
+
+        registry.release(key)
+        assert registry.loaded() == {}
+
+        with registry.lease(tmp) as chain:
+            assert chain is not results[0][1]
+        assert len(builds) == 2
+
+
+def test_old_version_unloads_after_last_lease():
+    embeddings = FakeEmbeddings(size=64)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        generate_corpus(str(Path(tmp) / "data"), n_chunks=10, formats=("txt",))
+        manager = IndexManager(
+            str(Path(tmp) / "faiss_index"),
+            data_dir=str(Path(tmp) / "data"),
+            build_chain=lambda faiss_dir: build_agentic_rag_chain(
+                faiss_dir, llm=FakeChatModel(), embeddings=embeddings
+            ),
+            pipeline_options={"embeddings": embeddings},
+        )
+
+        manager.start_rebuild()
+        assert manager.wait(30)["state"] == "succeeded"
+        assert list(manager.registry.loaded().values()) == [1]
+
+        with manager.lease() as old_chain:
+            manager.start_rebuild(force_rebuild=True)
+            assert manager.wait(30)["state"] == "succeeded"
+
+            # Old version held by this query, new one pinned as live
+            assert sorted(manager.registry.loaded().values()) == [1, 1]
+            assert manager.chain is not old_chain
+            assert old_chain.invoke({"query": "What recall did the control group report?"})
+
+        assert list(manager.registry.loaded().values()) == [1]
+
+        # A second manager-less lookup of the live version shares the chain
+        with manager.registry.lease(manager.index_dir) as chain:
+            assert chain is manager.chain
+
+
+if __name__ == "__main__":
+    test_registry_shares_and_unloads()
+    test_old_version_unloads_after_last_lease()
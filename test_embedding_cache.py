@@ -0,0 +1,88 @@
+import tempfile
+from pathlib import Path
+
+import numpy as np
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from vectorstore.embedding_cache import CachedEmbeddings, embed_queries
+
+
+class CountingEmbedding(DeterministicFakeEmbedding):
+    calls: int = 0
+    texts_embedded: int = 0
+    query_calls: int = 0
+
+    def embed_documents(self, texts):
+        self.calls += 1
+        self.texts_embedded += len(texts)
+        return super().embed_documents(texts)
+
+    def embed_query(self, text):
+        self.query_calls += 1
+        return super().embed_query(text)
+
+
+class BatchQueryEmbedding(CountingEmbedding):
+    def embed_queries(self, texts):
+        self.calls += 1
+        return [super(CountingEmbedding, self).embed_query(t) for t in texts]
+
+
+def test_embedding_cache():
+    with tempfile.TemporaryDirectory() as tmp:
+        cache_path = str(Path(tmp) / "cache.sqlite")
+        base = CountingEmbedding(size=16)
+        cached = CachedEmbeddings(base, cache_path=cache_path, max_entries=3)
+
+        texts = ["header", "row 1", "header", "row 2"]
+        first = cached.embed_documents(texts)
+        assert np.allclose(first, base.embed_documents(texts))
+        assert base.texts_embedded == 3 + 4  # duplicates embedded once
+
+        # Fully served from cache, including a fresh instance (persistence)
+        reopened = CachedEmbeddings(base, cache_path=cache_path, max_entries=3)
+        calls = base.calls
+        assert np.allclose(reopened.embed_documents(texts), first)
+        assert base.calls == calls
+        assert reopened.hits == 4 and reopened.misses == 0
+
+        # Query vectors are cached separately and repeated queries hit
+        reopened.embed_query("accuracy?")
+        reopened.embed_query("accuracy?")
+        assert reopened.hits == 5
+
+        # Size bound: the least recently used entry was evicted
+        (count,) = reopened._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()
+        assert count == 3 == reopened._count
+
+        # The running count tracks new rows only, across stores
+        reopened.embed_documents(["row 3", "row 3", "row 4"])
+        (count,) = reopened._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()
+        assert count == 3 == reopened._count
+
+
+def test_embed_queries():
+    with tempfile.TemporaryDirectory() as tmp:
+        base = BatchQueryEmbedding(size=16)
+        cached = CachedEmbeddings(base, cache_path=str(Path(tmp) / "cache.sqlite"))
+
+        queries = ["accuracy?", "rows?", "accuracy?"]
+        vectors = cached.embed_queries(queries)
+        assert np.allclose(vectors, [base.embed_query(q) for q in queries])
+        assert base.calls == 1 and cached.misses == 2
+
+        # Same namespace as embed_query, not as documents
+        calls = base.calls
+        assert np.allclose(cached.embed_query("rows?"), vectors[1])
+        cached.embed_documents(["rows?"])
+        assert base.calls == calls + 1
+
+        # Embedders without a batched query method: one call per query
+        plain = CountingEmbedding(size=16)
+        embed_queries(plain, queries)
+        assert plain.query_calls == 3 and plain.calls == 0
+
+
+if __name__ == "__main__":
+    test_embedding_cache()
+    test_embed_queries()
@@ -0,0 +1,56 @@
+import threading
+
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from ingestion.embedding_stage import EmbeddingStage
+
+
+class RateLimitError(Exception):
+    status_code = 429
+
+
+class FlakyEmbedding(DeterministicFakeEmbedding):
+    """Local fake that rejects the first few requests with a 429."""
+
+    failures_left: int = 3
+    requests: int = 0
+
+    def embed_documents(self, texts):
+        with _lock:
+            self.requests += 1
+            if self.failures_left > 0:
+                self.failures_left -= 1
+                raise RateLimitError("Rate limit reached for requests")
+        return super().embed_documents(texts)
+
+
+_lock = threading.Lock()
+
+
+def test_embedding_stage():
+    texts = [f"chunk {i} " * (i % 7 + 1) for i in range(200)]
+    embedder = FlakyEmbedding(size=8)
+
+    stage = EmbeddingStage(
+        embedder,
+        max_batch_tokens=40,
+        concurrency=4,
+        initial_backoff=0.001,
+    )
+
+    # Token budget splits the work into many batches
+    assert len(stage._batches(texts)) > 10
+
+    vectors = stage.embed(texts)
+
+    # Order preserved despite concurrent dispatch and retries
+    assert vectors == DeterministicFakeEmbedding(size=8).embed_documents(texts)
+    assert stage.rate_limited == 3
+    assert stage.chunks_embedded == 200
+    assert stage.chunks_per_second > 0
+
+    print(f"{stage.chunks_per_second:.1f} chunks/sec")
+
+
+if __name__ == "__main__":
+    test_embedding_stage()
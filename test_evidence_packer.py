@@ -0,0 +1,146 @@
+from langchain_core.documents import Document
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+from ingestion.table_chunking import row_window_documents
+from orchestration.evidence_packer import EvidencePacker
+from utils.helpers import count_tokens
+
+
+TEXT = " ".join(
+    f"Sentence {i} talks about topic {i % 7} in some detail." for i in range(60)
+)
+
+
+def _chunks(text, source="report.pdf", section="page_1", overlap=80):
+    splitter = RecursiveCharacterTextSplitter(chunk_size=300, chunk_overlap=overlap)
+    return [
+        Document(
+            id=f"{source}:{i}",
+            page_content=chunk,
+            metadata={"source": source, "section": section, "document_type": "pdf"},
+        )
+        for i, chunk in enumerate(splitter.split_text(text))
+    ]
+
+
+def test_merge_overlapping_chunks():
+    chunks = _chunks(TEXT)
+    assert len(chunks) > 3
+
+    # Retrieval order is by relevance, not by position; add a duplicate
+    shuffled = chunks[2:] + chunks[:2] + [chunks[3]]
+    merged = EvidencePacker(max_tokens=10_000).merge(shuffled)
+
+    assert len(merged) == 1
+    assert merged[0].page_content == TEXT
+    assert merged[0].id == shuffled[0].id
+    assert count_tokens(merged[0].page_content) < sum(
+        count_tokens(c.page_content) for c in shuffled
+    )
+
+
+def test_different_sources_are_not_merged():
+    a = _chunks(TEXT[:250], source="a.pdf")
+    b = _chunks(TEXT[:250], source="b.pdf")
+    merged = EvidencePacker().merge(a + b)
+
+    assert [d.metadata["source"] for d in merged] == ["a.pdf", "b.pdf"]
+
+
+def test_merged_output_follows_rank_across_sources():
+    text = " ".join(f"Fact {i}: value {i * 37} noted." for i in range(120))
+    a = _chunks(text, source="a.pdf", overlap=0)
+    b = _chunks(text, source="b.pdf", overlap=0)
+
+    # Two unrelated pieces of a.pdf, with b.pdf ranked between them
+    merged = EvidencePacker(max_tokens=10_000).merge([a[0], b[0], a[5]])
+
+    assert [d.id for d in merged] == [a[0].id, b[0].id, a[5].id]
+
+
+def test_budget_keeps_relevant_sentences():
+    docs = [
+        Document(
+            page_content=(
+                "The weather was mild. Revenue in 2023 reached 4.2 million. "
+                "Staff enjoyed the party.\nRevenue growth slowed in Q4."
+            ),
+            metadata={"source": "a.docx", "section": "full_document"},
+        ),
+        Document(
+            page_content="Unrelated filler sentence. " * 40,
+            metadata={"source": "b.docx", "section": "full_document"},
+        ),
+    ]
+
+    packed = EvidencePacker(max_tokens=40).pack("What was the revenue in 2023?", docs)
+    text = " ".join(d.page_content for d in packed)
+
+    assert "Revenue in 2023 reached 4.2 million." in text
+    assert "Revenue growth slowed in Q4." in text
+    assert "weather" not in text and "filler" not in text
+    assert sum(count_tokens(d.page_content) for d in packed) <= 40
+
+    # Nothing relevant: the budget is filled in retrieval order
+    packed = EvidencePacker(max_tokens=20).pack("zebra", docs)
+    assert packed[0].page_content.startswith("The weather was mild.")
+
+
+def test_under_budget_is_untouched():
+    docs = _chunks(TEXT[:200])
+    assert EvidencePacker(max_tokens=10_000).pack("topic", docs)[0].page_content == TEXT[:200]
+
+
+def test_neighbours_merge_by_position():
+    # No repeated text between chunks: only their positions tie them
+    text = " ".join(f"Fact {i}: value {i * 37} noted." for i in range(120))
+    chunks = _chunks(text, overlap=0)
+    assert len(chunks) > 5
+
+    merged = EvidencePacker(max_tokens=10_000).merge([chunks[3], chunks[1], chunks[2], chunks[5]])
+
+    assert [d.id for d in merged] == [chunks[3].id, chunks[5].id]
+    assert merged[0].page_content == "\n".join(c.page_content for c in chunks[1:4])
+    assert merged[1].page_content == chunks[5].page_content
+
+
+def test_adjacent_row_windows_merge():
+    rows = [["name", "score"]] + [[f"student {i}", i] for i in range(1, 31)]
+    windows = list(
+        row_window_documents(
+            rows, {"source": "grades.xlsx", "section": "sheet:Grades"}, "Grades", rows_per_chunk=10
+        )
+    )
+    assert len(windows) == 3
+
+    merged = EvidencePacker(max_tokens=10_000).merge([windows[1], windows[0]])
+
+    assert len(merged) == 1
+    assert merged[0].metadata["row_start"] == 2 and merged[0].metadata["row_end"] == 21
+    text = merged[0].page_content
+    assert text.startswith("Grades (rows 2-21)\nname | score\nstudent 1 | 1")
+    assert text.count("name | score") == 1
+    assert "student 20 | 20" in text and "student 21" not in text
+
+
+def test_long_sentence_is_truncated_to_the_budget():
+    long_sentence = "Revenue in 2023 reached 4.2 million " + "across many regions " * 40 + "."
+    docs = [Document(page_content=long_sentence, metadata={"source": "a.docx"})]
+
+    packed = EvidencePacker(max_tokens=30).pack("What was the revenue in 2023?", docs)
+
+    assert len(packed) == 1
+    assert packed[0].page_content.startswith("Revenue in 2023 reached 4.2 million")
+    assert packed[0].page_content.endswith("…")
+    assert count_tokens(packed[0].page_content) <= 30
+
+
+if __name__ == "__main__":
+    test_merge_overlapping_chunks()
+    test_different_sources_are_not_merged()
+    test_merged_output_follows_rank_across_sources()
+    test_budget_keeps_relevant_sentences()
+    test_under_budget_is_untouched()
+    test_neighbours_merge_by_position()
+    test_adjacent_row_windows_merge()
+    test_long_sentence_is_truncated_to_the_budget()
@@ -0,0 +1,161 @@
+import tempfile
+from pathlib import Path
+
+import faiss
+import numpy as np
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from langchain_core.language_models import FakeListChatModel
+
+import orchestration.lcel_pipeline as lcel_pipeline
+from agents.retrieval_agent import RetrievalAgent
+from ingestion.ingestion_pipeline import IngestionPipeline
+from vectorstore.faiss_loader import index_version, load_faiss_index
+from vectorstore.faiss_store import (
+    ANN_INDEX_FILE,
+    recall_report,
+    sample_vectors,
+    update_ann_index,
+)
+from vectorstore.partitioned_search import DocumentTypePartitions
+
+
+def test_ann_index_types():
+    rng = np.random.default_rng(0)
+    flat = faiss.IndexFlatL2(32)
+    flat.add(rng.normal(size=(5000, 32)).astype(np.float32))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for index_type, knob in [("ivf_flat", "nprobe"), ("hnsw", "efSearch"), ("ivf_pq", "nprobe")]:
+            ann = update_ann_index(flat, tmp, index_type, flat_version="v1")
+            assert ann.ntotal == flat.ntotal
+
+            rows = recall_report(flat, ann, n_queries=50, k=10)
+
+            assert rows[0]["setting"] == "flat"
+            assert all(r["setting"].startswith(knob) for r in rows[1:])
+            # More probes / a wider beam never hurt recall
+            recalls = [r["recall_at_k"] for r in rows[1:]]
+            assert recalls == sorted(recalls)
+
+            if index_type != "ivf_pq":
+                assert recalls[-1] > 0.9
+
+
+def test_empty_index():
+    flat = faiss.IndexFlatL2(16)
+    assert sample_vectors(flat, 100).shape == (0, 16)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Nothing to train on: no ANN index until vectors arrive
+        for index_type in ("ivf_flat", "hnsw", "ivf_pq"):
+            assert update_ann_index(flat, tmp, index_type, flat_version="v0") is None
+            assert not (Path(tmp) / ANN_INDEX_FILE).exists()
+
+        assert recall_report(flat, flat) == []
+
+        flat.add(np.random.default_rng(0).normal(size=(500, 16)).astype(np.float32))
+        ann = update_ann_index(flat, tmp, "ivf_flat", flat_version="v1", append_from=0)
+        assert ann.ntotal == 500
+
+
+def test_pipeline_with_hnsw():
+    embeddings = DeterministicFakeEmbedding(size=32)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        texts = Path(tmp) / "data" / "texts"
+        texts.mkdir(parents=True)
+        faiss_dir = str(Path(tmp) / "faiss_index")
+
+        for i in range(5):
+            (texts / f"{i}.txt").write_text(f"document {i} " * 200)
+
+        pipeline = IngestionPipeline(
+            data_dir=str(Path(tmp) / "data"),
+            faiss_dir=faiss_dir,
+            embeddings=embeddings,
+            index_type="hnsw",
+        )
+
+        def check():
+            vs = load_faiss_index(faiss_dir, embeddings=embeddings, ef_search=64)
+            assert isinstance(vs.index, faiss.IndexHNSW)
+            assert vs.index.ntotal == len(vs.index_to_docstore_id)
+            assert vs.index.hnsw.efSearch == 64
+            return vs
+
+        pipeline.run()
+        check()
+
+        # Append-only update, then a deletion (full refill)
+        (texts / "5.txt").write_text("document 5 " * 200)
+        pipeline.run()
+        check()
+
+        (texts / "0.txt").unlink()
+        pipeline.run()
+        vs = check()
+
+        # Partitioned search works on top of the approximate index
+        partitions = DocumentTypePartitions.load_or_build(faiss_dir, vs)
+        docs = RetrievalAgent(vs, partitions=partitions).retrieve(
+            "document 3", top_k=3, allowed_doc_types=["txt"]
+        )
+        assert len(docs) == 3
+
+        # Switching back to flat drops the ANN index
+        IngestionPipeline(
+            data_dir=str(Path(tmp) / "data"),
+            faiss_dir=faiss_dir,
+            embeddings=embeddings,
+        ).run()
+        assert isinstance(load_faiss_index(faiss_dir, embeddings=embeddings).index, faiss.IndexFlat)
+
+
+def test_chain_serves_ivf_with_tuned_nprobe():
+    embeddings = DeterministicFakeEmbedding(size=32)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        texts = Path(tmp) / "data" / "texts"
+        texts.mkdir(parents=True)
+        faiss_dir = str(Path(tmp) / "faiss_index")
+
+        for i in range(60):
+            (texts / f"{i}.txt").write_text(f"document {i} " * 200)
+
+        IngestionPipeline(
+            data_dir=str(Path(tmp) / "data"),
+            faiss_dir=faiss_dir,
+            embeddings=embeddings,
+            index_type="ivf_flat",
+        ).run()
+
+        loaded = []
+        original = lcel_pipeline.load_faiss_index
+
+        def spy(*args, **kwargs):
+            loaded.append(original(*args, **kwargs))
+            return loaded[-1]
+
+        lcel_pipeline.load_faiss_index = spy
+        try:
+            for options in ({}, {"nprobe": 2}):
+                lcel_pipeline.build_agentic_rag_chain(
+                    faiss_dir,
+                    llm=FakeListChatModel(responses=["answer"]),
+                    embeddings=embeddings,
+                    **options,
+                )
+        finally:
+            lcel_pipeline.load_faiss_index = original
+
+        # The nprobe chosen at build time is applied, unless overridden
+        ivf = faiss.extract_index_ivf(loaded[0].index)
+        assert ivf.nlist > 1 and ivf.nprobe > 1
+        assert faiss.extract_index_ivf(loaded[1].index).nprobe == 2
+
+
+if __name__ == "__main__":
+    test_ann_index_types()
+    test_empty_index()
+    test_pipeline_with_hnsw()
+    test_chain_serves_ivf_with_tuned_nprobe()
@@ -0,0 +1,154 @@
+import asyncio
+import json
+import tempfile
+
+from langchain_community.vectorstores import FAISS
+from langchain_core.documents import Document
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from langchain_core.language_models import FakeListChatModel
+
+from agents.fast_answer_agent import FastAnswerAgent, _AnswerExtractor
+from orchestration.lcel_pipeline import STAGES, build_agentic_rag_chain
+from utils.logger import StageTracer
+
+
+RESPONSE = json.dumps(
+    {
+        "verdict": "SUPPORTED",
+        "justification": "The sheet lists the totals.",
+        "answer": "There are 42 rows in the table.",
+    }
+)
+
+DOCS = [
+    Document(
+        page_content="Total rows: 42",
+        metadata={"document_type": "xlsx", "source": "data.xlsx", "section": "sheet:Sheet1"},
+    )
+]
+
+
+def test_answer_streams_only_the_answer_field():
+    agent = FastAnswerAgent(llm=FakeListChatModel(responses=[RESPONSE]))
+
+    tokens = list(agent.answer_stream("How many rows?", DOCS))
+    text = "".join(tokens)
+
+    # Character-level fake stream -> the answer arrives incrementally
+    assert len(tokens) > 5
+    assert text.startswith("There are 42 rows in the table.")
+    assert "SUPPORTED" not in text
+    assert "xlsx | data.xlsx | section: sheet:Sheet1" in text
+
+    atext = asyncio.run(_collect(agent.aanswer_stream("How many rows?", DOCS)))
+    assert atext == text
+
+
+def test_structured_result_and_fallbacks():
+    agent = FastAnswerAgent(llm=FakeListChatModel(responses=[RESPONSE]))
+    result = agent.answer("How many rows?", DOCS)
+    assert result["verdict"] == "SUPPORTED"
+    assert result["answer"] == "There are 42 rows in the table."
+
+    # A model that ignores the JSON instruction still yields its text
+    agent = FastAnswerAgent(llm=FakeListChatModel(responses=["Plain answer."]))
+    assert "".join(agent.answer_stream("q", DOCS)).startswith("Plain answer.")
+    assert agent.answer("q", DOCS)["verdict"] == "UNKNOWN"
+
+    assert agent.answer("q", [])["verdict"] == "INSUFFICIENT_EVIDENCE"
+
+
+def test_extractor_decodes_escapes_across_chunks():
+    answer = 'Line one\nsaid "42" \\ caf\u00e9 \U0001f600 done' * 3
+    raw = json.dumps({"verdict": "SUPPORTED", "justification": "j", "answer": answer})
+
+    for size in (1, 2, 5, 13):
+        extractor = _AnswerExtractor()
+        text = "".join(
+            extractor.feed(raw[i:i + size]) for i in range(0, len(raw), size)
+        )
+        assert text + extractor.finish() == answer
+
+    # Long answers stay linear: one pass over the text, no re-parsing
+    long_answer = "word " * 20000
+    raw = json.dumps({"verdict": "SUPPORTED", "justification": "j", "answer": long_answer})
+    extractor = _AnswerExtractor()
+    text = "".join(extractor.feed(raw[i:i + 3]) for i in range(0, len(raw), 3))
+    assert text == long_answer
+
+
+async def _collect(stream):
+    return "".join([token async for token in stream])
+
+
+def test_chain_uses_one_call_for_single_call_types():
+    embeddings = DeterministicFakeEmbedding(size=16)
+    query = {"query": "How many rows are in the spreadsheet table?"}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        FAISS.from_documents(DOCS * 3, embeddings).save_local(tmp)
+
+        llm = FakeListChatModel(responses=[RESPONSE] * 10)
+        chain = build_agentic_rag_chain(
+            tmp, llm=llm, embeddings=embeddings, single_call_query_types=("data",)
+        )
+        assert chain.invoke(query).startswith("There are 42 rows")
+        assert llm.i == 1
+
+        assert asyncio.run(chain.ainvoke(query)).startswith("There are 42 rows")
+        assert llm.i == 2
+
+        # Other types keep fact-check + composition
+        llm = FakeListChatModel(responses=["analysis", "final answer"] * 5)
+        chain = build_agentic_rag_chain(tmp, llm=llm, embeddings=embeddings)
+        assert chain.invoke(query) == "final answer"
+        assert llm.i == 2
+
+
+def test_single_call_reports_and_routes_the_verdict():
+    embeddings = DeterministicFakeEmbedding(size=16)
+    query = {"query": "How many rows are in the spreadsheet table?"}
+    insufficient = json.dumps(
+        {
+            "verdict": "INSUFFICIENT_EVIDENCE",
+            "justification": "The sheet has no row count.",
+            "answer": "I think there are about 40 rows.",
+        }
+    )
+
+    with tempfile.TemporaryDirectory() as tmp:
+        FAISS.from_documents(DOCS * 3, embeddings).save_local(tmp)
+
+        llm = FakeListChatModel(responses=[RESPONSE, insufficient] * 2)
+        chain = build_agentic_rag_chain(
+            tmp, llm=llm, embeddings=embeddings, single_call_query_types=("data",)
+        )
+
+        tracer = StageTracer(STAGES)
+        chain.invoke(query, config={"callbacks": [tracer]})
+        assert tracer.fields["verdict"] == "SUPPORTED"
+
+        # Same canned reply as the fact-check path, without the answer
+        tracer = StageTracer(STAGES)
+        text = chain.invoke(query, config={"callbacks": [tracer]})
+        assert text.startswith("I could not find enough evidence")
+        assert "The sheet has no row count." in text
+        assert "40 rows" not in text
+        assert tracer.fields["verdict"] == "INSUFFICIENT_EVIDENCE"
+
+        tracer = StageTracer(STAGES)
+        asyncio.run(chain.ainvoke(query, config={"callbacks": [tracer]}))
+        assert tracer.fields["verdict"] == "SUPPORTED"
+
+        tracer = StageTracer(STAGES)
+        text = asyncio.run(chain.ainvoke(query, config={"callbacks": [tracer]}))
+        assert text.startswith("I could not find enough evidence")
+        assert tracer.fields["verdict"] == "INSUFFICIENT_EVIDENCE"
+
+
+if __name__ == "__main__":
+    test_answer_streams_only_the_answer_field()
+    test_structured_result_and_fallbacks()
+    test_extractor_decodes_escapes_across_chunks()
+    test_chain_uses_one_call_for_single_call_types()
+    test_single_call_reports_and_routes_the_verdict()
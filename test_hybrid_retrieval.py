@@ -0,0 +1,128 @@
+import asyncio
+import tempfile
+from pathlib import Path
+
+import numpy as np
+from langchain_community.vectorstores import FAISS
+from langchain_core.documents import Document
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from langchain_core.language_models import FakeListChatModel
+
+from agents.retrieval_agent import RetrievalAgent
+from ingestion.ingestion_pipeline import IngestionPipeline
+from orchestration.lcel_pipeline import build_agentic_rag_chain
+from vectorstore.lexical_index import BM25Index, reciprocal_rank_fusion, tokenize
+
+
+def _vectorstore(embeddings):
+    docs = [
+        Document(
+            page_content=f"quarterly report row {i} with filler text",
+            metadata={"document_type": "xlsx" if i % 2 else "pdf", "section": "s"},
+        )
+        for i in range(60)
+    ]
+    docs.append(
+        Document(
+            page_content="Q3 revenue was 48,213.75 units in region north",
+            metadata={"document_type": "xlsx", "section": "sheet:Q3"},
+        )
+    )
+    return FAISS.from_documents(docs, embeddings)
+
+
+def test_bm25_index():
+    assert tokenize("Revenue: 1,250.5 USD (Q3)") == ["revenue", "1,250.5", "usd", "q3"]
+
+    index = BM25Index.build(
+        [
+            ("a", "revenue grew in 2023", "xlsx"),
+            ("b", "revenue revenue forecast", "pdf"),
+            ("c", "unrelated slide notes", "pptx"),
+        ]
+    )
+
+    assert [doc_id for doc_id, _ in index.search("revenue 2023", k=5)] == ["a", "b"]
+    assert [doc_id for doc_id, _ in index.search("revenue", k=5, doc_types=["pdf"])] == ["b"]
+    assert index.search("missing term", k=5) == []
+    assert len(index.search("revenue", k=1)) == 1
+
+
+def test_reciprocal_rank_fusion():
+    assert reciprocal_rank_fusion([["a", "b", "c"], ["c", "a"]]) == ["a", "c", "b"]
+
+
+def test_hybrid_retrieval():
+    vs = _vectorstore(DeterministicFakeEmbedding(size=16))
+    agent = RetrievalAgent(vs, lexical_index=BM25Index.from_vectorstore(vs))
+
+    assert agent.uses_hybrid("data")
+    assert not agent.uses_hybrid("research")
+
+    query = "What was the Q3 revenue of 48,213.75?"
+    docs = agent.retrieve(query, top_k=3, allowed_doc_types=["xlsx"], hybrid=True)
+
+    assert len(docs) == 3
+    assert "48,213.75" in docs[0].page_content or "48,213.75" in docs[1].page_content
+    assert all(d.metadata["document_type"] == "xlsx" for d in docs)
+
+    adocs = asyncio.run(
+        agent.aretrieve(query, top_k=3, allowed_doc_types=["xlsx"], hybrid=True)
+    )
+    assert [d.id for d in adocs] == [d.id for d in docs]
+
+    # Section filters apply to the lexical side too
+    docs = agent.retrieve(query, top_k=3, allowed_sections=["s"], hybrid=True)
+    assert all(d.metadata["section"] == "s" for d in docs)
+
+
+def test_lexical_index_persisted_and_used_by_chain():
+    embeddings = DeterministicFakeEmbedding(size=16)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        texts = Path(tmp) / "data" / "texts"
+        texts.mkdir(parents=True)
+        faiss_dir = str(Path(tmp) / "faiss_index")
+
+        for i in range(3):
+            (texts / f"{i}.txt").write_text(f"document {i} " * 200)
+
+        IngestionPipeline(
+            data_dir=str(Path(tmp) / "data"),
+            faiss_dir=faiss_dir,
+            embeddings=embeddings,
+        ).run()
+        assert (Path(faiss_dir) / BM25Index.FILENAME).exists()
+
+        vs = FAISS.load_local(faiss_dir, embeddings, allow_dangerous_deserialization=True)
+        index = BM25Index.load_or_build(faiss_dir, vs)
+        assert len(index) == len(vs.index_to_docstore_id)
+
+        # k1 / b are saved with the index; other values rebuild it
+        BM25Index.from_vectorstore(vs, k1=1.2, b=0.3).save(faiss_dir)
+        loaded = BM25Index.load_or_build(faiss_dir, None, k1=1.2, b=0.3)
+        assert (loaded.k1, loaded.b) == (1.2, 0.3)
+
+        rebuilt = BM25Index.load_or_build(faiss_dir, vs)
+        assert (rebuilt.k1, rebuilt.b) == (1.5, 0.75)
+        assert not np.allclose(rebuilt._norm, loaded._norm)
+
+        _vectorstore(embeddings).save_local(faiss_dir)
+
+        for speculative in (False, True):
+            chain = build_agentic_rag_chain(
+                faiss_dir,
+                llm=FakeListChatModel(responses=["answer"]),
+                embeddings=embeddings,
+                speculative=speculative,
+            )
+            query = {"query": "How many rows are in the spreadsheet table?"}
+            assert chain.invoke(query) == "answer"
+            assert asyncio.run(chain.ainvoke(query)) == "answer"
+
+
+if __name__ == "__main__":
+    test_bm25_index()
+    test_reciprocal_rank_fusion()
+    test_hybrid_retrieval()
+    test_lexical_index_persisted_and_used_by_chain()
@@ -0,0 +1,71 @@
+import tempfile
+from pathlib import Path
+
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from ingestion.index_manifest import IndexManifest
+from ingestion.ingestion_pipeline import IngestionPipeline
+from vectorstore.faiss_loader import load_faiss_index
+
+
+SPLITTER_CONFIG = {
+    "splitter": "RecursiveCharacterTextSplitter",
+    "chunk_size": 800,
+    "chunk_overlap": 150,
+    "table_rows_per_chunk": 20,
+    "table_max_chars": 1500,
+}
+
+
+def _stored_ids(faiss_dir: str):
+    vs = load_faiss_index(faiss_dir, embeddings=DeterministicFakeEmbedding(size=32))
+    return set(vs.index_to_docstore_id.values())
+
+
+def test_incremental_ingestion():
+    with tempfile.TemporaryDirectory() as tmp:
+        data_dir = Path(tmp) / "data"
+        faiss_dir = str(Path(tmp) / "faiss_index")
+        texts = data_dir / "texts"
+        texts.mkdir(parents=True)
+
+        (texts / "a.txt").write_text("Accuracy reported was 91 percent. " * 100)
+        (texts / "b.txt").write_text("The baseline model reached 84 percent. " * 5)
+
+        pipeline = IngestionPipeline(
+            data_dir=str(data_dir),
+            faiss_dir=faiss_dir,
+            embeddings=DeterministicFakeEmbedding(size=32),
+            batch_size=3,
+        )
+
+        # 1. Full build
+        pipeline.run()
+        manifest = IndexManifest.load(faiss_dir, SPLITTER_CONFIG)
+        assert set(manifest.files) == {"texts/a.txt", "texts/b.txt"}
+        a_ids = manifest.chunk_ids("texts/a.txt")
+        assert len(a_ids) > 1
+        assert _stored_ids(faiss_dir) == set(a_ids) | set(manifest.chunk_ids("texts/b.txt"))
+
+        # 2. Nothing changed -> index untouched
+        index_mtime = (Path(faiss_dir) / "index.faiss").stat().st_mtime_ns
+        pipeline.run()
+        assert (Path(faiss_dir) / "index.faiss").stat().st_mtime_ns == index_mtime
+
+        # 3. Change b, delete a, add c
+        (texts / "b.txt").write_text("The baseline model reached 79 percent. " * 5)
+        (texts / "a.txt").unlink()
+        (texts / "c.txt").write_text("A new upload about dataset size. " * 5)
+        pipeline.run()
+
+        manifest = IndexManifest.load(faiss_dir, SPLITTER_CONFIG)
+        assert set(manifest.files) == {"texts/b.txt", "texts/c.txt"}
+        expected = set(manifest.chunk_ids("texts/b.txt")) | set(manifest.chunk_ids("texts/c.txt"))
+        assert _stored_ids(faiss_dir) == expected
+
+        # 4. Splitter change invalidates the manifest
+        assert IndexManifest.load(faiss_dir, {**SPLITTER_CONFIG, "chunk_size": 400}).files == {}
+
+
+if __name__ == "__main__":
+    test_incremental_ingestion()
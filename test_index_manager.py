@@ -0,0 +1,160 @@
+import os
+import tempfile
+import threading
+from pathlib import Path
+
+from benchmarks.corpus import generate_corpus
+from benchmarks.fakes import FakeChatModel, FakeEmbeddings
+from orchestration.index_manager import IndexManager
+from orchestration.lcel_pipeline import build_agentic_rag_chain
+from vectorstore.index_versions import (
+    current_index_dir,
+    current_version,
+    discard_version,
+    list_versions,
+    stage_version,
+)
+
+
+class GatedEmbeddings(FakeEmbeddings):
+    """
+    Blocks embedding until released, to observe a rebuild mid-flight.
+    """
+
+    def __init__(self):
+        super().__init__(size=64)
+        self.gate = threading.Event()
+        self.gate.set()
+
+    def embed_documents(self, texts):
+        self.gate.wait(10)
+        return super().embed_documents(texts)
+
+
+def _manager(tmp, embeddings):
+    root = str(Path(tmp) / "faiss_index")
+
+    return IndexManager(
+        root,
+        data_dir=str(Path(tmp) / "data"),
+        build_chain=lambda faiss_dir: build_agentic_rag_chain(
+            faiss_dir, llm=FakeChatModel(), embeddings=embeddings
+        ),
+        pipeline_options={"embeddings": embeddings},
+    )
+
+
+def test_background_rebuild_swaps_atomically():
+    embeddings = GatedEmbeddings()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        generate_corpus(str(Path(tmp) / "data"), n_chunks=20, formats=("txt",))
+        manager = _manager(tmp, embeddings)
+        assert manager.chain is None
+
+        assert manager.start_rebuild()
+        status = manager.wait(30)
+        assert status["state"] == "succeeded", status
+        assert status["files_done"] == status["files_total"] == 1
+
+        first_dir = manager.index_dir
+        first_chain = manager.chain
+        assert first_dir == current_index_dir(manager.root)
+        assert first_chain.invoke({"query": "What accuracy did the baseline model report?"})
+        first_files = {p.name: p.read_bytes() for p in Path(first_dir).iterdir()}
+
+        # A query keeps the first version leased through the next rebuilds
+        lease = manager.lease()
+        assert lease.__enter__() is first_chain
+
+        # New file; the rebuild stalls in the embedding stage
+        (Path(tmp) / "data" / "texts" / "extra.txt").write_text(
+            "The sensor array reported 12.5 percent yield in study 7."
+        )
+        embeddings.gate.clear()
+        assert manager.start_rebuild()
+        assert not manager.start_rebuild()
+
+        # Still serving the old version, and the live pointer is untouched
+        assert manager.chain is first_chain
+        assert current_index_dir(manager.root) == first_dir
+        assert first_chain.invoke({"query": "What yield did the sensor array report?"})
+
+        embeddings.gate.set()
+        status = manager.wait(30)
+        assert status["state"] == "succeeded"
+
+        # Incremental: the new version was seeded with the old one, so
+        # only the new file's chunk was embedded
+        assert status["chunks"] == 1
+
+        assert manager.chain is not first_chain
+        assert manager.index_dir != first_dir
+        assert "texts/extra.txt" in Path(manager.index_dir, "manifest.json").read_text()
+
+        # The rebuild replaced files in its own version, never the live ones
+        assert {p.name: p.read_bytes() for p in Path(first_dir).iterdir()} == first_files
+
+        # Third build: the oldest version is still leased, so it is kept
+        assert manager.start_rebuild()
+        assert manager.wait(30)["state"] == "succeeded"
+        assert len(list_versions(manager.root)) == 3
+        assert Path(first_dir).exists()
+
+        # Once released, the next build prunes it, keeping live + previous
+        lease.__exit__(None, None, None)
+        assert manager.start_rebuild()
+        assert manager.wait(30)["state"] == "succeeded"
+        assert len(list_versions(manager.root)) == 2
+        assert not Path(first_dir).exists()
+
+
+def test_failed_rebuild_keeps_live_index():
+    embeddings = FakeEmbeddings(size=64)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        generate_corpus(str(Path(tmp) / "data"), n_chunks=10, formats=("txt",))
+        manager = _manager(tmp, embeddings)
+
+        manager.start_rebuild()
+        assert manager.wait(30)["state"] == "succeeded"
+        live = current_version(manager.root)
+        chain = manager.chain
+
+        for path in (Path(tmp) / "data" / "texts").iterdir():
+            path.unlink()
+
+        manager.start_rebuild()
+        status = manager.wait(30)
+        assert status["state"] == "failed"
+        assert "No documents found" in status["error"]
+
+        assert current_version(manager.root) == live
+        assert list_versions(manager.root) == [live]
+        assert manager.chain is chain
+
+
+def test_staged_version_links_live_files():
+    embeddings = FakeEmbeddings(size=64)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        generate_corpus(str(Path(tmp) / "data"), n_chunks=10, formats=("txt",))
+        manager = _manager(tmp, embeddings)
+        manager.start_rebuild()
+        assert manager.wait(30)["state"] == "succeeded"
+
+        live = Path(current_index_dir(manager.root))
+        staged = Path(stage_version(manager.root))
+
+        # Seeded with hard links, not copies
+        for path in live.iterdir():
+            assert os.path.samefile(path, staged / path.name)
+
+        discard_version(str(staged))
+        assert (live / "index.faiss").exists()
+
+
+if __name__ == "__main__":
+    test_background_rebuild_swaps_atomically()
+    test_failed_rebuild_keeps_live_index()
+    test_staged_version_links_live_files()
@@ -0,0 +1,113 @@
+import tempfile
+from pathlib import Path
+
+from docx import Document as DocxDocument
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from langchain_core.language_models import FakeListChatModel
+
+from agents.retrieval_agent import RetrievalAgent
+from ingestion.ingestion_pipeline import IngestionPipeline
+from orchestration.lcel_pipeline import build_agentic_rag_chain
+from orchestration.response_cache import SemanticResponseCache
+from vectorstore.milvus_store import MilvusStore
+
+
+def _chunks_by_source(store):
+    rows = store.client.query(
+        store.collection_name, filter='id != ""', output_fields=["source_key"]
+    )
+    counts = {}
+    for row in rows:
+        counts[row["source_key"]] = counts.get(row["source_key"], 0) + 1
+    return counts
+
+
+def test_build_expr():
+    assert MilvusStore.build_expr(None) == ""
+    assert (
+        MilvusStore.build_expr({"document_type": ["pdf", "docx"], "section": "s"})
+        == 'document_type in ["pdf", "docx"] and section in ["s"]'
+    )
+    assert MilvusStore.build_expr({"page": [1, 2]}) == (
+        '(metadata["page"] == 1 or metadata["page"] == 2)'
+    )
+
+
+def test_milvus_pipeline_and_retrieval():
+    embeddings = DeterministicFakeEmbedding(size=16)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        data = Path(tmp) / "data"
+        (data / "texts").mkdir(parents=True)
+        (data / "docx").mkdir()
+
+        for i in range(3):
+            (data / "texts" / f"{i}.txt").write_text(f"text file {i} " * 150)
+
+        doc = DocxDocument()
+        doc.add_paragraph("word document paragraph " * 40)
+        doc.save(data / "docx" / "report.docx")
+
+        store = MilvusStore(embeddings, uri=str(Path(tmp) / "milvus.db"))
+        pipeline = IngestionPipeline(
+            data_dir=str(data),
+            faiss_dir=str(Path(tmp) / "state"),
+            embeddings=embeddings,
+            vector_store=store,
+            batch_size=4,
+        )
+
+        pipeline.run()
+        counts = _chunks_by_source(store)
+        assert set(counts) == {"texts/0.txt", "texts/1.txt", "texts/2.txt", "docx/report.docx"}
+        version = store.version()
+
+        # Server-side scalar filtering
+        agent = RetrievalAgent(store)
+        docs = agent.retrieve("text file 1", top_k=3, allowed_doc_types=["docx"])
+        assert docs and all(d.metadata["document_type"] == "docx" for d in docs)
+
+        docs = agent.retrieve("text file 1", top_k=20, allowed_doc_types=["txt"])
+        assert len(docs) == sum(v for k, v in counts.items() if k.startswith("texts/"))
+
+        # Upsert by source: changed file replaced, deleted file dropped
+        (data / "texts" / "0.txt").write_text("short")
+        (data / "texts" / "1.txt").write_text("rewritten " * 150)
+        (data / "texts" / "2.txt").unlink()
+        pipeline.run()
+
+        after = _chunks_by_source(store)
+        assert after == {**after, "texts/0.txt": 1, "docx/report.docx": counts["docx/report.docx"]}
+        assert set(after) == {"texts/0.txt", "texts/1.txt", "docx/report.docx"}
+        assert sorted(
+            d.page_content.split()[0]
+            for d in agent.retrieve("x", top_k=50, allowed_doc_types=["txt"])
+        ) == ["rewritten"] * after["texts/1.txt"] + ["short"]
+        assert store.version() != version
+
+        # Reopening the collection (new process) sees the same data
+        reopened = MilvusStore(embeddings, uri=str(Path(tmp) / "milvus.db"))
+        assert len(RetrievalAgent(reopened).retrieve("rewritten", top_k=50)) == sum(after.values())
+
+        # The chain queries Milvus; a re-ingestion invalidates cached answers
+        cache = SemanticResponseCache()
+        chain = build_agentic_rag_chain(
+            str(Path(tmp) / "state"),
+            response_cache=cache,
+            llm=FakeListChatModel(responses=["answer"]),
+            embeddings=embeddings,
+            vectorstore=store,
+        )
+        query = {"query": "What does the report say?"}
+        chain.invoke(query)
+        chain.invoke(query)
+        assert cache.hits == 1
+
+        (data / "texts" / "1.txt").write_text("again " * 150)
+        pipeline.run()
+        chain.invoke(query)
+        assert cache.hits == 1
+
+if __name__ == "__main__":
+    test_build_expr()
+    test_milvus_pipeline_and_retrieval()
@@ -0,0 +1,68 @@
+import tempfile
+from pathlib import Path
+
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from ingestion.ingestion_pipeline import IngestionPipeline
+from vectorstore.faiss_loader import load_faiss_index
+from vectorstore.sqlite_docstore import DOCSTORE_FILE, SQLiteDocstore
+
+
+def _results(vs, **kwargs):
+    return [
+        (doc.id, doc.page_content, doc.metadata, round(score, 4))
+        for doc, score in vs.similarity_search_with_score("document 2", k=4, **kwargs)
+    ]
+
+
+def test_mmap_loading():
+    embeddings = DeterministicFakeEmbedding(size=32)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        texts = Path(tmp) / "data" / "texts"
+        texts.mkdir(parents=True)
+        faiss_dir = str(Path(tmp) / "faiss_index")
+
+        for i in range(4):
+            (texts / f"{i}.txt").write_text(f"document {i} " * 200)
+
+        for index_type in ("flat", "ivf_flat"):
+            pipeline = IngestionPipeline(
+                data_dir=str(Path(tmp) / "data"),
+                faiss_dir=faiss_dir,
+                embeddings=embeddings,
+                index_type=index_type,
+            )
+            pipeline.run()
+
+            mapped = load_faiss_index(faiss_dir, embeddings=embeddings)
+            pickled = load_faiss_index(faiss_dir, embeddings=embeddings, mmap=False)
+
+            assert isinstance(mapped.docstore, SQLiteDocstore)
+            assert not isinstance(pickled.docstore, SQLiteDocstore)
+            assert len(mapped.index_to_docstore_id) == len(pickled.index_to_docstore_id)
+
+            assert _results(mapped) == _results(pickled)
+            assert _results(mapped, filter={"document_type": "txt"}) == _results(
+                pickled, filter={"document_type": "txt"}
+            )
+
+        # A changed file re-stamps the docstore for the new index
+        (texts / "0.txt").write_text("rewritten " * 200)
+        pipeline.run()
+        assert isinstance(
+            load_faiss_index(faiss_dir, embeddings=embeddings).docstore, SQLiteDocstore
+        )
+
+        # Missing docstore: falls back to the pickle, next run restores it
+        (Path(faiss_dir) / DOCSTORE_FILE).unlink()
+        vs = load_faiss_index(faiss_dir, embeddings=embeddings)
+        assert not isinstance(vs.docstore, SQLiteDocstore)
+        assert len(vs.similarity_search("rewritten", k=2)) == 2
+
+        pipeline.run()
+        assert (Path(faiss_dir) / DOCSTORE_FILE).exists()
+
+
+if __name__ == "__main__":
+    test_mmap_loading()
@@ -0,0 +1,39 @@
+import tempfile
+from pathlib import Path
+
+from ingestion.docx_ingestor import DocxIngestor
+from ingestion.parallel_ingestion import ingest_files
+from ingestion.text_ingestor import TextIngestor
+
+
+def test_parallel_ingestion():
+    with tempfile.TemporaryDirectory() as tmp:
+        texts = Path(tmp) / "texts"
+        docx = Path(tmp) / "docx"
+        texts.mkdir()
+        docx.mkdir()
+
+        for i in range(6):
+            (texts / f"{i}.txt").write_text(f"document number {i}")
+        (docx / "broken.docx").write_bytes(b"not a zip archive")
+
+        text_ingestor = TextIngestor(texts)
+        tasks = [(text_ingestor, p) for p in text_ingestor.files()]
+        tasks.insert(3, (DocxIngestor(str(docx)), docx / "broken.docx"))
+
+        serial = list(ingest_files(tasks, workers=1))
+        parallel = list(ingest_files(tasks, workers=3))
+
+        # Same order and content as the serial path
+        assert [d for d, _ in parallel] == [d for d, _ in serial]
+        assert [docs[0].page_content for docs, _ in parallel if docs] == [
+            f"document number {i}" for i in range(6)
+        ]
+
+        # The corrupt file is isolated, not fatal
+        docs, error = parallel[3]
+        assert docs == [] and error is not None
+
+
+if __name__ == "__main__":
+    test_parallel_ingestion()
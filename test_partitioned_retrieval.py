@@ -0,0 +1,58 @@
+import tempfile
+
+import numpy as np
+from langchain_community.vectorstores import FAISS
+from langchain_core.documents import Document
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from agents.retrieval_agent import RetrievalAgent
+from vectorstore.partitioned_search import DocumentTypePartitions
+
+
+def _vectorstore(embeddings):
+    # 2% xlsx chunks: a selective filter for the post-filtering path
+    docs = [
+        Document(
+            page_content=f"chunk {i}",
+            metadata={"document_type": "xlsx" if i % 50 == 0 else "pdf"},
+        )
+        for i in range(500)
+    ]
+    return FAISS.from_documents(docs, embeddings)
+
+
+def test_partitioned_retrieval():
+    embeddings = DeterministicFakeEmbedding(size=16)
+    vs = _vectorstore(embeddings)
+    partitions = DocumentTypePartitions.from_vectorstore(vs)
+
+    assert partitions.size(["xlsx"]) == 10
+    assert partitions.size(["pdf", "xlsx"]) == 500
+
+    query = "chunk 7"
+    plain = RetrievalAgent(vs)
+    partitioned = RetrievalAgent(vs, partitions=partitions)
+
+    # Post-filtering over fetch_k=20 candidates misses most xlsx chunks
+    assert len(plain.retrieve(query, top_k=5, allowed_doc_types=["xlsx"])) < 5
+
+    # Pre-filtered search returns the exact top-k within the partition
+    docs = partitioned.retrieve(query, top_k=5, allowed_doc_types=["xlsx"])
+    assert [d.metadata["document_type"] for d in docs] == ["xlsx"] * 5
+
+    q = np.asarray(embeddings.embed_query(query), dtype=np.float32)
+    xlsx = [i for i in range(500) if i % 50 == 0]
+    dists = {i: float(((vs.index.reconstruct(i) - q) ** 2).sum()) for i in xlsx}
+    expected = [f"chunk {i}" for i in sorted(xlsx, key=dists.get)[:5]]
+    assert [d.page_content for d in docs] == expected
+
+    # Persisted partitions are reused only while the index is unchanged
+    with tempfile.TemporaryDirectory() as tmp:
+        vs.save_local(tmp)
+        partitions.save(tmp)
+        loaded = DocumentTypePartitions.load_or_build(tmp, vs)
+        assert np.array_equal(loaded.partitions["xlsx"], partitions.partitions["xlsx"])
+
+
+if __name__ == "__main__":
+    test_partitioned_retrieval()
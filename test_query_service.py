@@ -0,0 +1,225 @@
+import json
+import tempfile
+import threading
+import urllib.error
+import urllib.request
+from pathlib import Path
+
+from api.server import QueryService, make_server, serve_in_background
+from benchmarks.corpus import generate_corpus, synthetic_queries
+from benchmarks.fakes import FakeChatModel, FakeEmbeddings
+from orchestration.index_manager import IndexManager
+from orchestration.lcel_pipeline import build_agentic_rag_chain
+from orchestration.response_cache import SemanticResponseCache
+
+
+class CountingEmbeddings(FakeEmbeddings):
+    def __init__(self):
+        super().__init__(size=64)
+        self.query_calls = 0
+
+    def embed_query(self, text):
+        self.query_calls += 1
+        return super().embed_query(text)
+
+
+def _request(url, path, payload=None):
+    data = json.dumps(payload).encode("utf-8") if payload is not None else None
+    request = urllib.request.Request(
+        url + path, data=data, headers={"Content-Type": "application/json"}
+    )
+
+    try:
+        with urllib.request.urlopen(request, timeout=30) as response:
+            body = response.read().decode("utf-8")
+            return response.status, dict(response.headers), body
+    except urllib.error.HTTPError as exc:
+        return exc.code, dict(exc.headers), exc.read().decode("utf-8")
+
+
+def _service(tmp, llm_latency=0.0, response_cache=None, **options):
+    embeddings = CountingEmbeddings()
+    llm = FakeChatModel(latency=llm_latency)
+
+    manager = IndexManager(
+        str(Path(tmp) / "faiss_index"),
+        data_dir=str(Path(tmp) / "data"),
+        build_chain=lambda faiss_dir: build_agentic_rag_chain(
+            faiss_dir, llm=llm, embeddings=embeddings, response_cache=response_cache
+        ),
+        pipeline_options={"embeddings": embeddings},
+    )
+    generate_corpus(str(Path(tmp) / "data"), n_chunks=20, formats=("txt",))
+
+    service = QueryService(manager, **options)
+    server = make_server(service, port=0)
+    _, url = serve_in_background(server)
+
+    service.embeddings = embeddings
+    return service, server, url
+
+
+def test_endpoints_and_micro_batching():
+    with tempfile.TemporaryDirectory() as tmp:
+        service, server, url = _service(tmp, llm_latency=0.05, max_wait=0.05)
+
+        try:
+            status, _, body = _request(url, "/query", {"query": "What recall?"})
+            assert status == 503 and "No index" in body
+
+            status, _, body = _request(url, "/ingest", {})
+            assert status == 202
+            service.index_manager.wait(30)
+
+            status, _, body = _request(url, "/ingest/status")
+            state = json.loads(body)
+            assert state["index_ready"] and state["rebuild"]["state"] == "succeeded"
+
+            # Concurrent single queries are served in shared batches
+            results = []
+            threads = [
+                threading.Thread(
+                    target=lambda q=q: results.append(_request(url, "/query", {"query": q}))
+                )
+                for q in synthetic_queries(8)
+            ]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+
+            assert [status for status, _, _ in results] == [200] * 8
+            assert service.batcher.stats()["batches"] < 8
+
+            # Batching doesn't change answers
+            chain = service.index_manager.chain
+            rows = [json.loads(body) for _, _, body in results]
+            for row in rows:
+                assert row["response"] == chain.invoke({"query": row["query"]})
+            assert "SUPPORTED" in {row["verdict"] for row in rows}
+
+            first, second = synthetic_queries(2, seed=5)
+            status, _, body = _request(
+                url, "/batch", {"queries": [first, {"id": "q2", "query": second}]}
+            )
+            rows = json.loads(body)["results"]
+            assert status == 200 and [r["id"] for r in rows] == ["0", "q2"]
+
+            status, headers, body = _request(url, "/stream", {"query": first})
+            assert status == 200 and headers["Transfer-Encoding"] == "chunked"
+            assert body == rows[0]["response"]
+
+            assert _request(url, "/query", {"nope": 1})[0] == 400
+            assert _request(url, "/missing")[0] == 404
+            assert "rag_stage_latency_seconds" in _request(url, "/metrics")[2]
+        finally:
+            server.shutdown()
+            server.server_close()
+
+
+def _concurrent_queries(url, queries):
+    results = []
+    threads = [
+        threading.Thread(
+            target=lambda q=q: results.append(_request(url, "/query", {"query": q}))
+        )
+        for q in queries
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    return results
+
+
+def _query_twice(response_cache, queries):
+    """
+    Serves `queries` concurrently, twice. Returns the responses of each
+    round and the number of single-query embedding calls in the first.
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        service, server, url = _service(
+            tmp, llm_latency=0.05, response_cache=response_cache, max_wait=0.05
+        )
+
+        try:
+            service.index_manager.start_rebuild()
+            service.index_manager.wait(30)
+            service.embeddings.query_calls = 0
+
+            rounds = []
+            for _ in range(2):
+                results = _concurrent_queries(url, queries)
+                assert [status for status, _, _ in results] == [200] * len(queries)
+
+                rows = [json.loads(body) for _, _, body in results]
+                rounds.append({row["query"]: row["response"] for row in rows})
+
+                if len(rounds) == 1:
+                    query_calls = service.embeddings.query_calls
+                    assert service.batcher.stats()["batches"] < len(queries)
+
+            return rounds, query_calls
+        finally:
+            server.shutdown()
+            server.server_close()
+
+
+def test_micro_batching_with_response_cache():
+    queries = synthetic_queries(8)
+    cache = SemanticResponseCache()
+
+    plain, plain_calls = _query_twice(None, queries)
+    cached, cached_calls = _query_twice(cache, queries)
+
+    # Cache misses still go through batched retrieval: no per-query
+    # embedding calls beyond what the classifier makes without a cache
+    assert cached[0] == plain[0]
+    assert cached_calls == plain_calls
+    assert cache.misses == 8
+
+    # The second round is answered from the cache
+    assert cached[1] == cached[0]
+    assert cache.hits == 8
+
+
+def test_backpressure_when_llm_saturated():
+    with tempfile.TemporaryDirectory() as tmp:
+        service, server, url = _service(
+            tmp, llm_latency=0.3, max_concurrency=1, max_queue=1, max_wait=0.0
+        )
+
+        try:
+            service.index_manager.start_rebuild()
+            service.index_manager.wait(30)
+
+            results = []
+            threads = [
+                threading.Thread(
+                    target=lambda: results.append(
+                        _request(url, "/query", {"query": "What recall?"})
+                    )
+                )
+                for _ in range(5)
+            ]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+
+            statuses = sorted(status for status, _, _ in results)
+            assert 200 in statuses and 503 in statuses
+
+            rejected = [headers for status, headers, _ in results if status == 503]
+            assert all(h["Retry-After"] == "1" for h in rejected)
+            assert service.batcher.stats()["rejected"] == len(rejected)
+        finally:
+            server.shutdown()
+            server.server_close()
+
+
+if __name__ == "__main__":
+    test_endpoints_and_micro_batching()
+    test_micro_batching_with_response_cache()
+    test_backpressure_when_llm_saturated()
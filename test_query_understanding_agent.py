@@ -0,0 +1,48 @@
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from langchain_core.runnables import RunnableLambda
+
+from agents.document_routing_agent import DocumentRoutingAgent
+from agents.query_understanding_agent import QueryUnderstandingAgent
+
+
+def test_local_classification():
+    agent = QueryUnderstandingAgent(mode="local")
+
+    cases = {
+        "What was the average accuracy in the results table?": "data",
+        "Which skills and experience does the candidate's resume list?": "profile",
+        "Summarize the slides in the presentation deck": "presentation",
+        "Do the experiment findings in the paper support the claim?": "research",
+        "Explain the concept and theory behind attention": "conceptual",
+    }
+
+    for query, expected in cases.items():
+        label = agent.classify(query)
+        print(f"{label:<13} <- {query}")
+        assert label == expected
+
+    # Every label is a routing key, so nothing falls through to ALL_DOC_TYPES
+    assert agent.classify("hello") in DocumentRoutingAgent.ROUTING_RULES
+
+
+def test_hybrid_falls_back_to_llm():
+    agent = QueryUnderstandingAgent(
+        mode="hybrid",
+        embeddings=DeterministicFakeEmbedding(size=16),
+    )
+    calls = []
+    agent._chain = RunnableLambda(lambda x: calls.append(x) or " Numeric\n")
+
+    # Confident local prediction: no LLM round trip
+    assert agent.classify("How many rows and columns are in the sheet?") == "data"
+    assert calls == []
+
+    # Low confidence: the LLM decides, and an off-table label is normalized
+    agent.confidence_threshold = 1.01
+    assert agent.classify("Tell me something") == "general"
+    assert len(calls) == 1
+
+
+if __name__ == "__main__":
+    test_local_classification()
+    test_hybrid_falls_back_to_llm()
@@ -0,0 +1,169 @@
+import asyncio
+import sys
+import tempfile
+import types
+
+from langchain_community.vectorstores import FAISS
+from langchain_core.documents import Document
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from langchain_core.language_models import FakeListChatModel
+
+from agents.rerank_agent import CrossEncoderScorer, LexicalOverlapScorer, RerankAgent
+from orchestration.lcel_pipeline import build_agentic_rag_chain
+from vectorstore.lexical_index import BM25Index
+
+
+def _docs():
+    docs = [
+        Document(
+            id=f"filler-{i}",
+            page_content=f"meeting notes number {i} about lunch",
+            metadata={"document_type": "txt"},
+        )
+        for i in range(30)
+    ]
+    docs.append(
+        Document(
+            id="answer",
+            page_content="The model reached 91% accuracy on the test set",
+            metadata={"document_type": "txt"},
+        )
+    )
+    return docs
+
+
+def test_lexical_scorer():
+    scorer = LexicalOverlapScorer()
+    scores = scorer(
+        "test set accuracy",
+        ["accuracy on the test set", "accuracy only", "unrelated text"],
+    )
+
+    assert scores[0] > scores[1] > scores[2] == 0
+
+    # Global idf: a rare term outweighs a common one
+    index = BM25Index.build(
+        [(d.id, d.page_content, "txt") for d in _docs()]
+    )
+    scores = LexicalOverlapScorer(index)("notes accuracy", ["notes", "accuracy"])
+    assert scores[1] > scores[0]
+
+
+def test_rerank_batches_and_cache():
+    calls = []
+
+    def scorer(query, texts):
+        calls.append(len(texts))
+        return LexicalOverlapScorer()(query, texts)
+
+    agent = RerankAgent(scorer=scorer, top_n=3, batch_size=8)
+    docs = _docs()
+
+    top = agent.rerank("What accuracy did the model reach?", docs)
+    assert len(top) == 3
+    assert top[0].id == "answer"
+    assert calls == [8, 8, 8, 7]
+
+    # Same query (modulo case/whitespace): every score comes from cache
+    top = asyncio.run(agent.arerank("what accuracy  did the model reach?", docs))
+    assert top[0].id == "answer"
+    assert len(calls) == 4
+    assert agent.cache_hits == len(docs)
+
+
+def test_rerank_latency_fallback():
+    ticks = iter(range(100))
+    agent = RerankAgent(
+        top_n=4, batch_size=10, latency_budget=1.5, clock=lambda: next(ticks)
+    )
+    docs = _docs()
+
+    # The budget runs out after the first batch: vector order is kept
+    assert agent.rerank("model accuracy", docs) == docs[:4]
+    assert agent.fallbacks == 1
+
+
+def test_chain_with_reranker():
+    embeddings = DeterministicFakeEmbedding(size=16)
+    seen = []
+
+    class RecordingRerankAgent(RerankAgent):
+        def rerank(self, query, documents, top_n=None):
+            seen.append((len(documents), self.scorer.lexical_index))
+            return super().rerank(query, documents, top_n)
+
+    reranker = RecordingRerankAgent(top_n=2)
+    query = {"query": "Explain what the accuracy means"}
+
+    with tempfile.TemporaryDirectory() as old, tempfile.TemporaryDirectory() as new:
+        FAISS.from_documents(_docs(), embeddings).save_local(old)
+        FAISS.from_documents(_docs()[10:], embeddings).save_local(new)
+
+        chains = [
+            build_agentic_rag_chain(
+                faiss_dir,
+                llm=FakeListChatModel(responses=["answer"]),
+                embeddings=embeddings,
+                reranker=reranker,
+                rerank_fetch_k=20,
+            )
+            for faiss_dir in (old, new)
+        ]
+        assert chains[0].invoke(query) == "answer"
+        assert asyncio.run(chains[0].ainvoke(query)) == "answer"
+        assert chains[1].invoke(query) == "answer"
+
+        # Over-fetched candidates reach the reranker, scored with the
+        # corpus idf of each chain's own index
+        assert [count for count, _ in seen] == [20, 20, 20]
+        assert seen[0][1] is seen[1][1]
+        assert len(seen[0][1].doc_ids) == 31
+        assert len(seen[2][1].doc_ids) == 21
+
+        # The caller's reranker is not modified
+        assert reranker.scorer.lexical_index is None
+
+
+class _FakeCrossEncoder:
+    loaded = []
+
+    def __init__(self, model_name, device=None):
+        self.loaded.append((model_name, device))
+
+    def predict(self, pairs):
+        return [float("accuracy" in text) for _, text in pairs]
+
+
+def test_cross_encoder_scorer():
+    original = sys.modules.get("sentence_transformers")
+    try:
+        sys.modules["sentence_transformers"] = types.SimpleNamespace(
+            CrossEncoder=_FakeCrossEncoder
+        )
+        scorer = CrossEncoderScorer(model_name="tiny")
+        assert _FakeCrossEncoder.loaded == []
+
+        docs = RerankAgent(scorer=scorer, top_n=1).rerank("accuracy?", _docs())
+        assert [d.id for d in docs] == ["answer"]
+        assert _FakeCrossEncoder.loaded == [("tiny", "cpu")]
+
+        # Without the package the scorer fails at construction
+        sys.modules["sentence_transformers"] = None
+        try:
+            CrossEncoderScorer()
+            assert False, "expected ImportError"
+        except ImportError as e:
+            assert "sentence-transformers" in str(e)
+    finally:
+        if original is None:
+            sys.modules.pop("sentence_transformers", None)
+        else:
+            sys.modules["sentence_transformers"] = original
+
+
+if __name__ == "__main__":
+    test_lexical_scorer()
+    test_rerank_batches_and_cache()
+    test_rerank_latency_fallback()
+    test_chain_with_reranker()
+    test_cross_encoder_scorer()
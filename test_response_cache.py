@@ -0,0 +1,75 @@
+from langchain_core.embeddings import Embeddings
+
+from orchestration.response_cache import SemanticResponseCache
+
+
+class KeywordEmbedding(Embeddings):
+    """Tiny local embedder: near-identical wording -> near-identical vectors."""
+
+    VOCAB = ["accuracy", "reported", "dataset", "size", "revenue"]
+
+    def embed_query(self, text):
+        text = text.lower()
+        return [float(w in text) for w in self.VOCAB] + [0.01]
+
+    def embed_documents(self, texts):
+        return [self.embed_query(t) for t in texts]
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_response_cache():
+    clock = FakeClock()
+    cache = SemanticResponseCache(
+        embeddings=KeywordEmbedding(),
+        max_entries=2,
+        ttl_seconds=60,
+        clock=clock,
+    )
+
+    cache.put("What is the reported accuracy?", "91%", index_version="v1")
+
+    # Exact (normalized) and semantic hits
+    assert cache.get("what is the reported accuracy", index_version="v1") == "91%"
+    assert cache.get("Which accuracy was reported?", index_version="v1") == "91%"
+    assert cache.get("How large is the dataset?", index_version="v1") is None
+
+    # LRU eviction
+    cache.put("How large is the dataset?", "10k rows", index_version="v1")
+    cache.get("What is the reported accuracy?", index_version="v1")
+    cache.put("What was the revenue?", "$2M", index_version="v1")
+    assert cache.get("How large is the dataset?", index_version="v1") is None
+    assert cache.get("What is the reported accuracy?", index_version="v1") == "91%"
+
+    # TTL expiry
+    clock.now = 61
+    assert cache.get("What was the revenue?", index_version="v1") is None
+
+    # Index rebuild invalidates everything
+    cache.put("What was the revenue?", "$2M", index_version="v1")
+    assert cache.get("What was the revenue?", index_version="v2") is None
+    assert len(cache) == 0
+
+
+def test_near_duplicates_must_agree_on_terms():
+    cache = SemanticResponseCache(embeddings=KeywordEmbedding())
+    cache.put("What was the revenue in 2022?", "$2M")
+
+    # Same embedding, different year / different term: not a hit
+    assert cache.get("What was the revenue in 2023?") is None
+    assert cache.get("What was the revenue in Europe in 2022?") is None
+    assert cache.get("When was the revenue in 2022 reported?") is None
+
+    # Rewording without changing the terms still hits
+    assert cache.get("Revenue in 2022 was what?") == "$2M"
+
+
+if __name__ == "__main__":
+    test_response_cache()
+    test_near_duplicates_must_agree_on_terms()
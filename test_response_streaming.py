@@ -0,0 +1,34 @@
+from langchain_core.documents import Document
+from langchain_core.language_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage
+
+from agents.response_composition_agent import ResponseCompositionAgent
+
+
+ANSWER = "The reported accuracy of 91% is supported by the results sheet."
+
+
+def _agent():
+    llm = GenericFakeChatModel(messages=iter([AIMessage(content=ANSWER)] * 2))
+    return ResponseCompositionAgent(llm=llm)
+
+
+def test_compose_stream():
+    docs = [
+        Document(
+            page_content="accuracy: 0.91",
+            metadata={"document_type": "xlsx", "source": "results.xlsx", "section": "sheet:results"},
+        )
+    ]
+    fact_check_result = {"verdict": "SEE_RESPONSE", "analysis": "SUPPORTED"}
+
+    tokens = list(_agent().compose_stream("What is the accuracy?", docs, fact_check_result))
+
+    # Several incremental tokens that add up to the blocking answer
+    assert len(tokens) > 1
+    assert "".join(tokens) == ANSWER
+    assert _agent().compose("What is the accuracy?", docs, fact_check_result) == ANSWER
+
+
+if __name__ == "__main__":
+    test_compose_stream()
@@ -0,0 +1,111 @@
+import asyncio
+import tempfile
+from pathlib import Path
+
+from langchain_community.vectorstores import FAISS
+from langchain_core.documents import Document
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from langchain_core.language_models import FakeListChatModel
+
+from agents.rerank_agent import RerankAgent
+from agents.retrieval_agent import RetrievalAgent
+import orchestration.lcel_pipeline as lcel_pipeline
+from orchestration.lcel_pipeline import build_agentic_rag_chain
+
+
+def _vectorstore(embeddings):
+    docs = [
+        Document(
+            page_content=f"chunk {i}",
+            metadata={"document_type": "xlsx" if i % 10 == 0 else "pdf", "section": "s"},
+        )
+        for i in range(100)
+    ]
+    return FAISS.from_documents(docs, embeddings)
+
+
+def test_filter_candidates():
+    agent = RetrievalAgent(_vectorstore(DeterministicFakeEmbedding(size=16)))
+
+    # Plenty of pdf hits in the over-fetch -> exact top-k from candidates
+    candidates = agent.retrieve_candidates("chunk 3", fetch_k=50)
+    docs = agent.filter_candidates(candidates, top_k=5, allowed_doc_types=["pdf"])
+    assert docs == agent.retrieve("chunk 3", top_k=5, allowed_doc_types=["pdf"])
+
+    # Selective filter starves the over-fetch -> caller must fall back
+    candidates = agent.retrieve_candidates("chunk 3", fetch_k=8)
+    assert agent.filter_candidates(candidates, top_k=5, allowed_doc_types=["xlsx"]) is None
+
+    # Over-fetch covering the whole index is exact even if short
+    candidates = agent.retrieve_candidates("chunk 3", fetch_k=100)
+    assert len(agent.filter_candidates(candidates, top_k=50, allowed_doc_types=["xlsx"])) == 10
+
+    # A short list is accepted down to min_k
+    candidates = agent.retrieve_candidates("chunk 3", fetch_k=50)
+    docs = agent.filter_candidates(candidates, top_k=50, allowed_doc_types=["pdf"], min_k=5)
+    assert 5 <= len(docs) < 50
+
+
+def test_speculative_chain():
+    embeddings = DeterministicFakeEmbedding(size=16)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        _vectorstore(embeddings).save_local(tmp)
+
+        chain = build_agentic_rag_chain(
+            tmp,
+            llm=FakeListChatModel(responses=["answer"]),
+            embeddings=embeddings,
+            speculative=True,
+            fetch_k=20,
+        )
+
+        query = {"query": "How many rows are in the spreadsheet table?"}
+        assert chain.invoke(query) == "answer"
+        assert asyncio.run(chain.ainvoke(query)) == "answer"
+
+
+def test_speculative_chain_with_reranker_skips_fallback():
+    embeddings = DeterministicFakeEmbedding(size=16)
+    fallbacks = []
+
+    class CountingRetrievalAgent(RetrievalAgent):
+        def retrieve(self, *args, **kwargs):
+            fallbacks.append(kwargs.get("query"))
+            return super().retrieve(*args, **kwargs)
+
+        async def aretrieve(self, *args, **kwargs):
+            fallbacks.append(kwargs.get("query"))
+            return await super().aretrieve(*args, **kwargs)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        _vectorstore(embeddings).save_local(tmp)
+
+        original = lcel_pipeline.RetrievalAgent
+        lcel_pipeline.RetrievalAgent = CountingRetrievalAgent
+        try:
+            chain = build_agentic_rag_chain(
+                tmp,
+                llm=FakeListChatModel(responses=["answer"]),
+                embeddings=embeddings,
+                speculative=True,
+                fetch_k=50,
+                reranker=RerankAgent(top_n=5),
+                rerank_fetch_k=50,
+                hybrid_query_types=(),
+            )
+        finally:
+            lcel_pipeline.RetrievalAgent = original
+
+        # Routed to pdf/docx/pptx: ~45 of the 50 candidates survive,
+        # plenty for the reranker's top 5
+        query = {"query": "Summarize the research paper findings"}
+        assert chain.invoke(query) == "answer"
+        assert asyncio.run(chain.ainvoke(query)) == "answer"
+        assert fallbacks == []
+
+
+if __name__ == "__main__":
+    test_filter_candidates()
+    test_speculative_chain()
+    test_speculative_chain_with_reranker_skips_fallback()
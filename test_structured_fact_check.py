@@ -0,0 +1,114 @@
+import json
+import tempfile
+
+from langchain_community.vectorstores import FAISS
+from langchain_core.documents import Document
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from langchain_core.language_models import FakeListChatModel
+from langchain_core.runnables import RunnableLambda
+
+from agents.fact_check_agent import FactCheckAgent
+from agents.response_composition_agent import ResponseCompositionAgent
+from orchestration.agent_orchestrator import _compose_final_response
+from orchestration.lcel_pipeline import build_agentic_rag_chain
+
+
+DOCS = [
+    Document(page_content="Accuracy was 91%.", metadata={"source": "a.pdf", "document_type": "pdf", "section": "page_1"}),
+    Document(page_content="The lab moved in 2020.", metadata={"source": "b.pdf", "document_type": "pdf", "section": "page_4"}),
+]
+
+VERDICT = {
+    "verdict": "supported",
+    "confidence": "high",
+    "justification": "Evidence 1 states 91%.",
+    "analysis": "Evidence 1 reports 91% accuracy on the test set; evidence 2 is about the lab.",
+    "evidence": [{"id": 1, "label": "SUPPORTS"}, {"id": 2, "label": "IRRELEVANT"}],
+}
+
+
+class StructuredFakeChatModel(FakeListChatModel):
+    """Fake model with native structured output."""
+
+    def with_structured_output(self, schema, **kwargs):
+        verdict = schema(**{**VERDICT, "verdict": "SUPPORTED", "confidence": "High"})
+        return RunnableLambda(lambda _: verdict)
+
+
+def test_parsed_json_verdict():
+    agent = FactCheckAgent(llm=FakeListChatModel(responses=[json.dumps(VERDICT)]))
+    assert agent.structured_llm is None
+
+    result = agent.check("What was the accuracy?", DOCS)
+
+    assert result["verdict"] == "SUPPORTED"
+    assert result["confidence"] == "High"
+    assert [e["label"] for e in result["evidence"]] == ["SUPPORTS", "IRRELEVANT"]
+    assert result["sources"][0]["source"] == "a.pdf"
+
+    # The composer sees the structured verdict and cites relevant evidence only
+    inputs = ResponseCompositionAgent(llm=FakeListChatModel(responses=["x"]))._prompt_inputs(
+        "What was the accuracy?", DOCS, result
+    )
+    assert inputs["analysis"].startswith("Verdict: SUPPORTED (confidence: High)")
+    assert "91% accuracy on the test set" in inputs["analysis"]
+    assert "a.pdf" in inputs["sources"] and "b.pdf" not in inputs["sources"]
+
+
+def test_native_structured_output():
+    agent = FactCheckAgent(llm=StructuredFakeChatModel(responses=["unused"]))
+    assert agent.structured_llm is not None
+
+    result = agent.check("What was the accuracy?", DOCS)
+    assert result["verdict"] == "SUPPORTED"
+    assert result["evidence"][1]["label"] == "IRRELEVANT"
+    assert result["analysis"] == VERDICT["analysis"]
+    assert result["justification"] == VERDICT["justification"]
+
+
+def test_unstructured_reply_is_kept():
+    for reply in ["Looks supported to me.", json.dumps({"verdict": "MAYBE"})]:
+        result = FactCheckAgent(llm=FakeListChatModel(responses=[reply])).check("q", DOCS)
+        assert result["verdict"] == "UNKNOWN"
+        assert result["analysis"] == reply
+
+
+def test_insufficient_evidence_skips_composition():
+    embeddings = DeterministicFakeEmbedding(size=16)
+    insufficient = json.dumps(
+        {"verdict": "INSUFFICIENT_EVIDENCE", "confidence": "Low", "justification": "Off topic."}
+    )
+
+    with tempfile.TemporaryDirectory() as tmp:
+        FAISS.from_documents(DOCS, embeddings).save_local(tmp)
+
+        llm = FakeListChatModel(responses=[insufficient, "composed"])
+        chain = build_agentic_rag_chain(tmp, llm=llm, embeddings=embeddings)
+
+        answer = chain.invoke({"query": "Explain the research findings"})
+        assert answer.startswith("I could not find enough evidence")
+        assert "Off topic." in answer
+        assert llm.i == 1
+
+        # Nothing routed at all: no LLM call
+        llm = FakeListChatModel(responses=["unused"] * 2)
+        chain = build_agentic_rag_chain(tmp, llm=llm, embeddings=embeddings)
+        chain.invoke({"query": "How many rows are in the spreadsheet table?"})
+        assert llm.i == 0
+
+
+def test_orchestrator_composition():
+    composer = ResponseCompositionAgent(llm=FakeListChatModel(responses=["final"]))
+
+    assert _compose_final_response("q", DOCS, {**VERDICT, "verdict": "SUPPORTED", "evidence": []}, composer) == "final"
+    assert _compose_final_response(
+        "q", [], FactCheckAgent._no_evidence_result(), composer
+    ).startswith("I could not find enough evidence")
+
+
+if __name__ == "__main__":
+    test_parsed_json_verdict()
+    test_native_structured_output()
+    test_unstructured_reply_is_kept()
+    test_insufficient_evidence_skips_composition()
+    test_orchestrator_composition()
@@ -0,0 +1,108 @@
+import re
+import tempfile
+import zipfile
+from pathlib import Path
+
+from openpyxl import Workbook
+
+from benchmarks.fakes import FakeEmbeddings
+from ingestion.csv_ingestor import CsvIngestor
+from ingestion.excel_ingestor import ExcelIngestor
+from ingestion.ingestion_pipeline import IngestionPipeline
+from ingestion.table_chunking import row_window_documents
+from vectorstore.faiss_loader import load_faiss_index
+
+
+def _write_xlsx(path, n_rows):
+    workbook = Workbook()
+    sheet = workbook.active
+    sheet.title = "results"
+    sheet.append(["site", "metric", "value"])
+    for i in range(n_rows):
+        sheet.append([f"site {i}", "yield", 10.0 + i])
+
+    workbook.create_sheet("empty")
+    workbook.save(path)
+
+
+def test_row_windows():
+    rows = [["a", "b"], [1.0, None], [], ["x", 2.5], ["y", "z"]]
+    docs = list(row_window_documents(rows, {"source": "t"}, "t", rows_per_chunk=2))
+
+    assert [d.metadata["row_start"] for d in docs] == [2, 5]
+    assert [d.metadata["row_end"] for d in docs] == [4, 5]
+    assert docs[0].page_content == "t (rows 2-4)\na | b\n1\nx | 2.5"
+    assert docs[1].page_content.splitlines()[1] == "a | b"
+
+    # The character budget closes a window early
+    docs = list(row_window_documents(rows, {}, "t", rows_per_chunk=10, max_chars=4))
+    assert len(docs) == 3
+
+
+def test_excel_and_csv_share_row_chunking():
+    with tempfile.TemporaryDirectory() as tmp:
+        data = Path(tmp) / "data"
+        (data / "excels").mkdir(parents=True)
+        (data / "csv").mkdir()
+
+        _write_xlsx(data / "excels" / "sites.xlsx", 45)
+        (data / "csv" / "sites.csv").write_text(
+            "site;metric;value\n" + "".join(f"site {i};margin;{i}\n" for i in range(30))
+        )
+
+        docs = list(ExcelIngestor(data / "excels").ingest_file(data / "excels" / "sites.xlsx"))
+        assert [(d.metadata["row_start"], d.metadata["row_end"]) for d in docs] == [
+            (2, 21), (22, 41), (42, 46)
+        ]
+        assert all(d.page_content.splitlines()[1] == "site | metric | value" for d in docs)
+        assert "site 44 | yield | 54" in docs[-1].page_content
+        assert docs[0].metadata["section"] == "sheet:results"
+
+        docs = list(CsvIngestor(data / "csv").ingest_file(data / "csv" / "sites.csv"))
+        assert docs[0].metadata["document_type"] == "csv"
+        assert docs[0].page_content.splitlines()[1] == "site | metric | value"
+        assert [d.metadata["row_end"] for d in docs] == [21, 31]
+
+        # Row windows are indexed as-is, not re-split by the text splitter
+        embeddings = FakeEmbeddings(size=64)
+        faiss_dir = str(Path(tmp) / "index")
+        IngestionPipeline(
+            data_dir=str(data), faiss_dir=faiss_dir, embeddings=embeddings
+        ).run()
+
+        store = load_faiss_index(faiss_dir, embeddings=embeddings)
+        assert store.index.ntotal == 5
+
+        for doc_id in store.index_to_docstore_id.values():
+            doc = store.docstore.search(doc_id)
+            assert doc.page_content.splitlines()[1] == "site | metric | value"
+            assert doc.metadata["row_end"] >= doc.metadata["row_start"]
+
+
+def test_excel_with_wrong_dimension_record():
+    with tempfile.TemporaryDirectory() as tmp:
+        written = Path(tmp) / "written.xlsx"
+        path = Path(tmp) / "exported.xlsx"
+        _write_xlsx(written, 50)
+
+        # Rewrite the sheet's size record as "A1", as some exporters do
+        with zipfile.ZipFile(written) as src, zipfile.ZipFile(path, "w") as dst:
+            for item in src.infolist():
+                data = src.read(item.filename)
+                if item.filename == "xl/worksheets/sheet1.xml":
+                    data = re.sub(rb'<dimension ref="[^"]*"', b'<dimension ref="A1"', data)
+                    assert b'<dimension ref="A1"' in data
+                dst.writestr(item, data)
+
+        docs = list(ExcelIngestor(Path(tmp)).ingest_file(path))
+
+        assert [(d.metadata["row_start"], d.metadata["row_end"]) for d in docs] == [
+            (2, 21), (22, 41), (42, 51)
+        ]
+        assert "site 49 | yield | 59" in docs[-1].page_content
+
+
+if __name__ == "__main__":
+    test_row_windows()
+    test_excel_and_csv_share_row_chunking()
+    test_excel_with_wrong_dimension_record()
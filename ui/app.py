@@ -8,8 +8,10 @@ import streamlit as st
 PROJECT_ROOT = Path(__file__).resolve().parents[1]
 sys.path.append(str(PROJECT_ROOT))
 
-from ingestion.ingestion_pipeline import IngestionPipeline
+from orchestration.index_manager import IndexManager
 from orchestration.lcel_pipeline import build_agentic_rag_chain
+from orchestration.response_cache import SemanticResponseCache
+from vectorstore.embedding_cache import build_embeddings
 
 
 # Page Config
@@ -24,25 +26,45 @@ st.title("EvidenceGPT")
 st.caption("Multi-Agent RAG Validator : View knowledge through verified sources")
 
 
+# Shared response cache (one per server process, across sessions)
+
+@st.cache_resource
+def get_response_cache():
+    return SemanticResponseCache(embeddings=build_embeddings())
+
+
+# Live index + background rebuilds, one per server process: every session
+# shares the loaded index and chain of each version. Queries are served
+# from the previous version until a rebuild is published
+
+@st.cache_resource
+def get_index_manager():
+    return IndexManager(
+        "vectorstore/faiss_index",
+        data_dir=str(PROJECT_ROOT / "data"),
+        build_chain=lambda faiss_dir: build_agentic_rag_chain(
+            faiss_dir,
+            response_cache=get_response_cache(),
+        ),
+    )
+
+
+index_manager = get_index_manager()
+
+
 # Session State (CRITICAL)
 
 if "chat_history" not in st.session_state:
     st.session_state.chat_history = []
 
-if "index_ready" not in st.session_state:
-    st.session_state.index_ready = False
-
-if "agentic_rag_chain" not in st.session_state:
-    st.session_state.agentic_rag_chain = None
-
 
 # Sidebar: File Upload
 
 st.sidebar.header("📂 Upload Research Files")
 
 uploaded_files = st.sidebar.file_uploader(
-    "Upload files (PDF, DOCX, PPTX, XLSX, TXT)",
-    type=["pdf", "docx", "pptx", "xlsx", "txt"],
+    "Upload files (PDF, DOCX, PPTX, XLSX, CSV, TXT)",
+    type=["pdf", "docx", "pptx", "xlsx", "csv", "txt"],
     accept_multiple_files=True
 )
 
@@ -57,6 +79,7 @@ def save_uploaded_file(uploaded_file):
         "docx": "docx",
         "pptx": "ppts",
         "xlsx": "excels",
+        "csv": "csv",
         "txt": "texts",
     }
 
@@ -80,20 +103,46 @@ if uploaded_files:
 
     st.sidebar.success("Files uploaded successfully!")
 
+force_rebuild = st.sidebar.checkbox(
+    "Force full rebuild",
+    help="Re-embed every file instead of only new or changed ones."
+)
+
 if st.sidebar.button("🔄 Rebuild Knowledge Index"):
-    with st.spinner("Running ingestion pipeline..."):
-        pipeline = IngestionPipeline(
-            faiss_dir="vectorstore/faiss_index"
+    if not index_manager.start_rebuild(force_rebuild=force_rebuild):
+        st.sidebar.info("A rebuild is already running.")
+
+
+# Rebuild progress (polled; the rest of the page stays interactive)
+
+@st.fragment(run_every=1.0)
+def rebuild_status():
+    status = index_manager.status()
+    state = status["state"]
+
+    if state == "running":
+        stage = status.get("stage", "")
+        done = status.get("files_done", 0)
+        total = status.get("files_total", 0)
+
+        # Parsing and embedding are interleaved batch by batch
+        st.progress(
+            done / total if total and stage != "scan" else 0.0,
+            text=(
+                f"{stage.capitalize()}: {done}/{total} files, "
+                f"{status.get('chunks', 0)} chunks embedded"
+            ),
         )
-        pipeline.run()
 
-    # rebuild LCEL chain AFTER ingestion
-    st.session_state.agentic_rag_chain = build_agentic_rag_chain(
-        "vectorstore/faiss_index"
-    )
+        st.caption("Queries are answered from the current index meanwhile.")
+    elif state == "succeeded":
+        st.success(f"Index version {status['version']} is live.")
+    elif state == "failed":
+        st.error(f"Rebuild failed: {status['error']}")
 
-    st.session_state.index_ready = True
-    st.sidebar.success("FAISS index rebuilt successfully!")
+
+with st.sidebar:
+    rebuild_status()
 
 
 # Display Chat History
@@ -116,16 +165,19 @@ if user_query:
         st.markdown(user_query)
 
     with st.chat_message("assistant"):
-        if not st.session_state.index_ready or st.session_state.agentic_rag_chain is None:
-            st.warning(" Please upload files and rebuild the index first.")
-        else:
-            with st.spinner("🔍 Analyzing documents..."):
-                result = st.session_state.agentic_rag_chain.invoke(
-                    {"query": user_query}
+        # The lease keeps this version loaded until the answer is done,
+        # even if a rebuild swaps it out mid-stream
+        with index_manager.lease() as chain:
+            if chain is None:
+                st.warning(" Please upload files and rebuild the index first.")
+            else:
+                # Render tokens as they arrive instead of after the full answer
+                result = st.write_stream(
+                    chain.stream(
+                        {"query": user_query}
+                    )
                 )
 
-                st.markdown(result)
-
                 st.session_state.chat_history.append(
                     {"role": "assistant", "content": result}
                 )
@@ -0,0 +1,68 @@
+import hashlib
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from langchain_core.utils.json import parse_json_markdown
+
+
+def file_sha256(path: Path, block_size: int = 1 << 20) -> str:
+    """
+    Returns the SHA-256 hex digest of a file, read in blocks
+    so large uploads never sit in memory at once.
+    """
+    digest = hashlib.sha256()
+
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+
+    return digest.hexdigest()
+
+
+_ENCODING = None
+_ENCODING_FAILED = False
+
+
+def count_tokens(text: str, encoding_name: str = "cl100k_base") -> int:
+    """
+    Counts tokens with tiktoken.
+
+    Falls back to a ~4 characters/token estimate when the encoding
+    cannot be loaded (e.g. air-gapped machines without a tiktoken cache).
+    """
+    global _ENCODING, _ENCODING_FAILED
+
+    if _ENCODING is None and not _ENCODING_FAILED:
+        try:
+            import tiktoken
+            _ENCODING = tiktoken.get_encoding(encoding_name)
+        except Exception:
+            _ENCODING_FAILED = True
+
+    if _ENCODING is not None:
+        return len(_ENCODING.encode(text, disallowed_special=()))
+
+    return max(1, len(text) // 4)
+
+
+def token_counter() -> str:
+    """
+    Which counter `count_tokens` uses: the tiktoken encoding name, or
+    "estimate" for the characters/token fallback.
+    """
+    count_tokens("")
+    return _ENCODING.name if _ENCODING is not None else "estimate"
+
+
+def parse_llm_json(text: str) -> Optional[Dict[str, Any]]:
+    """
+    Parses a JSON object from LLM output, tolerating ```json fences and
+    output that is still streaming (unterminated strings / brackets).
+    Returns None if the text is not a JSON object.
+    """
+    try:
+        value = parse_json_markdown(text)
+    except ValueError:
+        return None
+
+    return value if isinstance(value, dict) else None
@@ -0,0 +1,462 @@
+import json
+import logging
+import os
+import re
+import sys
+import threading
+import time
+from collections import deque
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from uuid import UUID
+
+import numpy as np
+from langchain_core.callbacks import BaseCallbackHandler
+
+from utils.helpers import count_tokens
+
+
+QUANTILES = (0.5, 0.95, 0.99)
+
+_LOGGER_NAME = "rag"
+
+
+# Structured logs
+
+class JsonFormatter(logging.Formatter):
+    """
+    One JSON object per line: timestamp, level, logger, event name and
+    the fields passed to `log_event`.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            "ts": round(record.created, 6),
+            "level": record.levelname,
+            "logger": record.name,
+            "event": record.getMessage(),
+            **getattr(record, "fields", {}),
+        }
+        return json.dumps(payload, default=str)
+
+
+def get_logger(name: str = _LOGGER_NAME) -> logging.Logger:
+    return logging.getLogger(name)
+
+
+def configure_logging(level: str = "INFO", stream=None) -> logging.Logger:
+    """
+    Sends the "rag" logger to `stream` (stderr by default) as JSON
+    lines. Without this, trace events stay silent (INFO is below
+    Python's default threshold).
+    """
+    logger = get_logger()
+    logger.setLevel(level)
+
+    if not any(getattr(h, "_rag_json", False) for h in logger.handlers):
+        handler = logging.StreamHandler(stream or sys.stderr)
+        handler.setFormatter(JsonFormatter())
+        handler._rag_json = True
+        logger.addHandler(handler)
+
+    return logger
+
+
+def log_event(event: str, level: int = logging.INFO, **fields: Any):
+    logger = get_logger()
+    if logger.isEnabledFor(level):
+        logger.log(level, event, extra={"fields": fields})
+
+
+# Metrics
+
+_METRIC_NAME_RE = re.compile(r"[^a-zA-Z0-9_]")
+
+
+class StageMetrics:
+    """
+    Thread-safe per-stage registry of latencies and counters.
+
+    Count and sum of latencies are exact; percentiles are computed over
+    the last `window` observations of each stage.
+    """
+
+    def __init__(self, window: int = 10_000):
+        self.window = window
+        self._lock = threading.Lock()
+
+        self._latencies: Dict[str, deque] = {}
+        self._count: Dict[str, int] = {}
+        self._sum: Dict[str, float] = {}
+        # (counter name, stage) -> total
+        self._counters: Dict[Tuple[str, str], float] = {}
+
+    def observe(self, stage: str, seconds: float, **counters: float):
+        with self._lock:
+            if stage not in self._latencies:
+                self._latencies[stage] = deque(maxlen=self.window)
+                self._count[stage] = 0
+                self._sum[stage] = 0.0
+
+            self._latencies[stage].append(seconds)
+            self._count[stage] += 1
+            self._sum[stage] += seconds
+
+            self._add(stage, counters)
+
+    def increment(self, stage: str, **counters: float):
+        with self._lock:
+            self._add(stage, counters)
+
+    def _add(self, stage: str, counters: Dict[str, float]):
+        for name, value in counters.items():
+            key = (name, stage)
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def reset(self):
+        with self._lock:
+            self._latencies.clear()
+            self._count.clear()
+            self._sum.clear()
+            self._counters.clear()
+
+    def percentiles(self, stage: str) -> Dict[float, float]:
+        with self._lock:
+            values = list(self._latencies.get(stage, ()))
+
+        return _quantiles(values)
+
+    def counter(self, stage: str, name: str) -> float:
+        with self._lock:
+            return self._counters.get((name, stage), 0)
+
+    def _snapshot(self):
+        with self._lock:
+            return (
+                {stage: list(values) for stage, values in self._latencies.items()},
+                dict(self._count),
+                dict(self._sum),
+                dict(self._counters),
+            )
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """
+        {stage: {"count", "sum", "p50", "p95", "p99", <counters>}}
+        """
+        latencies, count, total, counters = self._snapshot()
+
+        result: Dict[str, Dict[str, float]] = {}
+        for stage in sorted(set(count) | {stage for _, stage in counters}):
+            row = {"count": count.get(stage, 0), "sum": total.get(stage, 0.0)}
+            for q, value in _quantiles(latencies.get(stage, ())).items():
+                row[f"p{int(q * 100)}"] = value
+            result[stage] = row
+
+        for (name, stage), value in counters.items():
+            result[stage][name] = value
+
+        return result
+
+    def to_prometheus(self, prefix: str = "rag") -> str:
+        """
+        Prometheus text exposition format: a latency summary with
+        p50/p95/p99 per stage, plus one counter per recorded name.
+        """
+        latencies, count, total, counters = self._snapshot()
+
+        latency = f"{prefix}_stage_latency_seconds"
+        lines = [
+            f"# HELP {latency} Wall time of each pipeline stage.",
+            f"# TYPE {latency} summary",
+        ]
+
+        for stage in sorted(count):
+            label = _label(stage)
+            for q, value in _quantiles(latencies[stage]).items():
+                lines.append(f'{latency}{{stage="{label}",quantile="{q}"}} {value:.6f}')
+            lines.append(f'{latency}_sum{{stage="{label}"}} {total[stage]:.6f}')
+            lines.append(f'{latency}_count{{stage="{label}"}} {count[stage]}')
+
+        by_name: Dict[str, List[Tuple[str, float]]] = {}
+        for (name, stage), value in sorted(counters.items()):
+            by_name.setdefault(name, []).append((stage, value))
+
+        for name, rows in by_name.items():
+            metric = f"{prefix}_{_METRIC_NAME_RE.sub('_', name)}_total"
+            lines.append(f"# TYPE {metric} counter")
+            for stage, value in rows:
+                lines.append(f'{metric}{{stage="{_label(stage)}"}} {value:g}')
+
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path: str, prefix: str = "rag"):
+        """
+        Writes the metrics for a node_exporter textfile collector.
+        The file is replaced atomically, so scrapers never see half of it.
+        """
+        path = Path(path)
+        tmp = path.with_name(path.name + ".tmp")
+        tmp.write_text(self.to_prometheus(prefix))
+        os.replace(tmp, path)
+
+
+def _quantiles(values) -> Dict[float, float]:
+    if not len(values):
+        return {q: 0.0 for q in QUANTILES}
+
+    return dict(
+        zip(QUANTILES, np.quantile(np.asarray(values, dtype=np.float64), QUANTILES).tolist())
+    )
+
+
+def _label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"')
+
+
+# Process-wide registry used by the chain and the ingestion pipeline
+METRICS = StageMetrics()
+
+
+# Stage tracing
+
+class StageTracer(BaseCallbackHandler):
+    """
+    LangChain callback handler that times the named stages of a chain.
+
+    For every run whose name is in `stages` it records wall time,
+    retrieved chunk counts and the stage's key outputs (query type,
+    verdict), and attributes the prompt / completion tokens of every
+    LLM call made inside the stage to it. Tokens come from the
+    provider's usage report when present, otherwise they are counted
+    locally.
+
+    Attach one tracer to the chain for process-wide metrics; attach a
+    fresh tracer (with `metrics=None`) per call to collect that
+    request's numbers in `timings` / `fields`.
+    """
+
+    run_inline = True
+
+    def __init__(
+        self,
+        stages: Iterable[str],
+        metrics: Optional[StageMetrics] = None,
+        log: bool = False,
+        request_id: Optional[str] = None,
+    ):
+        self.stages = frozenset(stages)
+        self.metrics = metrics
+        self.log = log
+        self.request_id = request_id
+
+        self._lock = threading.Lock()
+        # run id -> stage it belongs to
+        self._stage_of: Dict[UUID, str] = {}
+        # stage run id -> start time
+        self._started: Dict[UUID, float] = {}
+        self._prompt_tokens: Dict[UUID, int] = {}
+
+        self.timings: Dict[str, float] = {}
+        self.fields: Dict[str, Any] = {"prompt_tokens": 0, "completion_tokens": 0}
+
+    # Run bookkeeping
+
+    def on_chain_start(
+        self,
+        serialized: Optional[Dict[str, Any]],
+        inputs: Any,
+        *,
+        run_id: UUID,
+        parent_run_id: Optional[UUID] = None,
+        **kwargs: Any,
+    ):
+        name = kwargs.get("name")
+
+        with self._lock:
+            parent_stage = self._stage_of.get(parent_run_id)
+
+            if parent_stage is None and name in self.stages:
+                self._stage_of[run_id] = name
+                self._started[run_id] = time.perf_counter()
+            elif parent_stage is not None:
+                self._stage_of[run_id] = parent_stage
+
+    def on_chain_end(self, outputs: Any, *, run_id: UUID, **kwargs: Any):
+        self._finish(run_id, outputs)
+
+    def on_chain_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any):
+        self._finish(run_id, None, error)
+
+    def on_custom_event(self, name: str, data: Any, *, run_id: UUID, **kwargs: Any):
+        # Stages that produce a verdict without a fact_check output
+        # (the single-call answer) report it as a custom event
+        if name != "fact_check_result":
+            return
+
+        fields = _stage_fields({"fact_check_result": data})
+
+        with self._lock:
+            self.fields.update(fields)
+
+        if self.log and fields:
+            if self.request_id is not None:
+                fields["request_id"] = self.request_id
+            log_event("verdict", **fields)
+
+    def _finish(self, run_id: UUID, outputs: Any, error: Optional[BaseException] = None):
+        with self._lock:
+            start = self._started.pop(run_id, None)
+            stage = self._stage_of.pop(run_id, None)
+
+        if start is None:
+            return
+
+        seconds = time.perf_counter() - start
+        fields = _stage_fields(outputs)
+
+        with self._lock:
+            self.timings[stage] = self.timings.get(stage, 0.0) + seconds
+            self.fields.update(fields)
+            if error is not None:
+                self.fields["error"] = f"{stage}: {error!r}"
+
+        if self.metrics is not None:
+            counters = {"chunks": fields["chunks"]} if "chunks" in fields else {}
+            if error is not None:
+                counters["errors"] = 1
+            self.metrics.observe(stage, seconds, **counters)
+
+        if self.log:
+            if self.request_id is not None:
+                fields["request_id"] = self.request_id
+            if error is not None:
+                fields["error"] = repr(error)
+
+            log_event(
+                "stage",
+                level=logging.WARNING if error is not None else logging.INFO,
+                stage=stage,
+                seconds=round(seconds, 6),
+                **fields,
+            )
+
+    # LLM token accounting
+
+    def _llm_start(self, run_id: UUID, parent_run_id: Optional[UUID], tokens: int):
+        with self._lock:
+            stage = self._stage_of.get(parent_run_id)
+            if stage is not None:
+                self._stage_of[run_id] = stage
+                self._prompt_tokens[run_id] = tokens
+
+    def on_llm_start(
+        self,
+        serialized: Optional[Dict[str, Any]],
+        prompts: List[str],
+        *,
+        run_id: UUID,
+        parent_run_id: Optional[UUID] = None,
+        **kwargs: Any,
+    ):
+        self._llm_start(run_id, parent_run_id, sum(count_tokens(p) for p in prompts))
+
+    def on_chat_model_start(
+        self,
+        serialized: Optional[Dict[str, Any]],
+        messages: List[List[Any]],
+        *,
+        run_id: UUID,
+        parent_run_id: Optional[UUID] = None,
+        **kwargs: Any,
+    ):
+        self._llm_start(
+            run_id,
+            parent_run_id,
+            sum(
+                count_tokens(m.content if isinstance(m.content, str) else str(m.content))
+                for batch in messages
+                for m in batch
+            ),
+        )
+
+    def on_llm_end(self, response: Any, *, run_id: UUID, **kwargs: Any):
+        with self._lock:
+            stage = self._stage_of.pop(run_id, None)
+            estimated_prompt = self._prompt_tokens.pop(run_id, 0)
+
+        if stage is None:
+            return
+
+        prompt, completion = _token_usage(response)
+        if prompt is None:
+            prompt = estimated_prompt
+            completion = sum(
+                count_tokens(gen.text)
+                for generations in response.generations
+                for gen in generations
+            )
+
+        with self._lock:
+            self.fields["prompt_tokens"] += prompt
+            self.fields["completion_tokens"] += completion
+
+        if self.metrics is not None:
+            self.metrics.increment(
+                stage,
+                llm_calls=1,
+                prompt_tokens=prompt,
+                completion_tokens=completion,
+            )
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any):
+        with self._lock:
+            self._stage_of.pop(run_id, None)
+            self._prompt_tokens.pop(run_id, None)
+
+
+def _token_usage(response: Any) -> Tuple[Optional[int], Optional[int]]:
+    """
+    (prompt, completion) tokens reported by the provider, or (None, None).
+    """
+    prompt = completion = 0
+    found = False
+
+    for generations in response.generations:
+        for gen in generations:
+            usage = getattr(getattr(gen, "message", None), "usage_metadata", None)
+            if usage:
+                prompt += usage.get("input_tokens", 0)
+                completion += usage.get("output_tokens", 0)
+                found = True
+
+    if found:
+        return prompt, completion
+
+    usage = (response.llm_output or {}).get("token_usage")
+    if usage:
+        return usage.get("prompt_tokens", 0), usage.get("completion_tokens", 0)
+
+    return None, None
+
+
+def _stage_fields(outputs: Any) -> Dict[str, Any]:
+    """
+    Loggable summary of a chain stage's output state.
+    """
+    if not isinstance(outputs, dict):
+        return {}
+
+    fields = {}
+
+    if "query_type" in outputs:
+        fields["query_type"] = outputs["query_type"]
+
+    if isinstance(outputs.get("documents"), list):
+        fields["chunks"] = len(outputs["documents"])
+
+    result = outputs.get("fact_check_result")
+    if isinstance(result, dict):
+        fields["verdict"] = result.get("verdict")
+        fields["confidence"] = result.get("confidence")
+
+    return fields
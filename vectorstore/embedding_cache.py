@@ -0,0 +1,222 @@
+import hashlib
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from langchain_openai import OpenAIEmbeddings
+
+
+DEFAULT_CACHE_PATH = "vectorstore/embedding_cache.sqlite"
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Content-addressed, size-bounded embedding cache backed by SQLite.
+
+    Vectors are keyed by SHA-256(model name + text), so identical chunk
+    text and repeated queries are only sent to the provider once.
+    When the cache grows past `max_entries`, the least recently used
+    vectors are evicted.
+    """
+
+    # SQLite caps the number of bound parameters per statement
+    _LOOKUP_BATCH = 500
+
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        cache_path: str = DEFAULT_CACHE_PATH,
+        max_entries: int = 500_000,
+        model_name: Optional[str] = None,
+    ):
+        self.embeddings = embeddings
+        self.max_entries = max_entries
+        self.model_name = model_name or getattr(
+            embeddings, "model", type(embeddings).__name__
+        )
+
+        Path(cache_path).parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(cache_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS embeddings (
+                key TEXT PRIMARY KEY,
+                vector BLOB NOT NULL,
+                last_access REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_last_access "
+            "ON embeddings(last_access)"
+        )
+        self._conn.commit()
+
+        # Running row count, so stores need not COUNT(*) the table
+        (self._count,) = self._conn.execute(
+            "SELECT COUNT(*) FROM embeddings"
+        ).fetchone()
+
+        self.hits = 0
+        self.misses = 0
+
+    def _key(self, text: str, kind: str = "document") -> str:
+        # Queries get their own namespace: some embedders encode
+        # queries differently from documents
+        return hashlib.sha256(
+            f"{self.model_name}\0{kind}\0{text}".encode("utf-8")
+        ).hexdigest()
+
+    def _lookup(self, keys: List[str]) -> Dict[str, List[float]]:
+        found: Dict[str, List[float]] = {}
+        now = time.time()
+
+        with self._lock:
+            for start in range(0, len(keys), self._LOOKUP_BATCH):
+                batch = keys[start:start + self._LOOKUP_BATCH]
+                placeholders = ",".join("?" * len(batch))
+
+                rows = self._conn.execute(
+                    f"SELECT key, vector FROM embeddings "
+                    f"WHERE key IN ({placeholders})",
+                    batch,
+                ).fetchall()
+
+                for key, blob in rows:
+                    found[key] = np.frombuffer(blob, dtype=np.float32).tolist()
+
+                self._conn.execute(
+                    f"UPDATE embeddings SET last_access = ? "
+                    f"WHERE key IN ({placeholders})",
+                    [now, *batch],
+                )
+
+            self._conn.commit()
+
+        return found
+
+    def _store(self, vectors: Dict[str, List[float]]):
+        now = time.time()
+
+        with self._lock:
+            # Keys are content hashes: a key stored meanwhile (by another
+            # thread) already holds the same vector, so only new rows count
+            cursor = self._conn.executemany(
+                "INSERT OR IGNORE INTO embeddings (key, vector, last_access) "
+                "VALUES (?, ?, ?)",
+                [
+                    (key, np.asarray(vector, dtype=np.float32).tobytes(), now)
+                    for key, vector in vectors.items()
+                ],
+            )
+            self._count += max(cursor.rowcount, 0)
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self):
+        overflow = self._count - self.max_entries
+        if overflow > 0:
+            cursor = self._conn.execute(
+                "DELETE FROM embeddings WHERE key IN ("
+                "SELECT key FROM embeddings ORDER BY last_access LIMIT ?)",
+                (overflow,),
+            )
+            self._count -= cursor.rowcount
+
+    def _embed(
+        self,
+        texts: List[str],
+        kind: str,
+        embed: Callable[[List[str]], List[List[float]]],
+    ) -> List[List[float]]:
+        keys = [self._key(t, kind=kind) for t in texts]
+        cached = self._lookup(list(dict.fromkeys(keys)))
+
+        # Embed each missing text once, even if repeated in the batch
+        missing: Dict[str, str] = {}
+        for key, text in zip(keys, texts):
+            if key not in cached:
+                missing.setdefault(key, text)
+
+        self.hits += sum(1 for k in keys if k in cached)
+        self.misses += len(missing)
+
+        if missing:
+            new_vectors = embed(list(missing.values()))
+            fresh = dict(zip(missing.keys(), new_vectors))
+            self._store(fresh)
+            cached.update(fresh)
+
+        return [cached[k] for k in keys]
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self._embed(texts, "document", self.embeddings.embed_documents)
+
+    def embed_queries(self, texts: List[str]) -> List[List[float]]:
+        """
+        Batched `embed_query`: cached in the query namespace, with the
+        misses embedded in one upstream request where the embedder
+        allows it (see `embed_queries`).
+        """
+        return self._embed(
+            texts, "query", lambda missing: embed_queries(self.embeddings, missing)
+        )
+
+    def embed_query(self, text: str) -> List[float]:
+        key = self._key(text, kind="query")
+        cached = self._lookup([key])
+
+        if key in cached:
+            self.hits += 1
+            return cached[key]
+
+        self.misses += 1
+        vector = self.embeddings.embed_query(text)
+        self._store({key: vector})
+
+        return vector
+
+
+def embed_queries(embeddings: Embeddings, texts: List[str]) -> List[List[float]]:
+    """
+    Query vectors for several texts at once.
+
+    Uses the embedder's own `embed_queries` if it has one. OpenAI
+    embeds queries and documents alike, so its queries go out as one
+    `embed_documents` request; other embedders may encode queries
+    differently and get one `embed_query` call per text.
+    """
+    if hasattr(embeddings, "embed_queries"):
+        return embeddings.embed_queries(texts)
+
+    if isinstance(embeddings, OpenAIEmbeddings):
+        return embeddings.embed_documents(texts)
+
+    return [embeddings.embed_query(t) for t in texts]
+
+
+def build_embeddings(
+    cache_path: Optional[str] = DEFAULT_CACHE_PATH,
+    max_entries: int = 500_000,
+) -> Embeddings:
+    """
+    Returns the embedder shared by ingestion and query paths.
+
+    Pass `cache_path=None` to disable caching.
+    """
+    embeddings = OpenAIEmbeddings()
+
+    if cache_path is None:
+        return embeddings
+
+    return CachedEmbeddings(
+        embeddings,
+        cache_path=cache_path,
+        max_entries=max_entries,
+    )
@@ -1,10 +1,75 @@
+import pickle
+from pathlib import Path
+from typing import Optional
+
+import faiss
+from langchain_core.embeddings import Embeddings
 from langchain_community.vectorstores import FAISS
-from langchain_openai import OpenAIEmbeddings
-
-def load_faiss_index(path: str):
-    embeddings = OpenAIEmbeddings()
-    return FAISS.load_local(
-        path,
-        embeddings,
-        allow_dangerous_deserialization=True
-    )
+
+from vectorstore.embedding_cache import build_embeddings
+from vectorstore.faiss_store import load_ann_index, set_search_params
+from vectorstore.sqlite_docstore import SQLiteDocstore
+
+# Vector codes are mapped from disk instead of copied into RAM
+# (IO_FLAG_MMAP proper only works for on-disk inverted lists)
+MMAP_FLAGS = faiss.IO_FLAG_MMAP_IFC
+
+
+def load_faiss_index(
+    path: str,
+    embeddings: Optional[Embeddings] = None,
+    use_ann: bool = True,
+    nprobe: Optional[int] = None,
+    ef_search: Optional[int] = None,
+    mmap: bool = True,
+):
+    """
+    Loads the saved index for querying. If an approximate index (IVF /
+    HNSW / PQ) was built during ingestion and is up to date, it is used
+    instead of the flat one, with the nprobe / efSearch saved at build
+    time; `nprobe` / `ef_search` override them.
+
+    With `mmap=True` the vectors are memory-mapped and, when the
+    ingestion-time SQLite docstore is current, chunks are read from it
+    per hit instead of unpickling the whole docstore. The returned index
+    is read-only; ingestion keeps using `FAISS.load_local`.
+    """
+    embeddings = embeddings or build_embeddings()
+    version = index_version(path)
+    io_flags = MMAP_FLAGS if mmap else 0
+
+    docstore = SQLiteDocstore.open(path, version) if mmap else None
+
+    if docstore is not None:
+        index_to_docstore_id = docstore.index_to_docstore_id()
+    else:
+        # Index written before the SQLite docstore existed
+        with open(Path(path) / "index.pkl", "rb") as f:
+            docstore, index_to_docstore_id = pickle.load(f)
+
+    index = load_ann_index(path, version, io_flags) if use_ann else None
+
+    if index is None:
+        index = faiss.read_index(str(Path(path) / "index.faiss"), io_flags)
+
+    set_search_params(index, nprobe=nprobe, ef_search=ef_search)
+
+    return FAISS(embeddings, index, docstore, index_to_docstore_id)
+
+
+def index_version(path: str) -> Optional[str]:
+    """
+    Cheap fingerprint of the saved index (size + mtime of its files).
+    Changes whenever the index is rebuilt; None if no index exists.
+    """
+    parts = []
+
+    for name in ("index.faiss", "index.pkl"):
+        file = Path(path) / name
+        if not file.exists():
+            return None
+
+        stat = file.stat()
+        parts.append(f"{name}:{stat.st_size}:{stat.st_mtime_ns}")
+
+    return "|".join(parts)
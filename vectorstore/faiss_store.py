@@ -0,0 +1,398 @@
+import argparse
+import json
+import math
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import faiss
+import numpy as np
+
+from vectorstore.index_versions import replace_file
+
+
+INDEX_TYPES = ("flat", "ivf_flat", "hnsw", "ivf_pq")
+
+ANN_INDEX_FILE = "index_ann.faiss"
+ANN_META_FILE = "index_ann.json"
+
+# Vectors copied from the flat index per step when (re)filling
+_ADD_BATCH = 65_536
+
+
+def _default_nlist(n_vectors: int) -> int:
+    # ~4*sqrt(N) lists, but at least 39 training points per list
+    return max(1, min(int(4 * math.sqrt(max(n_vectors, 1))), n_vectors // 39))
+
+
+def create_index(
+    index_type: str,
+    dim: int,
+    n_vectors: int,
+    params: Optional[Dict] = None,
+) -> faiss.Index:
+    """
+    Creates an (untrained) L2 index of the given type.
+
+    params:
+    - ivf_flat / ivf_pq : nlist (default ~4*sqrt(N))
+    - ivf_pq            : m sub-quantizers (default 16, must divide dim), nbits (8)
+    - hnsw              : M neighbours per node (default 32)
+    """
+    params = params or {}
+
+    if index_type == "flat":
+        return faiss.IndexFlatL2(dim)
+
+    if index_type == "hnsw":
+        return faiss.IndexHNSWFlat(dim, params.get("M", 32))
+
+    nlist = params.get("nlist") or _default_nlist(n_vectors)
+    quantizer = faiss.IndexFlatL2(dim)
+
+    if index_type == "ivf_flat":
+        return faiss.IndexIVFFlat(quantizer, dim, nlist)
+
+    if index_type == "ivf_pq":
+        m = params.get("m", 16)
+        if dim % m:
+            m = max(d for d in range(1, m + 1) if dim % d == 0)
+
+        # PQ training needs at least 2**nbits points per sub-quantizer
+        nbits = min(params.get("nbits", 8), max(1, int(math.log2(max(n_vectors, 2)))))
+
+        return faiss.IndexIVFPQ(quantizer, dim, nlist, m, nbits)
+
+    raise ValueError(f"Unknown index type: {index_type} (expected one of {INDEX_TYPES})")
+
+
+def sample_vectors(index: faiss.Index, n: int, seed: int = 0) -> np.ndarray:
+    """
+    Uniform random sample of stored vectors (from a flat index); an
+    empty (0, d) array for an empty index.
+    """
+    n = min(n, index.ntotal)
+    if n <= 0:
+        return np.empty((0, index.d), dtype=np.float32)
+
+    rng = np.random.default_rng(seed)
+    ids = np.sort(rng.choice(index.ntotal, size=n, replace=False))
+
+    return np.vstack([index.reconstruct(int(i)) for i in ids]).astype(np.float32)
+
+
+def _add_range(target: faiss.Index, flat_index: faiss.Index, start: int):
+    for offset in range(start, flat_index.ntotal, _ADD_BATCH):
+        count = min(_ADD_BATCH, flat_index.ntotal - offset)
+        target.add(flat_index.reconstruct_n(offset, count))
+
+
+def _read_meta(faiss_dir: str) -> Dict:
+    meta_path = Path(faiss_dir) / ANN_META_FILE
+    return json.loads(meta_path.read_text()) if meta_path.exists() else {}
+
+
+def ann_config_matches(faiss_dir: str, index_type: str, params: Optional[Dict]) -> bool:
+    """
+    True if the stored ANN index (or its absence, for "flat")
+    matches the requested configuration.
+    """
+    if index_type == "flat":
+        return not (Path(faiss_dir) / ANN_INDEX_FILE).exists()
+
+    meta = _read_meta(faiss_dir)
+    return (
+        (Path(faiss_dir) / ANN_INDEX_FILE).exists()
+        and meta.get("index_type") == index_type
+        and meta.get("params") == (params or {})
+    )
+
+
+def update_ann_index(
+    flat_index: faiss.Index,
+    faiss_dir: str,
+    index_type: str,
+    flat_version: Optional[str],
+    params: Optional[Dict] = None,
+    append_from: Optional[int] = None,
+    train_size: int = 100_000,
+    nprobe: Optional[int] = None,
+    ef_search: Optional[int] = None,
+) -> Optional[faiss.Index]:
+    """
+    Builds or updates the approximate index stored next to the flat one.
+
+    The flat index stays the source of truth (ids are positions, which
+    incremental deletes rely on); the ANN index mirrors it position for
+    position, so FAISS ids map to the same docstore ids.
+
+    - `append_from`: number of vectors the ANN index held before this
+      run when nothing was deleted; only newer vectors are added.
+    - otherwise the index is refilled, reusing its training when type
+      and params are unchanged.
+
+    The query-time default (nprobe for IVF, efSearch for HNSW) is saved
+    in the metadata and applied by `load_ann_index`: the given `nprobe`
+    / `ef_search`, else the cheapest setting that reaches 95% recall
+    (see `tune_search_params`).
+
+    An empty flat index has nothing to train on: no ANN index is kept
+    and searches use the flat one until vectors are added.
+    """
+    ann_path = Path(faiss_dir) / ANN_INDEX_FILE
+    meta_path = Path(faiss_dir) / ANN_META_FILE
+
+    if index_type == "flat" or flat_index.ntotal == 0:
+        ann_path.unlink(missing_ok=True)
+        meta_path.unlink(missing_ok=True)
+        return None
+
+    params = params or {}
+    same_config = ann_config_matches(faiss_dir, index_type, params)
+
+    index = faiss.read_index(str(ann_path)) if same_config else None
+
+    if index is not None and append_from is not None and index.ntotal == append_from:
+        _add_range(index, flat_index, append_from)
+    else:
+        if index is not None:
+            # Keep the trained coarse quantizer / codebooks
+            index.reset()
+        else:
+            index = create_index(index_type, flat_index.d, flat_index.ntotal, params)
+
+        if not index.is_trained:
+            index.train(sample_vectors(flat_index, train_size))
+
+        _add_range(index, flat_index, 0)
+
+    explicit = {
+        key: value
+        for key, value in (("nprobe", nprobe), ("ef_search", ef_search))
+        if value is not None
+    }
+    search = (
+        explicit if _accepts(index, explicit)
+        else tune_search_params(flat_index, index)
+    )
+    set_search_params(index, **search)
+
+    with replace_file(ann_path) as tmp_path:
+        faiss.write_index(index, tmp_path)
+
+    with replace_file(meta_path) as tmp_path:
+        Path(tmp_path).write_text(
+            json.dumps(
+                {
+                    "index_type": index_type,
+                    "params": params,
+                    "search": search,
+                    "ntotal": index.ntotal,
+                    "flat_version": flat_version,
+                },
+                indent=2,
+            )
+        )
+
+    return index
+
+
+def load_ann_index(
+    faiss_dir: str,
+    flat_version: Optional[str],
+    io_flags: int = 0,
+) -> Optional[faiss.Index]:
+    """
+    Loads the ANN index if it mirrors the current flat index.
+    """
+    ann_path = Path(faiss_dir) / ANN_INDEX_FILE
+    meta_path = Path(faiss_dir) / ANN_META_FILE
+
+    if not (ann_path.exists() and meta_path.exists()):
+        return None
+
+    meta = _read_meta(faiss_dir)
+    if meta.get("flat_version") != flat_version:
+        return None
+
+    index = faiss.read_index(str(ann_path), io_flags)
+    set_search_params(index, **meta.get("search", {}))
+
+    return index
+
+
+def search_params_match(
+    faiss_dir: str, nprobe: Optional[int] = None, ef_search: Optional[int] = None
+) -> bool:
+    """
+    False if an explicitly requested nprobe / efSearch differs from the
+    one saved with the ANN index.
+    """
+    search = _read_meta(faiss_dir).get("search", {})
+    return (
+        (nprobe is None or search.get("nprobe", nprobe) == nprobe)
+        and (ef_search is None or search.get("ef_search", ef_search) == ef_search)
+    )
+
+
+def set_search_params(
+    index: faiss.Index,
+    nprobe: Optional[int] = None,
+    ef_search: Optional[int] = None,
+):
+    """
+    Query-time recall/latency knobs (ignored for index types without them).
+    """
+    ivf = _as_ivf(index)
+    if nprobe is not None and ivf is not None:
+        ivf.nprobe = nprobe
+
+    if ef_search is not None and isinstance(index, faiss.IndexHNSW):
+        index.hnsw.efSearch = ef_search
+
+
+def _accepts(index: faiss.Index, search: Dict) -> bool:
+    # Whether `search` sets the knob this index type actually has
+    if _as_ivf(index) is not None:
+        return "nprobe" in search
+    if isinstance(index, faiss.IndexHNSW):
+        return "ef_search" in search
+    return True
+
+
+def tune_search_params(
+    flat_index: faiss.Index,
+    ann_index: faiss.Index,
+    target_recall: float = 0.95,
+    k: int = 10,
+    n_queries: int = 200,
+) -> Dict[str, int]:
+    """
+    Cheapest nprobe (IVF) or efSearch (HNSW) whose recall@k against
+    the flat index reaches `target_recall`; the most accurate setting
+    tried if none does. {} for index types without a knob.
+    """
+    ivf = _as_ivf(ann_index)
+    if ivf is not None:
+        key = "nprobe"
+        values = sorted(
+            {v for v in (1, 2, 4, 8, 16, 32, 64, 128, 256) if v < ivf.nlist}
+            | {ivf.nlist}
+        )
+        rows = recall_report(flat_index, ann_index, n_queries, k, nprobe_values=values)
+    elif isinstance(ann_index, faiss.IndexHNSW):
+        key = "ef_search"
+        values = [16, 32, 64, 128, 256]
+        rows = recall_report(flat_index, ann_index, n_queries, k, ef_values=values)
+    else:
+        return {}
+
+    recalls = [row["recall_at_k"] for row in rows[1:]]
+    chosen = next(
+        (value for value, recall in zip(values, recalls) if recall >= target_recall),
+        values[int(np.argmax(recalls))] if recalls else values[-1],
+    )
+
+    return {key: chosen}
+
+
+def _as_ivf(index: faiss.Index):
+    try:
+        return faiss.extract_index_ivf(index)
+    except RuntimeError:
+        return None
+
+
+def search_parameters(index: faiss.Index, sel=None) -> faiss.SearchParameters:
+    """
+    SearchParameters of the right subtype for `index`, carrying the
+    index's current nprobe / efSearch (explicit params override them).
+    """
+    ivf = _as_ivf(index)
+    if ivf is not None:
+        return faiss.SearchParametersIVF(sel=sel, nprobe=ivf.nprobe)
+
+    if isinstance(index, faiss.IndexHNSW):
+        return faiss.SearchParametersHNSW(sel=sel, efSearch=index.hnsw.efSearch)
+
+    return faiss.SearchParameters(sel=sel)
+
+
+def recall_report(
+    flat_index: faiss.Index,
+    ann_index: faiss.Index,
+    n_queries: int = 200,
+    k: int = 10,
+    nprobe_values: Sequence[int] = (1, 4, 16, 64),
+    ef_values: Sequence[int] = (16, 32, 64, 128),
+    seed: int = 0,
+) -> List[Dict]:
+    """
+    Recall@k and latency of `ann_index` against the exact flat baseline.
+
+    Queries are stored vectors with small Gaussian noise. Returns one row
+    per tested nprobe/efSearch value, plus the flat baseline row (no
+    rows for an empty index).
+    """
+    if flat_index.ntotal == 0:
+        return []
+
+    queries = sample_vectors(flat_index, n_queries, seed=seed)
+    rng = np.random.default_rng(seed)
+    queries += rng.normal(scale=0.01, size=queries.shape).astype(np.float32)
+
+    def timed(index) -> Tuple[np.ndarray, float]:
+        start = time.perf_counter()
+        _, ids = index.search(queries, k)
+        return ids, (time.perf_counter() - start) * 1000 / len(queries)
+
+    truth, flat_ms = timed(flat_index)
+    rows = [{"setting": "flat", "recall_at_k": 1.0, "ms_per_query": flat_ms}]
+
+    if _as_ivf(ann_index) is not None:
+        knobs = [("nprobe", v) for v in nprobe_values]
+    elif isinstance(ann_index, faiss.IndexHNSW):
+        knobs = [("efSearch", v) for v in ef_values]
+    else:
+        knobs = [(None, None)]
+
+    for name, value in knobs:
+        if name == "nprobe":
+            set_search_params(ann_index, nprobe=value)
+        elif name == "efSearch":
+            set_search_params(ann_index, ef_search=value)
+
+        ids, ms = timed(ann_index)
+        hits = sum(len(set(a) & set(b)) for a, b in zip(ids, truth))
+
+        rows.append(
+            {
+                "setting": f"{name}={value}" if name else "default",
+                "recall_at_k": hits / truth.size,
+                "ms_per_query": ms,
+            }
+        )
+
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Recall-vs-latency report of the ANN index against the flat index"
+    )
+    parser.add_argument("faiss_dir", nargs="?", default="vectorstore/faiss_index")
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--nprobe", type=int, nargs="*", default=[1, 4, 16, 64])
+    parser.add_argument("--ef", type=int, nargs="*", default=[16, 32, 64, 128])
+    args = parser.parse_args()
+
+    flat = faiss.read_index(str(Path(args.faiss_dir) / "index.faiss"))
+    ann = faiss.read_index(str(Path(args.faiss_dir) / ANN_INDEX_FILE))
+
+    print(f"{'setting':<14}{'recall@' + str(args.k):>10}{'ms/query':>12}")
+    for row in recall_report(
+        flat, ann, n_queries=args.queries, k=args.k,
+        nprobe_values=args.nprobe, ef_values=args.ef,
+    ):
+        print(f"{row['setting']:<14}{row['recall_at_k']:>10.3f}{row['ms_per_query']:>12.3f}")
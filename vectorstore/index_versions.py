@@ -0,0 +1,155 @@
+import os
+import shutil
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterable, Iterator, List, Optional
+
+# Versioned layout under an index root:
+#
+#   <root>/CURRENT              name of the live version
+#   <root>/versions/<name>/     one complete index (faiss, docstore, manifest, ...)
+#
+# Readers resolve the live directory through CURRENT; a rebuild writes
+# a new version directory and only then rewrites CURRENT in one step.
+#
+# A staged version starts out as hard links to the live files, so index
+# files are never modified in place: writers go through `replace_file`.
+CURRENT_FILE = "CURRENT"
+VERSIONS_DIR = "versions"
+
+
+def current_version(root: str) -> Optional[str]:
+    """
+    Name of the live version, or None for an unversioned root.
+    """
+    path = Path(root) / CURRENT_FILE
+    if not path.exists():
+        return None
+
+    name = path.read_text(encoding="utf-8").strip()
+    return name or None
+
+
+def current_index_dir(root: str) -> str:
+    """
+    Directory holding the live index. A root written before versioning
+    (index files directly inside it) is its own live directory.
+    """
+    name = current_version(root)
+    if name is None:
+        return str(root)
+
+    return str(Path(root) / VERSIONS_DIR / name)
+
+
+def list_versions(root: str) -> List[str]:
+    versions = Path(root) / VERSIONS_DIR
+    if not versions.exists():
+        return []
+
+    # Names are timestamps, so lexical order is build order
+    return sorted(p.name for p in versions.iterdir() if p.is_dir())
+
+
+@contextmanager
+def replace_file(path) -> Iterator[str]:
+    """
+    Yields a temporary path next to `path`; once the block succeeds it
+    replaces `path` in one step. The old file (possibly a hard link
+    shared with another version, or mmapped by a reader) is left intact.
+    """
+    tmp_path = Path(f"{path}.tmp")
+    tmp_path.unlink(missing_ok=True)
+
+    try:
+        yield str(tmp_path)
+        os.replace(tmp_path, path)
+    finally:
+        tmp_path.unlink(missing_ok=True)
+
+
+def _link_or_copy(source: Path, target: Path):
+    try:
+        os.link(source, target)
+    except OSError:
+        # e.g. a filesystem without hard links
+        shutil.copy2(source, target)
+
+
+def stage_version(root: str) -> str:
+    """
+    Creates a new version directory seeded with the live index, so the
+    rebuild stays incremental. Files are hard-linked (copied where links
+    are not supported): unchanged files cost nothing, and changed ones
+    are replaced, never written through, so the live files stay as they
+    are. Links and copies keep their mtimes, so version-stamped sidecars
+    (docstore, partitions, BM25) stay valid in the new version.
+    """
+    versions = Path(root) / VERSIONS_DIR
+    versions.mkdir(parents=True, exist_ok=True)
+
+    name = time.strftime("%Y%m%d-%H%M%S")
+    suffix = 0
+    while (versions / f"{name}-{suffix:03d}").exists():
+        suffix += 1
+
+    target = versions / f"{name}-{suffix:03d}"
+    source = Path(current_index_dir(root))
+
+    target.mkdir()
+    if source.exists():
+        for path in source.iterdir():
+            if path.is_file() and path.name != CURRENT_FILE:
+                _link_or_copy(path, target / path.name)
+
+    return str(target)
+
+
+def publish_version(root: str, version_dir: str):
+    """
+    Makes `version_dir` the live index. CURRENT is replaced atomically,
+    so readers see either the old version or the new one, never a mix.
+    """
+    path = Path(root) / CURRENT_FILE
+    tmp_path = path.with_suffix(".tmp")
+
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(Path(version_dir).name + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+
+    os.replace(tmp_path, path)
+
+
+def discard_version(version_dir: str):
+    shutil.rmtree(version_dir, ignore_errors=True)
+
+
+def prune_versions(
+    root: str, keep: int = 2, in_use: Iterable[str] = ()
+) -> List[str]:
+    """
+    Deletes all but the `keep` newest versions (never the live one, nor
+    the versions named in `in_use`). Keeping the previous version lets
+    in-flight queries on it finish.
+
+    Only the caller's own leases can be passed in `in_use`: versions
+    served by other processes are not tracked, so a root is meant to be
+    served by one process (others must tolerate pruning, e.g. through a
+    larger `keep`).
+    """
+    live = current_version(root)
+    in_use = set(in_use)
+    old = [
+        name for name in list_versions(root)
+        if name != live and name not in in_use
+    ]
+
+    # The live version counts towards `keep`
+    doomed = old[:max(0, len(old) - max(keep - 1, 0))]
+
+    for name in doomed:
+        discard_version(str(Path(root) / VERSIONS_DIR / name))
+
+    return doomed
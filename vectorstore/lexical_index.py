@@ -0,0 +1,257 @@
+import math
+import re
+from collections import Counter
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from langchain_community.vectorstores import FAISS
+
+from vectorstore.faiss_loader import index_version
+from vectorstore.index_versions import replace_file
+
+
+# Words, plus numbers with decimal / thousands separators ("1,250.5")
+_TOKEN_RE = re.compile(r"[a-z0-9]+(?:[.,][0-9]+)*")
+
+
+# Function words that would make every sentence look query-relevant
+STOPWORDS = frozenset(
+    "a an and are as at be by did do does for from has have how in is it "
+    "its of on or that the their there this to was were what when where "
+    "which who why will with".split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    return _TOKEN_RE.findall(text.lower())
+
+
+class BM25Index:
+    """
+    In-process BM25 inverted index over the chunks of the vector store.
+
+    Postings are stored CSR-style (one slice of chunk indices and term
+    frequencies per term), so a query only touches the postings of its
+    own terms. Chunks are identified by their docstore id, and their
+    `document_type` is kept alongside so routed queries can be masked
+    without looking up metadata.
+    """
+
+    FILENAME = "lexical.npz"
+
+    def __init__(
+        self,
+        terms: np.ndarray,
+        indptr: np.ndarray,
+        postings: np.ndarray,
+        frequencies: np.ndarray,
+        doc_lengths: np.ndarray,
+        doc_ids: np.ndarray,
+        doc_types: np.ndarray,
+        k1: float = 1.5,
+        b: float = 0.75,
+    ):
+        self.terms = terms
+        self.indptr = indptr
+        self.postings = postings
+        self.frequencies = frequencies
+        self.doc_lengths = doc_lengths
+        self.doc_ids = doc_ids
+        self.doc_types = doc_types
+        self.k1 = k1
+        self.b = b
+
+        self._vocab = {term: i for i, term in enumerate(terms.tolist())}
+
+        # Length normalisation is query independent: precompute it
+        self.avg_length = float(doc_lengths.mean()) if len(doc_lengths) else 1.0
+        self._norm = (
+            k1 * (1 - b + b * doc_lengths / max(self.avg_length, 1e-9))
+        ).astype(np.float32)
+
+    def __len__(self) -> int:
+        return len(self.doc_ids)
+
+    @classmethod
+    def build(
+        cls, chunks: Iterable[Tuple[str, str, str]], **kwargs
+    ) -> "BM25Index":
+        """
+        Builds the index from (docstore id, text, document type) triples.
+        """
+        doc_ids, doc_types, doc_lengths = [], [], []
+        term_postings: Dict[str, List[Tuple[int, int]]] = {}
+
+        for position, (doc_id, text, doc_type) in enumerate(chunks):
+            counts = Counter(tokenize(text))
+
+            doc_ids.append(doc_id)
+            doc_types.append(doc_type)
+            doc_lengths.append(sum(counts.values()))
+
+            for term, count in counts.items():
+                term_postings.setdefault(term, []).append((position, count))
+
+        terms = sorted(term_postings)
+        indptr = np.zeros(len(terms) + 1, dtype=np.int64)
+        postings, frequencies = [], []
+
+        for i, term in enumerate(terms):
+            entries = term_postings[term]
+            indptr[i + 1] = indptr[i] + len(entries)
+            postings.extend(position for position, _ in entries)
+            frequencies.extend(count for _, count in entries)
+
+        return cls(
+            terms=np.asarray(terms, dtype=np.str_),
+            indptr=indptr,
+            postings=np.asarray(postings, dtype=np.int32),
+            frequencies=np.asarray(frequencies, dtype=np.float32),
+            doc_lengths=np.asarray(doc_lengths, dtype=np.float32),
+            doc_ids=np.asarray(doc_ids, dtype=np.str_),
+            doc_types=np.asarray(doc_types, dtype=np.str_),
+            **kwargs,
+        )
+
+    @classmethod
+    def from_vectorstore(cls, vectorstore: FAISS, **kwargs) -> "BM25Index":
+        def chunks():
+            for doc_id in vectorstore.index_to_docstore_id.values():
+                doc = vectorstore.docstore.search(doc_id)
+                yield (
+                    doc_id,
+                    doc.page_content,
+                    doc.metadata.get("document_type", "unknown"),
+                )
+
+        return cls.build(chunks(), **kwargs)
+
+    def save(self, faiss_dir: str):
+        """
+        Saves the index next to the FAISS index, stamped with its version
+        and the BM25 parameters its length normalisation was built with.
+        """
+        with replace_file(Path(faiss_dir) / self.FILENAME) as tmp_path:
+            with open(tmp_path, "wb") as f:
+                np.savez(
+                    f,
+                    version=np.asarray(index_version(faiss_dir) or ""),
+                    k1=np.asarray(self.k1),
+                    b=np.asarray(self.b),
+                    terms=self.terms,
+                    indptr=self.indptr,
+                    postings=self.postings,
+                    frequencies=self.frequencies,
+                    doc_lengths=self.doc_lengths,
+                    doc_ids=self.doc_ids,
+                    doc_types=self.doc_types,
+                )
+
+    @classmethod
+    def load_or_build(
+        cls,
+        faiss_dir: str,
+        vectorstore: FAISS,
+        k1: float = 1.5,
+        b: float = 0.75,
+    ) -> "BM25Index":
+        """
+        Loads the saved index if it matches the FAISS index version and
+        the requested `k1` / `b`; otherwise rebuilds it from the vector
+        store.
+        """
+        path = Path(faiss_dir) / cls.FILENAME
+
+        if path.exists():
+            with np.load(path) as data:
+                if (
+                    str(data["version"]) == (index_version(faiss_dir) or "")
+                    and "k1" in data.files
+                    and float(data["k1"]) == k1
+                    and float(data["b"]) == b
+                ):
+                    return cls(
+                        **{k: data[k] for k in data.files if k not in ("version", "k1", "b")},
+                        k1=k1,
+                        b=b,
+                    )
+
+        return cls.from_vectorstore(vectorstore, k1=k1, b=b)
+
+    def idf(self, terms: Sequence[str]) -> np.ndarray:
+        """
+        BM25 idf of each term over the whole corpus (unseen terms get
+        the maximum idf).
+        """
+        n_docs = len(self.doc_ids)
+        df = np.zeros(len(terms), dtype=np.float32)
+
+        for i, term in enumerate(terms):
+            term_id = self._vocab.get(term)
+            if term_id is not None:
+                df[i] = self.indptr[term_id + 1] - self.indptr[term_id]
+
+        return np.log(1 + (n_docs - df + 0.5) / (df + 0.5)).astype(np.float32)
+
+    def search(
+        self,
+        query: str,
+        k: int,
+        doc_types: Optional[Sequence[str]] = None,
+    ) -> List[Tuple[str, float]]:
+        """
+        Top-k (docstore id, BM25 score), optionally restricted to
+        the given document types. Chunks sharing no term are skipped.
+        """
+        n_docs = len(self.doc_ids)
+        if k <= 0 or n_docs == 0:
+            return []
+
+        scores = np.zeros(n_docs, dtype=np.float32)
+
+        for term in set(tokenize(query)):
+            term_id = self._vocab.get(term)
+            if term_id is None:
+                continue
+
+            start, end = self.indptr[term_id], self.indptr[term_id + 1]
+            docs = self.postings[start:end]
+            tf = self.frequencies[start:end]
+
+            df = end - start
+            idf = math.log(1 + (n_docs - df + 0.5) / (df + 0.5))
+
+            # Each chunk appears once per term's postings
+            scores[docs] += idf * tf * (self.k1 + 1) / (tf + self._norm[docs])
+
+        if doc_types:
+            scores[~np.isin(self.doc_types, list(doc_types))] = 0
+
+        candidates = np.flatnonzero(scores)
+        if len(candidates) > k:
+            candidates = candidates[
+                np.argpartition(-scores[candidates], k - 1)[:k]
+            ]
+
+        candidates = candidates[np.argsort(-scores[candidates], kind="stable")]
+
+        return [
+            (str(self.doc_ids[i]), float(scores[i])) for i in candidates
+        ]
+
+
+def reciprocal_rank_fusion(
+    rankings: Sequence[Sequence[str]], k: int = 60
+) -> List[str]:
+    """
+    Fuses ranked id lists: score(id) = sum over lists of 1 / (k + rank).
+    Ties keep the order in which ids were first seen.
+    """
+    scores: Dict[str, float] = {}
+
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking, start=1):
+            scores[doc_id] = scores.get(doc_id, 0.0) + 1.0 / (k + rank)
+
+    return sorted(scores, key=lambda doc_id: -scores[doc_id])
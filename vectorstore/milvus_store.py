@@ -0,0 +1,321 @@
+import json
+import time
+import uuid
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import VectorStore
+from pymilvus import DataType, MilvusClient
+
+
+DEFAULT_MILVUS_URI = "vectorstore/milvus.db"
+
+# Metadata promoted to scalar columns so filters run server-side on
+# plain fields; everything else stays queryable through the JSON column
+SCALAR_FIELDS = ("source_key", "document_type", "section")
+
+_VERSION_PROPERTY = "rag.index_version"
+
+
+class MilvusStore(VectorStore):
+    """
+    Milvus-backed vector store with the same retrieval contract as the
+    FAISS store: `similarity_search*` accept the `{field: [values]}`
+    filters built by RetrievalAgent, translated into a Milvus boolean
+    expression and applied server-side.
+
+    `uri` may be a local file path (Milvus Lite, no server needed) or a
+    server address such as "http://localhost:19530".
+    """
+
+    # Rows per insert / upsert request
+    _WRITE_BATCH = 1000
+
+    def __init__(
+        self,
+        embedding: Embeddings,
+        uri: str = DEFAULT_MILVUS_URI,
+        collection_name: str = "rag_chunks",
+        metric_type: str = "L2",
+        index_type: str = "AUTOINDEX",
+        token: str = "",
+    ):
+        self._embeddings = embedding
+        self.collection_name = collection_name
+        self.metric_type = metric_type
+        self.index_type = index_type
+        self.client = MilvusClient(uri=uri, token=token)
+
+        if self.client.has_collection(collection_name):
+            self.client.load_collection(collection_name)
+
+    @property
+    def embeddings(self) -> Embeddings:
+        return self._embeddings
+
+
+    # Collection management
+
+    def _ensure_collection(self, dim: int):
+        if self.client.has_collection(self.collection_name):
+            return
+
+        schema = MilvusClient.create_schema(auto_id=False)
+        schema.add_field("id", DataType.VARCHAR, is_primary=True, max_length=1024)
+        schema.add_field("vector", DataType.FLOAT_VECTOR, dim=dim)
+        schema.add_field("text", DataType.VARCHAR, max_length=65535)
+        schema.add_field("source_key", DataType.VARCHAR, max_length=1024)
+        schema.add_field("document_type", DataType.VARCHAR, max_length=64)
+        schema.add_field("section", DataType.VARCHAR, max_length=256)
+        schema.add_field("metadata", DataType.JSON)
+
+        index_params = self.client.prepare_index_params()
+        index_params.add_index(
+            "vector", index_type=self.index_type, metric_type=self.metric_type
+        )
+
+        self.client.create_collection(
+            self.collection_name, schema=schema, index_params=index_params
+        )
+
+    def drop(self):
+        if self.client.has_collection(self.collection_name):
+            self.client.drop_collection(self.collection_name)
+
+    def count(self) -> int:
+        if not self.client.has_collection(self.collection_name):
+            return 0
+
+        stats = self.client.get_collection_stats(self.collection_name)
+        return int(stats["row_count"])
+
+    def version(self) -> Optional[str]:
+        """
+        Changes every time `mark_updated` is called after a write;
+        None if the collection does not exist.
+        """
+        if not self.client.has_collection(self.collection_name):
+            return None
+
+        properties = self.client.describe_collection(
+            self.collection_name
+        ).get("properties", {})
+
+        return properties.get(_VERSION_PROPERTY, "")
+
+    def mark_updated(self):
+        """
+        Flushes pending writes and stamps a new version, so caches keyed
+        by the index version are invalidated.
+        """
+        self.client.flush(self.collection_name)
+        self.client.alter_collection_properties(
+            self.collection_name,
+            properties={_VERSION_PROPERTY: f"{time.time_ns()}:{self.count()}"},
+        )
+
+
+    # Writes
+
+    def add_embeddings(
+        self,
+        text_embeddings: Iterable[Tuple[str, List[float]]],
+        metadatas: Optional[List[Dict]] = None,
+        ids: Optional[List[str]] = None,
+        source_keys: Optional[List[str]] = None,
+    ) -> List[str]:
+        """
+        Bulk upsert of pre-computed embeddings. Rows are keyed by id,
+        so re-sending a chunk replaces it instead of duplicating it.
+        """
+        text_embeddings = list(text_embeddings)
+        if not text_embeddings:
+            return []
+
+        metadatas = metadatas or [{} for _ in text_embeddings]
+        ids = ids or [str(uuid.uuid4()) for _ in text_embeddings]
+
+        self._ensure_collection(len(text_embeddings[0][1]))
+
+        rows = []
+        for i, ((text, vector), metadata) in enumerate(
+            zip(text_embeddings, metadatas)
+        ):
+            rows.append(
+                {
+                    "id": ids[i],
+                    "vector": [float(x) for x in vector],
+                    "text": text,
+                    "source_key": (
+                        source_keys[i] if source_keys
+                        else str(metadata.get("source", ""))
+                    ),
+                    "document_type": str(metadata.get("document_type", "")),
+                    "section": str(metadata.get("section", "")),
+                    "metadata": json.loads(json.dumps(metadata, default=str)),
+                }
+            )
+
+        for start in range(0, len(rows), self._WRITE_BATCH):
+            self.client.upsert(
+                self.collection_name, rows[start:start + self._WRITE_BATCH]
+            )
+
+        return ids
+
+    def add_texts(
+        self,
+        texts: Iterable[str],
+        metadatas: Optional[List[Dict]] = None,
+        ids: Optional[List[str]] = None,
+        **kwargs: Any,
+    ) -> List[str]:
+        texts = list(texts)
+        vectors = self._embeddings.embed_documents(texts)
+
+        return self.add_embeddings(
+            zip(texts, vectors),
+            metadatas=metadatas,
+            ids=ids,
+            source_keys=kwargs.get("source_keys"),
+        )
+
+    def delete(self, ids: Optional[List[str]] = None, **kwargs: Any) -> bool:
+        if not ids or not self.client.has_collection(self.collection_name):
+            return True
+
+        self.client.delete(self.collection_name, ids=list(ids))
+        return True
+
+    def delete_sources(self, source_keys: List[str]):
+        """
+        Removes every chunk of the given source files server-side;
+        followed by `add_embeddings`, this is an upsert by source.
+        """
+        if not source_keys or not self.client.has_collection(self.collection_name):
+            return
+
+        self.client.delete(
+            self.collection_name,
+            filter=f"source_key in {json.dumps(list(source_keys))}",
+        )
+
+    @classmethod
+    def from_texts(
+        cls,
+        texts: List[str],
+        embedding: Embeddings,
+        metadatas: Optional[List[Dict]] = None,
+        ids: Optional[List[str]] = None,
+        **kwargs: Any,
+    ) -> "MilvusStore":
+        store = cls(embedding, **kwargs)
+        store.add_texts(texts, metadatas=metadatas, ids=ids)
+        return store
+
+
+    # Search
+
+    @staticmethod
+    def build_expr(metadata_filter: Optional[Dict]) -> str:
+        """
+        Translates a `{field: value | [values]}` filter into a Milvus
+        boolean expression. Scalar columns use `in`; other keys are
+        matched inside the JSON metadata column.
+        """
+        clauses = []
+
+        for field, values in (metadata_filter or {}).items():
+            if not isinstance(values, (list, tuple, set)):
+                values = [values]
+            values = list(values)
+
+            if field in SCALAR_FIELDS:
+                clauses.append(f"{field} in {json.dumps(values)}")
+            else:
+                clauses.append(
+                    "("
+                    + " or ".join(
+                        f"metadata[{json.dumps(field)}] == {json.dumps(v)}"
+                        for v in values
+                    )
+                    + ")"
+                )
+
+        return " and ".join(clauses)
+
+    def similarity_search_with_score_by_vector(
+        self,
+        embedding: List[float],
+        k: int = 4,
+        filter: Optional[Dict] = None,
+        **kwargs: Any,
+    ) -> List[Tuple[Document, float]]:
+        if not self.client.has_collection(self.collection_name):
+            return []
+
+        hits = self.client.search(
+            self.collection_name,
+            data=[[float(x) for x in embedding]],
+            filter=self.build_expr(filter),
+            limit=k,
+            output_fields=["text", "metadata"],
+        )[0]
+
+        return [
+            (
+                Document(
+                    id=hit["id"],
+                    page_content=hit["entity"]["text"],
+                    metadata=hit["entity"]["metadata"],
+                ),
+                float(hit["distance"]),
+            )
+            for hit in hits
+        ]
+
+    def similarity_search_by_vector(
+        self,
+        embedding: List[float],
+        k: int = 4,
+        filter: Optional[Dict] = None,
+        **kwargs: Any,
+    ) -> List[Document]:
+        return [
+            doc
+            for doc, _ in self.similarity_search_with_score_by_vector(
+                embedding, k=k, filter=filter
+            )
+        ]
+
+    def similarity_search_with_score(
+        self,
+        query: str,
+        k: int = 4,
+        filter: Optional[Dict] = None,
+        **kwargs: Any,
+    ) -> List[Tuple[Document, float]]:
+        return self.similarity_search_with_score_by_vector(
+            self._embeddings.embed_query(query), k=k, filter=filter
+        )
+
+    def similarity_search(
+        self,
+        query: str,
+        k: int = 4,
+        filter: Optional[Dict] = None,
+        **kwargs: Any,
+    ) -> List[Document]:
+        return [
+            doc
+            for doc, _ in self.similarity_search_with_score(
+                query, k=k, filter=filter
+            )
+        ]
+
+    def _select_relevance_score_fn(self) -> Callable[[float], float]:
+        if self.metric_type == "L2":
+            return self._euclidean_relevance_score_fn
+
+        return self._max_inner_product_relevance_score_fn
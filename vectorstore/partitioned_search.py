@@ -0,0 +1,157 @@
+from pathlib import Path
+from typing import Dict, FrozenSet, List, Optional, Tuple
+
+import faiss
+import numpy as np
+from langchain_community.vectorstores import FAISS
+from langchain_core.documents import Document
+
+from vectorstore.faiss_loader import index_version
+from vectorstore.faiss_store import search_parameters
+from vectorstore.index_versions import replace_file
+
+
+class DocumentTypePartitions:
+    """
+    Partitions a FAISS index by `document_type`.
+
+    Each partition is the set of FAISS ids holding chunks of one
+    document type. Routed searches pass an ID selector for the allowed
+    partitions into `index.search`, so FAISS only scores vectors of
+    those types and returns an exact top-k, instead of over-fetching
+    and post-filtering.
+    """
+
+    FILENAME = "partitions.npz"
+
+    def __init__(self, partitions: Dict[str, np.ndarray]):
+        self.partitions = partitions
+        self._selectors: Dict[FrozenSet[str], Tuple[object, int]] = {}
+
+    @classmethod
+    def from_vectorstore(cls, vectorstore: FAISS) -> "DocumentTypePartitions":
+        ids_by_type: Dict[str, List[int]] = {}
+
+        for position, doc_id in vectorstore.index_to_docstore_id.items():
+            doc = vectorstore.docstore.search(doc_id)
+            doc_type = doc.metadata.get("document_type", "unknown")
+            ids_by_type.setdefault(doc_type, []).append(position)
+
+        return cls(
+            {
+                doc_type: np.asarray(sorted(ids), dtype=np.int64)
+                for doc_type, ids in ids_by_type.items()
+            }
+        )
+
+    def save(self, faiss_dir: str):
+        """
+        Saves partitions next to the index, stamped with the index
+        version so a stale file is never trusted.
+        """
+        with replace_file(Path(faiss_dir) / self.FILENAME) as tmp_path:
+            with open(tmp_path, "wb") as f:
+                np.savez(
+                    f,
+                    __version__=np.asarray(index_version(faiss_dir) or ""),
+                    **self.partitions,
+                )
+
+    @classmethod
+    def load_or_build(
+        cls, faiss_dir: str, vectorstore: FAISS
+    ) -> "DocumentTypePartitions":
+        path = Path(faiss_dir) / cls.FILENAME
+
+        if path.exists():
+            with np.load(path) as data:
+                if str(data["__version__"]) == (index_version(faiss_dir) or ""):
+                    return cls(
+                        {k: data[k] for k in data.files if k != "__version__"}
+                    )
+
+        return cls.from_vectorstore(vectorstore)
+
+    def size(self, doc_types: List[str]) -> int:
+        return sum(len(self.partitions.get(t, ())) for t in doc_types)
+
+    def _selector(self, doc_types: List[str]) -> Tuple[object, int]:
+        key = frozenset(doc_types)
+
+        if key not in self._selectors:
+            ids = [self.partitions[t] for t in key if t in self.partitions]
+            ids = np.concatenate(ids) if ids else np.empty(0, dtype=np.int64)
+            self._selectors[key] = (faiss.IDSelectorBatch(ids), len(ids))
+
+        return self._selectors[key]
+
+    def search(
+        self,
+        vectorstore: FAISS,
+        embedding: List[float],
+        k: int,
+        doc_types: List[str],
+    ) -> List[Tuple[Document, float]]:
+        """
+        Exact top-k restricted to the given document types.
+        """
+        return self.search_batch(vectorstore, [embedding], k, doc_types)[0]
+
+    def search_batch(
+        self,
+        vectorstore: FAISS,
+        embeddings: List[List[float]],
+        k: int,
+        doc_types: List[str],
+    ) -> List[List[Tuple[Document, float]]]:
+        """
+        Top-k per query, for many queries in one `index.search` call.
+        """
+        selector, size = self._selector(doc_types)
+        if size == 0:
+            return [[] for _ in embeddings]
+
+        return search_vectors(
+            vectorstore,
+            embeddings,
+            min(k, size),
+            params=search_parameters(vectorstore.index, sel=selector),
+        )
+
+
+def search_vectors(
+    vectorstore: FAISS,
+    embeddings: List[List[float]],
+    k: int,
+    params: Optional[faiss.SearchParameters] = None,
+) -> List[List[Tuple[Document, float]]]:
+    """
+    Searches a batch of query vectors against the FAISS index at once
+    and maps the hits back to docstore documents.
+    """
+    if not len(embeddings) or k <= 0:
+        return [[] for _ in embeddings]
+
+    vectors = np.asarray(embeddings, dtype=np.float32)
+    if vectorstore._normalize_L2:
+        faiss.normalize_L2(vectors)
+
+    k = min(k, vectorstore.index.ntotal)
+    if k == 0:
+        return [[] for _ in embeddings]
+
+    scores, positions = vectorstore.index.search(vectors, k, params=params)
+
+    results = []
+    for row_scores, row_positions in zip(scores, positions):
+        hits = []
+        for score, position in zip(row_scores, row_positions):
+            if position == -1:
+                continue
+
+            doc_id = vectorstore.index_to_docstore_id[int(position)]
+            hits.append((vectorstore.docstore.search(doc_id), float(score)))
+
+        results.append(hits)
+
+    return results
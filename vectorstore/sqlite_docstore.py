@@ -0,0 +1,163 @@
+import json
+import os
+import sqlite3
+import threading
+from collections.abc import Mapping
+from pathlib import Path
+from typing import Iterator, Optional, Tuple, Union
+
+from langchain_community.docstore.base import Docstore
+from langchain_community.vectorstores import FAISS
+from langchain_core.documents import Document
+
+
+DOCSTORE_FILE = "docstore.sqlite"
+
+
+class SQLiteDocstore(Docstore):
+    """
+    Read-only docstore over the chunk table written at ingestion time.
+
+    Unlike the pickled InMemoryDocstore, nothing is deserialized up
+    front: chunk text and metadata are fetched by primary key only for
+    the search hits, and worker processes share the OS page cache
+    instead of each holding a private copy.
+    """
+
+    def __init__(self, path: str):
+        self.path = str(path)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            f"file:{self.path}?mode=ro", uri=True, check_same_thread=False
+        )
+
+    @classmethod
+    def open(
+        cls, faiss_dir: str, flat_version: Optional[str]
+    ) -> Optional["SQLiteDocstore"]:
+        """
+        Opens the docstore if it was written for the current flat index.
+        """
+        path = Path(faiss_dir) / DOCSTORE_FILE
+        if flat_version is None or not path.exists():
+            return None
+
+        docstore = cls(str(path))
+        if docstore.meta("flat_version") != flat_version:
+            docstore.close()
+            return None
+
+        return docstore
+
+    @staticmethod
+    def write(faiss_dir: str, vectorstore: FAISS, flat_version: Optional[str]):
+        """
+        Exports the vector store's docstore and id mapping, stamped with
+        the flat index version. Written to a temp file and swapped in,
+        so open readers keep a consistent snapshot.
+        """
+        path = Path(faiss_dir) / DOCSTORE_FILE
+        tmp_path = path.with_suffix(".sqlite.tmp")
+        tmp_path.unlink(missing_ok=True)
+
+        conn = sqlite3.connect(tmp_path)
+        conn.execute("PRAGMA journal_mode=OFF")
+        conn.execute("PRAGMA synchronous=OFF")
+        conn.execute(
+            """
+            CREATE TABLE chunks (
+                position INTEGER PRIMARY KEY,
+                id TEXT NOT NULL UNIQUE,
+                page_content TEXT NOT NULL,
+                metadata TEXT NOT NULL
+            )
+            """
+        )
+        conn.execute("CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT)")
+
+        def rows():
+            for position, doc_id in vectorstore.index_to_docstore_id.items():
+                doc = vectorstore.docstore.search(doc_id)
+                yield (
+                    position,
+                    doc_id,
+                    doc.page_content,
+                    json.dumps(doc.metadata, default=str),
+                )
+
+        conn.executemany("INSERT INTO chunks VALUES (?, ?, ?, ?)", rows())
+        conn.execute(
+            "INSERT INTO meta VALUES ('flat_version', ?)", (flat_version,)
+        )
+        conn.commit()
+        conn.close()
+
+        os.replace(tmp_path, path)
+
+    def meta(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM meta WHERE key = ?", (key,)
+            ).fetchone()
+
+        return row[0] if row else None
+
+    def search(self, search: str) -> Union[str, Document]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT page_content, metadata FROM chunks WHERE id = ?",
+                (search,),
+            ).fetchone()
+
+        if row is None:
+            return f"ID {search} not found."
+
+        return Document(
+            id=search, page_content=row[0], metadata=json.loads(row[1])
+        )
+
+    def index_to_docstore_id(self) -> "PositionMap":
+        return PositionMap(self)
+
+    def close(self):
+        self._conn.close()
+
+
+class PositionMap(Mapping):
+    """
+    FAISS position -> docstore id, looked up on demand.
+    """
+
+    def __init__(self, docstore: SQLiteDocstore):
+        self._docstore = docstore
+        self._len: Optional[int] = None
+
+    def _query(self, sql: str, params: Tuple = ()):
+        with self._docstore._lock:
+            return self._docstore._conn.execute(sql, params).fetchall()
+
+    def __getitem__(self, position: int) -> str:
+        rows = self._query(
+            "SELECT id FROM chunks WHERE position = ?", (int(position),)
+        )
+        if not rows:
+            raise KeyError(position)
+
+        return rows[0][0]
+
+    def __len__(self) -> int:
+        # The file is read-only, so the count never changes
+        if self._len is None:
+            self._len = self._query("SELECT COUNT(*) FROM chunks")[0][0]
+
+        return self._len
+
+    def __iter__(self) -> Iterator[int]:
+        rows = self._query("SELECT position FROM chunks ORDER BY position")
+        return (row[0] for row in rows)
+
+    def items(self):
+        return self._query("SELECT position, id FROM chunks ORDER BY position")
+
+    def values(self):
+        return [row[1] for row in self.items()]